@@ -1,58 +1,106 @@
-import requests
-from typing import Dict, List
-import pandas as pd
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from config import get_section
+from services.fetcher import AsyncFetcher
+from analytics.sentiment import SentimentScorer, article_text
+from analytics.indicators import IndicatorEngine
+from utils.metrics import timed
 
 class MarketAnalysisAgent:
-    def __init__(self):
+    def __init__(self, fetcher: AsyncFetcher = None, sentiment: SentimentScorer = None,
+                 indicators: IndicatorEngine = None):
+        settings = get_section('market_data')
         self.data_sources = {
             'financial_news': "https://newsapi.org/v2/everything",
             'economic_indicators': "https://api.stlouisfed.org/fred/series/observations"
         }
-        self.api_keys = {}  # To be configured
-
-    async def analyze_market_trends(self) -> Dict[str, float]:
-        """Analyze current market trends from various data sources"""
-        results = {
-            'market_volatility': 0.0,
-            'sector_risks': {},
-            'economic_outlook': 0.0
+        self.data_sources.update(settings.get('sources') or {})
+        api_keys = get_section('api_keys')
+        self.api_keys = {
+            'news': api_keys.get('news_api'),
+            'fred': api_keys.get('fred_api')
         }
-        
-        # Example analysis implementation
+        self.fetcher = fetcher or AsyncFetcher.from_settings(settings)
+        self.sentiment = sentiment or SentimentScorer.from_settings(get_section('sentiment'))
+        self.indicators = indicators or IndicatorEngine.from_settings(
+            self.fetcher,
+            self.data_sources['economic_indicators'],
+            self.api_keys.get('fred'),
+            get_section('economic_indicators')
+        )
+        # News keywords that attribute an article to a sector
+        self.sector_patterns = {
+            sector: re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b', re.IGNORECASE)
+            for sector, keywords in (get_section('market_risk').get('sectors') or {}).items()
+            if keywords
+        }
+        self._news = None  # (volatility, sector risks) from the last news fetch that succeeded
+
+    @timed
+    async def analyze_market_trends(self) -> Optional[Dict[str, float]]:
+        """Analyze current market trends from various data sources.
+
+        When the news fetch fails, the news signals of the last successful
+        fetch are reused. Returns None if no source could be read at all, so
+        callers keep their previous data instead of zeroed defaults.
+        """
+        # Fetch news and sync economic indicators concurrently
         try:
-            # Get financial news sentiment
-            news_response = requests.get(
-                self.data_sources['financial_news'],
-                params={'q': 'economy', 'apiKey': self.api_keys.get('news')}
-            )
-            if news_response.status_code == 200:
-                articles = news_response.json().get('articles', [])
-                results['market_volatility'] = self._calculate_news_sentiment(articles)
-            
-            # Get economic indicators
-            econ_response = requests.get(
-                self.data_sources['economic_indicators'],
-                params={
-                    'series_id': 'GDP',
-                    'api_key': self.api_keys.get('fred')
-                }
+            articles_data, (outlook, indicators) = await asyncio.gather(
+                self.fetcher.fetch_json(
+                    'financial_news',
+                    self.data_sources['financial_news'],
+                    {'q': 'economy', 'apiKey': self.api_keys.get('news')}
+                ),
+                self._analyze_economic_indicators()
             )
-            if econ_response.status_code == 200:
-                econ_data = econ_response.json()
-                results['economic_outlook'] = self._analyze_economic_indicators(econ_data)
-                
+
+            # Get financial news sentiment
+            if articles_data is not None:
+                articles = articles_data.get('articles', [])
+                self._news = (
+                    await self._calculate_news_sentiment(articles),
+                    await self._calculate_sector_risks(articles)
+                )
         except Exception as e:
             print(f"Market analysis error: {str(e)}")
-        
-        return results
+            return None
 
-    def _calculate_news_sentiment(self, articles: List[Dict]) -> float:
+        if self._news is None and not indicators:
+            print("Market analysis error: no market data source could be read")
+            return None
+        volatility, sector_risks = self._news or (0.0, {})
+        return {
+            'market_volatility': volatility,
+            'sector_risks': dict(sector_risks),
+            'economic_outlook': outlook,
+            'economic_indicators': indicators
+        }
+
+    async def _calculate_news_sentiment(self, articles: List[Dict]) -> float:
         """Calculate sentiment score from news articles"""
-        # Placeholder for actual NLP implementation
-        return sum(len(article['title']) % 10 * 0.1 for article in articles) / len(articles) if articles else 0.0
+        if not articles:
+            return 0.0
+        # VADER compound scores run from -1 (negative) to 1; negative news means volatility
+        scores = await self.sentiment.score_articles(articles)
+        return sum((1 - score) / 2 for score in scores) / len(scores)
+
+    async def _calculate_sector_risks(self, articles: List[Dict]) -> Dict[str, float]:
+        """News risk per sector, from the articles mentioning each sector's keywords"""
+        if not articles or not self.sector_patterns:
+            return {}
+        scores = await self.sentiment.score_articles(articles)  # cached by the call above
+        texts = [article_text(article) for article in articles]
+        risks = {}
+        for sector, pattern in self.sector_patterns.items():
+            matched = [(1 - score) / 2 for text, score in zip(texts, scores) if pattern.search(text)]
+            if matched:
+                risks[sector] = sum(matched) / len(matched)
+        return risks
 
-    def _analyze_economic_indicators(self, data: Dict) -> float:
+    async def _analyze_economic_indicators(self) -> Tuple[float, Dict[str, Dict]]:
         """Analyze economic indicators data"""
-        # Placeholder for actual analysis
-        return 0.5  # Neutral baseline
\ No newline at end of file
+        # Only new observations are downloaded; warm calls read the local cache
+        return await self.indicators.outlook()
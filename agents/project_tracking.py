@@ -1,10 +1,28 @@
-from typing import Dict, List
-import pandas as pd
+from typing import Dict, List, Tuple
+import math
+import threading
 from datetime import datetime, timedelta
+from config import get_section
+from storage.history import HistoryStore, create_history_store
+from analytics.trend import TrendTracker
+from analytics.anomaly import AnomalyEngine
+from utils.numeric import round_array
+from utils.metrics import timed
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Variance metrics are inverted when normalizing, so that 1 is best
+VARIANCE_METRICS = ['schedule_variance', 'budget_variance']
+
+def _numeric(value) -> float:
+    """A metric value as the anomaly engine reads it, NaN if missing or non-numeric"""
+    return float(value) if isinstance(value, (int, float)) else math.nan
 
 class ProjectTrackingAgent:
-    def __init__(self):
-        self.projects = {}  # Stores project state
+    def __init__(self, history_store: HistoryStore = None):
+        # Stores project state; backend is chosen by the `history` config section
+        self.history = history_store or create_history_store(get_section('history'))
         self.metric_weights = {
             'schedule_variance': 0.3,
             'budget_variance': 0.25,
@@ -12,34 +30,80 @@ class ProjectTrackingAgent:
             'quality_metrics': 0.15,
             'stakeholder_satisfaction': 0.1
         }
+        trend_settings = get_section('trend')
+        self.trend_window = trend_settings.get('window', 4)
+        self.trend_min_history = trend_settings.get('min_history', 2)
+        self.improving_slope = trend_settings.get('improving_slope', 0.05)
+        self.deteriorating_slope = trend_settings.get('deteriorating_slope', -0.05)
+        self.ewma_alpha = trend_settings.get('ewma_alpha', 0.3)
+        self._trends = {}  # Running trend statistics per project
+        anomaly_settings = get_section('default_project_settings').get('anomaly_detection', {})
+        self.anomaly_engine = AnomalyEngine.from_settings(anomaly_settings)
+        self.anomaly_seed_points = anomaly_settings.get('seed_points', 1000)
+        self._anomaly_states = {}  # Detector state per project
+        self._anomalies = {}  # Anomalies raised by each project's latest update
+        self._synced = {}  # Stored updates reflected in each project's trackers (shared stores)
+        # Ingestion applies batches from a worker thread
+        self._lock = threading.RLock()
 
+    @timed
     def update_project_status(self, project_id: str, metrics: Dict) -> Dict:
         """Update and return current project status"""
-        if project_id not in self.projects:
-            self.projects[project_id] = {
-                'history': [],
-                'current_status': {}
+        with self._lock:
+            self._sync_project_state([project_id])
+            update = self._build_update(project_id, metrics, datetime.now().isoformat())
+            # Incremental anomaly detection, against state built from earlier updates
+            self._anomalies[project_id] = self.anomaly_engine.update(
+                self._anomaly_state(project_id), {**metrics, 'health_score': update['health_score']}
+            )
+            self.history.append(project_id, update)
+            self._count_appended([project_id])
+
+            return update
+
+    @timed
+    def update_project_statuses(self, updates: List[Tuple[str, Dict]]) -> List[Dict]:
+        """Apply a batch of (project_id, metrics) updates in order"""
+        with self._lock:
+            self._sync_project_state({project_id for project_id, _ in updates})
+            timestamp = datetime.now().isoformat()
+            health_scores = self._calculate_health_scores([metrics for _, metrics in updates])
+            records = [
+                (project_id, self._build_update(project_id, metrics, timestamp, health_score))
+                for (project_id, metrics), health_score in zip(updates, health_scores)
+            ]
+            # Detector states take in the batch in order, as they do single updates
+            values = {
+                metric: np.array([_numeric(metrics.get(metric)) for _, metrics in updates], dtype=np.float64)
+                for metric in self.anomaly_engine.metrics if metric != 'health_score'
             }
-        
+            values['health_score'] = np.array(health_scores, dtype=np.float64)
+            found = self.anomaly_engine.update_many(
+                [self._anomaly_state(project_id) for project_id, _ in updates], values
+            )
+            for (project_id, _), anomalies in zip(updates, found):
+                self._anomalies[project_id] = anomalies
+            self.history.append_many(records)
+            self._count_appended([project_id for project_id, _ in updates])
+            return [update for _, update in records]
+
+    def _build_update(self, project_id: str, metrics: Dict, timestamp: str,
+                      health_score: float = None) -> Dict:
         # Calculate composite health score
-        health_score = self._calculate_health_score(metrics)
+        if health_score is None:
+            health_score = self._calculate_health_score(metrics)
         
-        # Store update
-        update = {
-            'timestamp': datetime.now().isoformat(),
+        return {
+            'timestamp': timestamp,
             'metrics': metrics,
             'health_score': health_score,
             'trend': self._calculate_trend(project_id, health_score)
         }
-        
-        self.projects[project_id]['history'].append(update)
-        self.projects[project_id]['current_status'] = update
-        
-        return update
 
+    @timed
     def get_project_status(self, project_id: str) -> Dict:
         """Get current status of a project"""
-        return self.projects.get(project_id, {}).get('current_status', {})
+        return self.history.latest(project_id)
 
     def _calculate_health_score(self, metrics: Dict) -> float:
         """Calculate weighted health score from metrics"""
@@ -47,40 +111,116 @@ class ProjectTrackingAgent:
         for metric, weight in self.metric_weights.items():
             value = metrics.get(metric, 0)
             # Normalize values to 0-1 range where 1 is best
-            if metric in ['schedule_variance', 'budget_variance']:
+            if metric in VARIANCE_METRICS:
                 value = 1 - min(abs(value), 1)  # Invert variance metrics
             score += value * weight
         return round(score, 2)
 
+    def _calculate_health_scores(self, metrics_list: List[Dict]) -> List[float]:
+        """Vectorized _calculate_health_score over many metric dicts"""
+        score = np.zeros(len(metrics_list))
+        for metric, weight in self.metric_weights.items():
+            value = np.array([metrics.get(metric, 0) for metrics in metrics_list], dtype=np.float64)
+            if metric in VARIANCE_METRICS:
+                value = 1 - np.minimum(np.abs(value), 1)
+            score = score + value * weight
+        return round_array(score, 2).tolist()
+
+    @timed
+    def get_trend_statistics(self, project_id: str) -> Dict:
+        """Get slope, EWMA and rolling mean/stddev of recent health scores"""
+        with self._lock:
+            self._sync_project_state([project_id])
+            return self._trend_tracker(project_id).statistics()
+
+    def _trend_tracker(self, project_id: str) -> TrendTracker:
+        """Get the project's trend tracker, seeding it from stored history"""
+        tracker = self._trends.get(project_id)
+        if tracker is None:
+            self._mark_synced(project_id)
+            tracker = self._trends[project_id] = TrendTracker(
+                window=self.trend_window,
+                ewma_alpha=self.ewma_alpha,
+                initial_scores=self.history.recent_scores(project_id, self.trend_window - 1)
+            )
+        return tracker
+
+    def _sync_project_state(self, project_ids) -> None:
+        """Catch local trackers up with updates other workers appended to a shared store.
+
+        Trend trackers and anomaly detector states keep their running
+        statistics and take in only the updates they missed, so results match
+        those of a single worker and nothing is replayed when no one else wrote.
+        """
+        if not self.history.shared:
+            return
+        for project_id in project_ids:
+            synced = self._synced.get(project_id)
+            if synced is None:
+                continue
+            missed = self.history.count(project_id) - synced
+            if missed == 0:
+                continue
+            tracker = self._trends.get(project_id)
+            state = self._anomaly_states.get(project_id)
+            if missed < 0:
+                self._trends.pop(project_id, None)
+                if state is not None:
+                    self.anomaly_engine.release(self._anomaly_states.pop(project_id))
+                self._anomalies.pop(project_id, None)
+                del self._synced[project_id]
+                continue
+            if state is None:
+                if tracker is not None:
+                    for score in self.history.recent_scores(project_id, missed):
+                        tracker.push(score)
+            else:
+                # Only the missed updates are read and replayed
+                names = sorted(set(self.anomaly_engine.metrics) | {'health_score'})
+                history = self.history.metric_history(project_id, names, missed)
+                for values in zip(*(column.tolist() for column in history.values())):
+                    point = dict(zip(history, values))
+                    if tracker is not None:
+                        tracker.push(point['health_score'])
+                    self._anomalies[project_id] = self.anomaly_engine.update(state, point)
+            self._synced[project_id] = synced + missed
+
+    def _mark_synced(self, project_id: str) -> None:
+        """Record that trackers seeded now reflect every stored update of the project"""
+        if self.history.shared and project_id not in self._synced:
+            self._synced[project_id] = self.history.count(project_id)
+
+    def _count_appended(self, project_ids: List[str]) -> None:
+        for project_id in project_ids:
+            if project_id in self._synced:
+                self._synced[project_id] += 1
+
     def _calculate_trend(self, project_id: str, current_score: float) -> str:
-        """Determine trend based on historical data"""
-        history = self.projects.get(project_id, {}).get('history', [])
-        if len(history) < 2:
-            return 'neutral'
-        
-        # Get last 3 scores for trend analysis
-        recent_scores = [h['health_score'] for h in history[-3:]]
-        recent_scores.append(current_score)
-        
-        # Simple linear regression for trend
-        x = range(len(recent_scores))
-        y = recent_scores
-        covariance = sum((xi - sum(x)/len(x)) * (yi - sum(y)/len(y)) for xi, yi in zip(x, y))
-        variance = sum((xi - sum(x)/len(x))**2 for xi in x)
-        
-        if variance == 0:
+        """Record the new score and determine trend from the sliding window"""
+        tracker = self._trend_tracker(project_id)
+        prior_updates = tracker.count
+        tracker.push(current_score)
+        if prior_updates < self.trend_min_history:
             return 'neutral'
-            
-        slope = covariance / variance
-        if slope > 0.05:
+
+        # Linear regression slope, maintained incrementally by the tracker
+        slope = tracker.slope
+        if slope > self.improving_slope:
             return 'improving'
-        elif slope < -0.05:
+        elif slope < self.deteriorating_slope:
             return 'deteriorating'
         return 'stable'
 
-    def detect_anomalies(self, project_id: str) -> List[Dict]:
-        """Detect anomalies in project metrics"""
-        status = self.get_project_status(project_id)
+    @timed
+    def detect_anomalies(self, project_id: str, status: Dict = None) -> List[Dict]:
+        """Detect anomalies in project metrics.
+
+        `status` is an update this agent just applied, for callers that have
+        it at hand; by default the project's latest stored status is checked.
+        """
+        latest = status is None
+        if latest:
+            status = self.get_project_status(project_id)
         anomalies = []
         
         # Example anomaly detection
@@ -97,5 +237,79 @@ class ProjectTrackingAgent:
                 'severity': 'medium',
                 'message': 'High resource turnover detected'
             })
+        
+        # Statistical anomalies raised by the latest update
+        with self._lock:
+            if latest:
+                self._sync_project_state([project_id])
+            self._anomaly_state(project_id)
+            anomalies.extend(self._anomalies.get(project_id, []))
             
-        return anomalies
\ No newline at end of file
+        return anomalies
+
+    @timed
+    def backfill_anomalies(self, project_ids: List[str] = None) -> Dict[str, Dict[str, List[int]]]:
+        """Run the anomaly rules over the stored history of many projects at once.
+
+        Returns, per project, the positions (oldest first) of the updates each
+        rule flagged; rules that flagged nothing are left out.
+        """
+        if project_ids is None:
+            project_ids = sorted(self.history.project_ids())
+        flags, _ = self._backfill(project_ids)
+        results = {project_id: {} for project_id in project_ids}
+        for name, flagged in flags.items():
+            rows, points = np.nonzero(flagged)
+            for row, point in zip(rows.tolist(), points.tolist()):
+                results[project_ids[row]].setdefault(name, []).append(point)
+        return results
+
+    @timed
+    def latest_anomalies(self, project_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Statistical anomalies raised by the latest update of many projects.
+
+        Projects without detector state are screened together with one
+        backfill; only those whose latest update was flagged are replayed to
+        build the anomaly details that detect_anomalies() reports.
+        """
+        with self._lock:
+            self._sync_project_state(project_ids)
+            unseen = [project_id for project_id in project_ids if project_id not in self._anomaly_states]
+            flags, lengths = self._backfill(unseen)
+            latest = np.zeros(len(unseen), dtype=bool)
+            rows = np.nonzero(lengths)[0]
+            for flagged in flags.values():
+                latest[rows] |= flagged[rows, lengths[rows] - 1]
+            for row in np.nonzero(latest)[0].tolist():
+                self._anomaly_state(unseen[row])
+            return {project_id: list(self._anomalies.get(project_id, [])) for project_id in project_ids}
+
+    def _backfill(self, project_ids: List[str]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Backfill flags over the stored history of projects, and each project's history length"""
+        metrics = self.anomaly_engine.metrics
+        histories = [
+            self.history.metric_history(project_id, metrics, self.anomaly_seed_points)
+            for project_id in project_ids
+        ]
+        lengths = np.array([len(next(iter(h.values()), ())) for h in histories], dtype=np.int64)
+        length = int(lengths.max()) if len(lengths) else 0
+        series = {metric: np.full((len(project_ids), length), np.nan) for metric in metrics}
+        for row, history in enumerate(histories):
+            for metric, values in history.items():
+                series[metric][row, :len(values)] = values
+        return self.anomaly_engine.backfill(series), lengths
+
+    def _anomaly_state(self, project_id: str) -> int:
+        """Get the project's anomaly detector state, replaying stored history into a new one"""
+        state = self._anomaly_states.get(project_id)
+        if state is None:
+            self._mark_synced(project_id)
+            state = self._anomaly_states[project_id] = self.anomaly_engine.new_state()
+            history = self.history.metric_history(
+                project_id, self.anomaly_engine.metrics, self.anomaly_seed_points
+            )
+            anomalies = []
+            for values in zip(*history.values()):
+                anomalies = self.anomaly_engine.update(state, dict(zip(history, values)))
+            self._anomalies[project_id] = anomalies
+        return state
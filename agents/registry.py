@@ -0,0 +1,49 @@
+from typing import Any, List, Optional
+import importlib
+import threading
+from utils.lazy import preload
+
+# Agents by name, as "module:Class". An agent's module, and the libraries it
+# pulls in, is only imported when the agent is first created.
+AGENTS = {
+    'risk_scoring': 'agents.risk_scoring:RiskScoringAgent',
+    'project_tracking': 'agents.project_tracking:ProjectTrackingAgent',
+    'reporting': 'agents.reporting:ReportingAgent',
+    'market_analysis': 'agents.market_analysis:MarketAnalysisAgent'
+}
+
+# Libraries the agents load on first use, imported up front by warm()
+HEAVY_MODULES = ['numpy', 'requests', 'jinja2']
+
+_instances = {}
+_lock = threading.Lock()
+
+def agent_class(name: str) -> type:
+    """Import and return an agent's class"""
+    if name not in AGENTS:
+        raise KeyError(f"Unknown agent: {name}")
+    module_name, _, class_name = AGENTS[name].partition(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_agent(name: str) -> Any:
+    """The process-wide instance of an agent, created on first use"""
+    agent = _instances.get(name)
+    if agent is None:
+        with _lock:
+            agent = _instances.get(name)
+            if agent is None:
+                agent = _instances[name] = agent_class(name)()
+    return agent
+
+def loaded_agent(name: str) -> Optional[Any]:
+    """An agent's instance if it has been created, without creating it"""
+    return _instances.get(name)
+
+def warm() -> List[str]:
+    """Import every agent module and heavy library now; returns those that failed.
+
+    Used by preload mode, so that forked workers inherit the imported code
+    instead of each importing it on their first requests.
+    """
+    modules = [path.partition(':')[0] for path in AGENTS.values()]
+    return preload(modules + HEAVY_MODULES)
@@ -1,12 +1,27 @@
 from typing import Dict, List
 from datetime import datetime
+import hashlib
 import json
-from jinja2 import Template
-import smtplib
-from email.mime.text import MIMEText
+from jinja2 import (
+    ChoiceLoader, DictLoader, Environment, FileSystemBytecodeCache,
+    FileSystemLoader, select_autoescape
+)
+from config import get_section
+from services.alert_dispatcher import AlertDispatcher
+from storage.alert_log import AlertLog, make_alert
+from utils.cache import LRUCache
+from utils.metrics import timed
+
+# Template file names; files with these names in the configured template
+# directory override the built-in templates
+TEMPLATE_FILES = {
+    'risk_report': 'risk_report.html',
+    'alert': 'alert.txt'
+}
 
 class ReportingAgent:
-    def __init__(self):
+    def __init__(self, template_dir: str = None):
+        settings = get_section('reporting')
         self.templates = {
             'risk_report': """
             <html>
@@ -55,12 +70,44 @@ class ReportingAgent:
             'medium': {'email': True, 'sms': False}
         }
 
+        # Templates are compiled once by the environment and reused
+        loaders = [DictLoader({
+            TEMPLATE_FILES[name]: source for name, source in self.templates.items()
+        })]
+        template_dir = template_dir or settings.get('template_dir')
+        if template_dir:
+            loaders.insert(0, FileSystemLoader(template_dir))
+        bytecode_cache = None
+        if settings.get('bytecode_cache', True):
+            cache_dir = settings.get('bytecode_cache_dir')
+            bytecode_cache = FileSystemBytecodeCache(cache_dir) if cache_dir else FileSystemBytecodeCache()
+        self.env = Environment(
+            loader=ChoiceLoader(loaders),
+            bytecode_cache=bytecode_cache,
+            autoescape=select_autoescape(['html', 'htm', 'xml'])
+            if settings.get('autoescape', True) else False
+        )
+        self.report_cache = LRUCache(settings.get('report_cache_size', 256))
+
+        # Alert emails are batched, deduplicated and rate-limited by the dispatcher
+        email_settings = get_section('notifications').get('email') or {}
+        self.email_enabled = email_settings.get('enabled', True)
+        self.dispatcher = AlertDispatcher.from_settings(email_settings)
+        # Every alert sent is also kept for the /alerts endpoints
+        self.alert_log = AlertLog.from_settings(get_section('alerts'))
+
+    @timed
     def generate_risk_report(self, project_id: str, risk_data: Dict) -> str:
-        """Generate HTML risk report"""
-        template = Template(self.templates['risk_report'])
+        """Generate HTML risk report, reusing the last render for unchanged risk data"""
+        cache_key = (project_id, self._risk_data_hash(risk_data))
+        report = self.report_cache.get(cache_key)
+        if report is not None:
+            return report
+
+        template = self.env.get_template(TEMPLATE_FILES['risk_report'])
         recommendations = self._generate_recommendations(risk_data)
         
-        return template.render(
+        report = template.render(
             project_id=project_id,
             timestamp=datetime.now().isoformat(),
             risk_score=risk_data['score'],
@@ -68,7 +115,10 @@ class ReportingAgent:
             risk_factors=risk_data['factors'],
             recommendations=recommendations
         )
+        self.report_cache.set(cache_key, report)
+        return report
 
+    @timed
     def send_alert(self, project_id: str, risk_data: Dict) -> bool:
         """Send risk alert based on severity"""
         if risk_data['level'] not in self.alert_rules:
@@ -82,7 +132,7 @@ class ReportingAgent:
         )[:3]
         
         actions = self._generate_actions(risk_data)
-        template = Template(self.templates['alert'])
+        template = self.env.get_template(TEMPLATE_FILES['alert'])
         message = template.render(
             project_id=project_id,
             risk_level=risk_data['level'],
@@ -91,24 +141,27 @@ class ReportingAgent:
             actions=actions
         )
         
-        # Example email sending (would need SMTP config)
-        if rules['email']:
-            try:
-                msg = MIMEText(message)
-                msg['Subject'] = f"Risk Alert: {project_id} - {risk_data['level']}"
-                msg['From'] = 'risk-system@company.com'
-                msg['To'] = 'project-managers@company.com'
-                
-                # In production, would use actual SMTP server
-                # with smtplib.SMTP('smtp.company.com') as server:
-                #     server.send_message(msg)
-                print(f"Would send email alert: {msg.as_string()}")
-                return True
-            except Exception as e:
-                print(f"Failed to send alert: {str(e)}")
-                return False
+        self.alert_log.append(make_alert(project_id, risk_data, details=message))
+
+        # Delivered asynchronously by the dispatcher's flush loop
+        if rules['email'] and self.email_enabled:
+            self.dispatcher.submit(
+                project_id,
+                risk_data['level'],
+                f"Risk Alert: {project_id} - {risk_data['level']}",
+                message
+            )
         return True
 
+    def _risk_data_hash(self, risk_data: Dict) -> str:
+        """Hash the parts of risk data that appear in a report"""
+        content = json.dumps(
+            {key: risk_data.get(key) for key in ('score', 'level', 'factors')},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha1(content.encode()).hexdigest()
+
     def _generate_recommendations(self, risk_data: Dict) -> List[str]:
         """Generate risk mitigation recommendations"""
         recommendations = []
@@ -158,6 +211,7 @@ class ReportingAgent:
             
         return actions
 
+    @timed
     def save_report(self, report: str, filename: str) -> bool:
         """Save report to file"""
         try:
@@ -1,9 +1,24 @@
-from typing import Dict, List
-import numpy as np
+from __future__ import annotations
+from typing import Dict, List, Tuple
 from datetime import datetime
+from config import get_section
+from analytics.risk_model import ScoringBackend, create_scoring_backend
+from utils.numeric import round_array
+from utils.metrics import timed
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Input metrics consumed by the _assess_* methods
+INPUT_METRICS = [
+    'budget_variance', 'payment_delays',
+    'schedule_delay', 'missed_milestones',
+    'attrition_rate', 'skill_gaps',
+    'defect_rate', 'tech_debt'
+]
 
 class RiskScoringAgent:
-    def __init__(self):
+    def __init__(self, backend: ScoringBackend = None):
         self.risk_factors = {
             'financial': 0.4,
             'schedule': 0.3,
@@ -16,21 +31,41 @@ class RiskScoringAgent:
             'medium': 0.4,
             'low': 0.2
         }
+        # Share of the score taken by market risk when a project's features include it
+        self.market_weight = get_section('market_risk').get('market_weight', 0.0)
+        # Turns inputs and factor scores into a total; rule-based unless configured
+        self.backend = backend or create_scoring_backend(get_section('risk_model'), self.risk_factors)
 
+    @timed
     def calculate_project_risk(self, project_data: Dict) -> Dict:
         """Calculate comprehensive risk score for a project"""
-        scores = {
+        return self.score_features(self.assess_features(project_data))
+
+    @timed
+    def assess_features(self, project_data: Dict) -> Dict[str, float]:
+        """Factor scores a risk score is built from, plus market risk if the data has it"""
+        features = {
             'financial': self._assess_financial_risk(project_data),
             'schedule': self._assess_schedule_risk(project_data),
             'resources': self._assess_resource_risk(project_data),
             'technical': self._assess_technical_risk(project_data)
         }
+        market_risk = project_data.get('market_risk')
+        if market_risk is not None:
+            features['market'] = min(1.0, max(0.0, market_risk))
+        if self.backend.needs_inputs:
+            features['inputs'] = {metric: project_data.get(metric, 0) for metric in INPUT_METRICS}
+        return features
 
-        # Calculate weighted risk score
-        total_score = sum(
-            score * self.risk_factors[factor]
-            for factor, score in scores.items()
-        )
+    @timed
+    def score_features(self, features: Dict[str, float]) -> Dict:
+        """Score precomputed factor features"""
+        scores = {factor: features[factor] for factor in self.risk_factors}
+
+        total_score = self.backend.score_one(features.get('inputs'), scores)
+        if self.market_weight and 'market' in features:
+            scores['market'] = features['market']
+            total_score = total_score * (1 - self.market_weight) + features['market'] * self.market_weight
 
         # Determine risk level
         risk_level = self._determine_risk_level(total_score)
@@ -42,6 +77,87 @@ class RiskScoringAgent:
             'timestamp': datetime.now().isoformat()
         }
 
+    @timed
+    def calculate_portfolio_risk(self, portfolio) -> Dict:
+        """Score many projects in one vectorized pass.
+
+        Accepts a pandas DataFrame, a NumPy structured array or a dict of
+        column arrays holding the input metrics (missing columns count as 0,
+        like the per-project path) and optionally a `market_risk` column
+        (NaN where unknown). Returns columnar results that are bit-identical
+        to calling calculate_project_risk on each row.
+        """
+        total_score, scores = self._score_columns(
+            self._portfolio_columns(portfolio), self._market_column(portfolio)
+        )
+        return {
+            'score': round_array(total_score, 2),
+            'level': self._determine_risk_levels(total_score),
+            'factors': scores,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def total_scores(self, portfolio) -> np.ndarray:
+        """Unrounded total scores of a batch, for callers that only aggregate them"""
+        return self._score_columns(self._portfolio_columns(portfolio), self._market_column(portfolio))[0]
+
+    def _score_columns(self, data: Dict[str, np.ndarray], market) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        scores = {
+            'financial': np.minimum(1.0, np.abs(data['budget_variance']) * 0.5 + data['payment_delays'] * 0.5),
+            'schedule': np.minimum(1.0, data['schedule_delay'] * 0.7 + data['missed_milestones'] * 0.3),
+            'resources': np.minimum(1.0, data['attrition_rate'] * 0.6 + data['skill_gaps'] * 0.4),
+            'technical': np.minimum(1.0, data['defect_rate'] * 0.5 + data['tech_debt'] * 0.5)
+        }
+
+        total_score = self.backend.score_batch(data, scores)
+
+        if self.market_weight and market is not None:
+            market = np.clip(market, 0.0, 1.0)
+            blended = total_score * (1 - self.market_weight) + market * self.market_weight
+            total_score = np.where(np.isnan(market), total_score, blended)
+            scores['market'] = market
+        return total_score, scores
+
+    def _portfolio_columns(self, portfolio) -> Dict[str, np.ndarray]:
+        """Extract float64 input metric columns from a batch container"""
+        if getattr(getattr(portfolio, 'dtype', None), 'names', None):
+            available = portfolio.dtype.names
+            size = len(portfolio)
+        elif hasattr(portfolio, 'columns'):
+            available = list(portfolio.columns)
+            size = len(portfolio)
+        elif isinstance(portfolio, dict):
+            available = list(portfolio.keys())
+            size = len(portfolio[available[0]]) if available else 0
+        else:
+            raise TypeError("Portfolio must be a DataFrame, structured array or dict of columns")
+
+        return {
+            metric: (
+                np.asarray(portfolio[metric], dtype=np.float64)
+                if metric in available else np.zeros(size)
+            )
+            for metric in INPUT_METRICS
+        }
+
+    def _market_column(self, portfolio):
+        try:
+            return np.asarray(portfolio['market_risk'], dtype=np.float64)
+        except (KeyError, ValueError, IndexError):
+            return None
+
+    def _determine_risk_levels(self, scores: np.ndarray) -> np.ndarray:
+        """Vectorized counterpart of _determine_risk_level"""
+        return np.select(
+            [
+                scores >= self.thresholds['critical'],
+                scores >= self.thresholds['high'],
+                scores >= self.thresholds['medium']
+            ],
+            ['critical', 'high', 'medium'],
+            default='low'
+        )
+
     def _assess_financial_risk(self, data: Dict) -> float:
         """Assess financial risk factors"""
         budget_variance = data.get('budget_variance', 0)
@@ -0,0 +1,474 @@
+from __future__ import annotations
+from typing import Dict, List
+import math
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+METHODS = ('zscore', 'ewma', 'cusum')
+
+# Defaults for rule fields not given in config
+RULE_DEFAULTS = {
+    'zscore': {'threshold': 3.0},
+    'ewma': {'threshold': 3.0, 'alpha': 0.2},
+    'cusum': {'threshold': 5.0, 'drift': 0.5}
+}
+
+MESSAGES = {
+    'zscore': "{metric} is {score:.1f} standard deviations from its recent mean",
+    'ewma': "{metric} is outside its EWMA control limits ({score:.1f} standard deviations)",
+    'cusum': "Sustained {direction} shift in {metric} detected (CUSUM {score:.1f})"
+}
+
+
+def _normalize_rule(rule: Dict) -> Dict:
+    method = rule.get('method')
+    if method not in METHODS:
+        raise ValueError(f"Unknown anomaly detection method: {method}")
+    if 'metric' not in rule:
+        raise ValueError("anomaly rule needs a metric")
+    normalized = dict(RULE_DEFAULTS[method])
+    normalized.update(rule)
+    normalized.setdefault('name', f"{rule['metric']}_{method}")
+    normalized.setdefault('type', rule['metric'])
+    normalized.setdefault('severity', 'medium')
+    return normalized
+
+
+class AnomalyEngine:
+    """Statistical anomaly detection over project metric histories.
+
+    Each rule applies one method to one metric (or 'health_score'):
+
+    - zscore: the point is more than `threshold` standard deviations from
+      the mean of the previous `window` points.
+    - ewma: the point is outside `threshold` standard deviations of an
+      exponentially weighted mean and variance (smoothing `alpha`).
+    - cusum: two-sided CUSUM over the rolling z-scores, flagging when the
+      cumulative drift beyond `drift` exceeds `threshold`, then resetting.
+
+    Missing values (NaN) are skipped and leave the statistics unchanged.
+    Nothing is flagged until `min_points` earlier values have been seen.
+
+    update() is the incremental mode: it folds one point into a project's
+    state in O(1), keeping running sums over each metric's window. States
+    are rows of arrays held by the engine, so update_many() can fold a
+    batch of points into many projects' states with array operations.
+    backfill() is the bulk mode: it runs the same recurrences over a
+    (projects x points) matrix, vectorized across projects, in blocks of
+    `chunk_size` projects.
+    """
+
+    def __init__(self, rules: List[Dict], window: int = 30, min_points: int = 10,
+                 chunk_size: int = 4096):
+        if window < 2:
+            raise ValueError("window must hold at least 2 points")
+        self.rules = [_normalize_rule(rule) for rule in rules]
+        self.window = window
+        self.min_points = min(min_points, window)
+        self.chunk_size = chunk_size
+        self.metrics = sorted({rule['metric'] for rule in self.rules})
+        self._metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+        self._ewma_rules = {}
+        self._cusum_rules = {}
+        for rule in self.rules:
+            if rule['method'] == 'ewma':
+                self._ewma_rules[rule['name']] = len(self._ewma_rules)
+            elif rule['method'] == 'cusum':
+                self._cusum_rules[rule['name']] = len(self._cusum_rules)
+        self._init_states()
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'AnomalyEngine':
+        """Build an engine from `default_project_settings.anomaly_detection`"""
+        return cls(
+            settings.get('rules', []),
+            window=settings.get('window', 30),
+            min_points=settings.get('min_points', 10),
+            chunk_size=settings.get('chunk_size', 4096)
+        )
+
+    # Incremental mode
+
+    # Recompute window sums from the window this often to bound floating point drift
+    RESYNC_INTERVAL = 1024
+    # Fewer distinct projects than this in a round of update_many() are updated one by one
+    MIN_VECTOR_ROWS = 64
+
+    def _init_states(self, capacity: int = 64) -> None:
+        # Detector states are rows of these arrays; a state is its row index
+        metrics, window = len(self.metrics), self.window
+        self._updates = np.zeros(capacity, dtype=np.int64)
+        self._filled = np.zeros(capacity, dtype=np.int64)  # points in the window
+        self._head = np.zeros(capacity, dtype=np.int64)  # next window position
+        self._windows = np.full((capacity, metrics, window), np.nan)
+        # Count, sum and sum of squares of the non-missing values in each window,
+        # taken relative to a reference value to limit cancellation
+        self._sums = np.zeros((capacity, metrics, 4))
+        self._ewma = np.zeros((capacity, len(self._ewma_rules), 3))  # mean, variance, points
+        self._cusum = np.zeros((capacity, len(self._cusum_rules), 2))  # high, low
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def new_state(self) -> int:
+        """Detector state for a project with no history"""
+        if not self._free:
+            capacity = len(self._updates)
+            for name in ('_updates', '_filled', '_head', '_windows', '_sums', '_ewma', '_cusum'):
+                old = getattr(self, name)
+                grown = np.zeros((2 * capacity,) + old.shape[1:], dtype=old.dtype)
+                grown[:capacity] = old
+                setattr(self, name, grown)
+            self._free = list(range(2 * capacity - 1, capacity - 1, -1))
+        state = self._free.pop()
+        self._updates[state] = self._filled[state] = self._head[state] = 0
+        self._windows[state] = np.nan
+        self._sums[state] = (0.0, 0.0, 0.0, np.nan)
+        self._ewma[state] = 0.0
+        self._cusum[state] = 0.0
+        return state
+
+    def release(self, state: int) -> None:
+        """Free a state that is no longer updated"""
+        self._free.append(state)
+
+    def update(self, state: int, values: Dict[str, float]) -> List[Dict]:
+        """Fold one point into `state`, returning the anomalies it triggers"""
+        self._updates[state] += 1
+        resync = self._updates[state] % self.RESYNC_INTERVAL == 0
+        filled = int(self._filled[state])
+        head = int(self._head[state])
+        points = []
+        for metric in self.metrics:
+            value = values.get(metric)
+            points.append(float(value) if isinstance(value, (int, float)) else math.nan)
+        # Work on plain floats; the arrays are read and written once per call
+        windows = self._windows[state]
+        evicted = windows[:, head].tolist() if filled == self.window else [math.nan] * len(points)
+        windows[:, head] = points
+        sums = self._sums[state].tolist()
+        zscores = []
+        # Score each value against its window, then slide the window over it
+        for m, value in enumerate(points):
+            count, total, squares, reference = sums[m]
+            zscores.append(self._zscore(count, total, squares, reference, value))
+            oldest = evicted[m]
+            if oldest == oldest:  # not NaN
+                oldest -= reference
+                count -= 1
+                total -= oldest
+                squares -= oldest * oldest
+            if resync:
+                size = min(filled + 1, self.window)
+                start = head + 1 - size
+                ring = windows[m].tolist()
+                valid = [v for v in (ring[(start + k) % self.window] for k in range(size)) if v == v]
+                reference = valid[0] if valid else math.nan
+                count, total, squares = (len(valid), sum(v - reference for v in valid),
+                                         sum((v - reference) ** 2 for v in valid))
+            elif value == value:
+                if reference != reference:
+                    reference = value
+                value -= reference
+                count += 1
+                total += value
+                squares += value * value
+            sums[m] = (count, total, squares, reference)
+        self._sums[state] = sums
+        self._head[state] = (head + 1) % self.window
+        self._filled[state] = min(filled + 1, self.window)
+
+        anomalies = []
+        ewmas = self._ewma[state].tolist()
+        cusums = self._cusum[state].tolist()
+        for rule in self.rules:
+            m = self._metric_index[rule['metric']]
+            value = points[m]
+            if value != value:
+                continue
+            method = rule['method']
+            if method == 'zscore':
+                score = zscores[m]
+                if abs(score) > rule['threshold']:
+                    anomalies.append(self._anomaly(rule, value, score))
+            elif method == 'ewma':
+                ewma = ewmas[self._ewma_rules[rule['name']]]
+                mean, var, seen = ewma
+                if seen >= self.min_points and var > 0:
+                    score = (value - mean) / math.sqrt(var)
+                    if abs(score) > rule['threshold']:
+                        anomalies.append(self._anomaly(rule, value, score))
+                if seen == 0:
+                    ewma[0], ewma[1] = value, 0.0
+                else:
+                    diff = value - mean
+                    ewma[0] = mean + rule['alpha'] * diff
+                    ewma[1] = (1 - rule['alpha']) * (var + rule['alpha'] * diff * diff)
+                ewma[2] = seen + 1
+            else:
+                score = zscores[m]
+                if score != score:
+                    continue
+                cusum = cusums[self._cusum_rules[rule['name']]]
+                cusum[0] = max(0.0, cusum[0] + score - rule['drift'])
+                cusum[1] = max(0.0, cusum[1] - score - rule['drift'])
+                if cusum[0] > rule['threshold'] or cusum[1] > rule['threshold']:
+                    upward = cusum[0] > rule['threshold']
+                    anomalies.append(self._anomaly(rule, value, cusum[0] if upward else cusum[1],
+                                                   'upward' if upward else 'downward'))
+                    cusum[0] = cusum[1] = 0.0
+        if ewmas:
+            self._ewma[state] = ewmas
+        if cusums:
+            self._cusum[state] = cusums
+        return anomalies
+
+    def update_many(self, states: List[int], values: Dict[str, np.ndarray]) -> List[List[Dict]]:
+        """Fold a batch of points into their states in order, returning each
+        point's anomalies as update() would.
+
+        `states[i]` is the state of point i's project; `values` maps each
+        metric to a float64 array over the points, NaN where a point lacks
+        the metric. Points are taken in rounds holding at most one point per
+        project, each vectorized across its projects.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        results = [None] * len(states)
+        # Round of each point: how many earlier points of its project there are
+        order = np.argsort(states, kind='stable')
+        ordered = states[order]
+        starts = np.ones(len(states), dtype=bool)
+        starts[1:] = ordered[1:] != ordered[:-1]
+        positions = np.arange(len(states))
+        rounds = np.empty(len(states), dtype=np.int64)
+        rounds[order] = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+        by_round = np.lexsort((positions, rounds))
+        bounds = np.cumsum(np.bincount(rounds))
+
+        for rows in np.split(by_round, bounds[:-1]):
+            # Points that resync their window sums, and small rounds, take the scalar path
+            if len(rows) < self.MIN_VECTOR_ROWS:
+                scalar, vector = rows, rows[:0]
+            else:
+                due = (self._updates[states[rows]] + 1) % self.RESYNC_INTERVAL == 0
+                scalar, vector = rows[due], rows[~due]
+            for i in scalar.tolist():
+                results[i] = self.update(int(states[i]), {
+                    metric: values[metric][i] for metric in self.metrics
+                })
+            if len(vector):
+                found = self._update_round(states[vector], {
+                    metric: values[metric][vector] for metric in self.metrics
+                })
+                for i, anomalies in zip(vector.tolist(), found):
+                    results[i] = anomalies
+        return results
+
+    def _update_round(self, states: np.ndarray, points: Dict[str, np.ndarray]) -> List[List[Dict]]:
+        """update() over one point each of distinct states, with the same arithmetic"""
+        self._updates[states] += 1
+        head = self._head[states]
+        full = self._filled[states] == self.window
+        zscores = {}
+        for m, metric in enumerate(self.metrics):
+            value = points[metric]
+            count, total, squares, reference = self._sums[states, m].T
+            zscores[metric] = self._zscores(count, total, squares, reference, value)
+            oldest = np.where(full, self._windows[states, m, head], np.nan)
+            evicted = oldest == oldest
+            oldest = oldest - reference
+            count = count - evicted
+            total = np.where(evicted, total - oldest, total)
+            squares = np.where(evicted, squares - oldest * oldest, squares)
+            self._windows[states, m, head] = value
+            valid = value == value
+            reference = np.where(valid & (reference != reference), value, reference)
+            shifted = value - reference
+            count = count + valid
+            total = np.where(valid, total + shifted, total)
+            squares = np.where(valid, squares + shifted * shifted, squares)
+            self._sums[states, m] = np.stack([count, total, squares, reference], axis=1)
+        self._head[states] = (head + 1) % self.window
+        self._filled[states] = np.minimum(self._filled[states] + 1, self.window)
+
+        results = [[] for _ in range(len(states))]
+        for rule in self.rules:
+            metric = rule['metric']
+            value = points[metric]
+            valid = value == value
+            method = rule['method']
+            if method == 'zscore':
+                score = zscores[metric]
+                with np.errstate(invalid='ignore'):
+                    fired = np.abs(score) > rule['threshold']
+                for i in np.nonzero(fired)[0].tolist():
+                    results[i].append(self._anomaly(rule, float(value[i]), float(score[i])))
+            elif method == 'ewma':
+                column = self._ewma_rules[rule['name']]
+                mean, var, seen = self._ewma[states, column].T
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    score = (value - mean) / np.sqrt(var)
+                    fired = valid & (seen >= self.min_points) & (var > 0) & (np.abs(score) > rule['threshold'])
+                for i in np.nonzero(fired)[0].tolist():
+                    results[i].append(self._anomaly(rule, float(value[i]), float(score[i])))
+                diff = value - mean
+                first = valid & (seen == 0)
+                later = valid & (seen > 0)
+                mean = np.where(first, value, np.where(later, mean + rule['alpha'] * diff, mean))
+                var = np.where(first, 0.0, np.where(
+                    later, (1 - rule['alpha']) * (var + rule['alpha'] * diff * diff), var))
+                self._ewma[states, column] = np.stack([mean, var, seen + valid], axis=1)
+            else:
+                score = zscores[metric]
+                judged = score == score
+                column = self._cusum_rules[rule['name']]
+                high, low = self._cusum[states, column].T
+                high = np.where(judged, np.maximum(0.0, high + score - rule['drift']), high)
+                low = np.where(judged, np.maximum(0.0, low - score - rule['drift']), low)
+                upward = high > rule['threshold']
+                fired = upward | (low > rule['threshold'])
+                for i in np.nonzero(fired)[0].tolist():
+                    results[i].append(self._anomaly(
+                        rule, float(value[i]), float(high[i] if upward[i] else low[i]),
+                        'upward' if upward[i] else 'downward'
+                    ))
+                high[fired] = 0.0
+                low[fired] = 0.0
+                self._cusum[states, column] = np.stack([high, low], axis=1)
+        return results
+
+    def _zscore(self, count: float, total: float, squares: float, reference: float,
+                value: float) -> float:
+        """z-score of `value` against a window's sums, NaN when it cannot be judged"""
+        if value != value or count < self.min_points:
+            return math.nan
+        mean = total / count
+        var = squares / count - mean * mean
+        if var <= 1e-12:
+            return math.nan
+        return (value - reference - mean) / math.sqrt(var)
+
+    def _zscores(self, count: np.ndarray, total: np.ndarray, squares: np.ndarray,
+                 reference: np.ndarray, value: np.ndarray) -> np.ndarray:
+        """_zscore() over arrays"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            var = squares / count - mean * mean
+            score = (value - reference - mean) / np.sqrt(var)
+        return np.where((value == value) & (count >= self.min_points) & (var > 1e-12), score, np.nan)
+
+    def _anomaly(self, rule: Dict, value: float, score: float, direction: str = '') -> Dict:
+        return {
+            'type': rule['type'],
+            'severity': rule['severity'],
+            'message': rule.get('message') or MESSAGES[rule['method']].format(
+                metric=rule['metric'], score=abs(score), direction=direction
+            ),
+            'metric': rule['metric'],
+            'method': rule['method'],
+            'rule': rule['name'],
+            'value': value,
+            'score': score
+        }
+
+    # Bulk mode
+
+    def backfill(self, series: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Flag every point of many projects at once.
+
+        `series` maps each metric to a (projects x points) float array, oldest
+        point first, NaN where a project has no value. Returns a boolean array
+        of the same shape per rule name.
+        """
+        shape = None
+        for metric in self.metrics:
+            if metric not in series:
+                raise ValueError(f"missing series for {metric}")
+            if shape is None:
+                shape = np.shape(series[metric])
+            elif np.shape(series[metric]) != shape:
+                raise ValueError("all series must have the same shape")
+        if shape is None:
+            return {}
+        flags = {rule['name']: np.zeros(shape, dtype=bool) for rule in self.rules}
+        for start in range(0, shape[0], self.chunk_size):
+            rows = slice(start, start + self.chunk_size)
+            block = {
+                metric: np.asarray(series[metric][rows], dtype=np.float64)
+                for metric in self.metrics
+            }
+            self._backfill_block(block, {name: out[rows] for name, out in flags.items()})
+        return flags
+
+    def _backfill_block(self, block: Dict[str, np.ndarray], flags: Dict[str, np.ndarray]) -> None:
+        zscores = {
+            metric: self._rolling_zscores(block[metric])
+            for metric in {rule['metric'] for rule in self.rules if rule['method'] != 'ewma'}
+        }
+        for rule in self.rules:
+            values = block[rule['metric']]
+            out = flags[rule['name']]
+            if rule['method'] == 'zscore':
+                with np.errstate(invalid='ignore'):
+                    out[:] = np.abs(zscores[rule['metric']]) > rule['threshold']
+            elif rule['method'] == 'ewma':
+                self._ewma_flags(values, rule, out)
+            else:
+                self._cusum_flags(zscores[rule['metric']], rule, out)
+
+    def _rolling_zscores(self, values: np.ndarray) -> np.ndarray:
+        """z-score of each point against the previous `window` points, per row"""
+        valid = ~np.isnan(values)
+        # Shift each row by a reference value to limit cancellation in sum(x^2)
+        reference = np.where(valid.any(axis=1), values[np.arange(len(values)), valid.argmax(axis=1)], 0.0)
+        shifted = np.where(valid, values - reference[:, None], 0.0)
+
+        def windowed(column: np.ndarray) -> np.ndarray:
+            # Sum of points t-window .. t-1, from differences of running sums
+            cumulative = np.cumsum(column, axis=1)
+            sums = np.zeros_like(cumulative)
+            sums[:, 1:] = cumulative[:, :-1]
+            sums[:, self.window + 1:] -= cumulative[:, :-self.window - 1]
+            return sums
+
+        count = windowed(valid.astype(np.float64))
+        total = windowed(shifted)
+        squares = windowed(shifted * shifted)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            var = squares / count - mean * mean
+            zscores = (shifted - mean) / np.sqrt(var)
+        usable = valid & (count >= self.min_points) & (var > 1e-12)
+        return np.where(usable, zscores, np.nan)
+
+    def _ewma_flags(self, values: np.ndarray, rule: Dict, out: np.ndarray) -> None:
+        alpha = rule['alpha']
+        rows = values.shape[0]
+        mean = np.zeros(rows)
+        var = np.zeros(rows)
+        seen = np.zeros(rows, dtype=np.int64)
+        for t in range(values.shape[1]):
+            value = values[:, t]
+            valid = ~np.isnan(value)
+            judged = valid & (seen >= self.min_points) & (var > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[:, t] = judged & (np.abs((value - mean) / np.sqrt(var)) > rule['threshold'])
+            diff = value - mean
+            first = valid & (seen == 0)
+            later = valid & (seen > 0)
+            mean = np.where(first, value, np.where(later, mean + alpha * diff, mean))
+            var = np.where(later, (1 - alpha) * (var + alpha * diff * diff), var)
+            seen += valid
+
+    def _cusum_flags(self, zscores: np.ndarray, rule: Dict, out: np.ndarray) -> None:
+        rows = zscores.shape[0]
+        high = np.zeros(rows)
+        low = np.zeros(rows)
+        for t in range(zscores.shape[1]):
+            score = zscores[:, t]
+            valid = ~np.isnan(score)
+            high = np.where(valid, np.maximum(0.0, high + score - rule['drift']), high)
+            low = np.where(valid, np.maximum(0.0, low - score - rule['drift']), low)
+            fired = (high > rule['threshold']) | (low > rule['threshold'])
+            out[:, t] = fired
+            high[fired] = 0.0
+            low[fired] = 0.0
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from typing import Dict, Optional
+import importlib.util
+import io
+from storage.history import HistoryStore, from_micros, to_micros
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Arrow output is offered only when pyarrow is installed; it is imported on first use
+ARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+METHODS = ['minmax', 'lttb']
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Bucket extremes LTTB chooses from per output point (MinMaxLTTB preselection)
+LTTB_CANDIDATES = 4
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of `threshold` points chosen by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previous choice and the mean of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x - x[0], dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Means of every bucket at once; the one after the last bucket is the last point
+    sums_x = np.concatenate([[0.0], np.cumsum(x)])
+    sums_y = np.concatenate([[0.0], np.cumsum(y)])
+    sizes = np.diff(edges)
+    next_x = np.append((sums_x[edges[2:]] - sums_x[edges[1:-1]]) / sizes[1:], x[-1])
+    next_y = np.append((sums_y[edges[2:]] - sums_y[edges[1:-1]]) / sizes[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (next_y[i] - y[a])
+        )
+        a = selected[i + 1] = start + int(np.argmax(area))
+    return selected
+
+
+def downsample(store: HistoryStore, project_id: str, metric: str = 'health_score',
+               start: Optional[str] = None, end: Optional[str] = None,
+               points: int = 500, method: str = 'minmax') -> Dict:
+    """A project's metric history between ISO `start` and `end`, reduced to
+    at most `points` points as columns of epoch milliseconds and values.
+
+    'minmax' splits the range into `points` equal time buckets and returns
+    each non-empty bucket's start, min, max, mean and count. 'lttb' returns
+    up to `points` actual updates that preserve the visual shape; on long
+    histories it picks among the per-bucket extremes only. Either way the
+    store aggregates first, so the response size and the Python work are
+    bounded by `points`, not by the number of updates.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if points < 2:
+        raise ValueError("points must be at least 2")
+    bounds = store.time_range(project_id)
+    lo = to_micros(start) if start else (bounds[0] if bounds else 0)
+    hi = to_micros(end) if end else (bounds[1] if bounds else 0)
+    if hi < lo:
+        raise ValueError("end is before start")
+
+    if method == 'minmax':
+        stats = store.aggregate(project_id, metric, lo, hi, points)
+        total = int(stats['count'].sum())
+        columns = {
+            'timestamp': (stats['time'] // 1000).tolist(),
+            'min': stats['min'].tolist(),
+            'max': stats['max'].tolist(),
+            'mean': (stats['sum'] / stats['count']).tolist(),
+            'count': stats['count'].tolist()
+        }
+    else:
+        stats = store.aggregate(project_id, metric, lo, hi, points * LTTB_CANDIDATES)
+        total = int(stats['count'].sum())
+        if total <= points * LTTB_CANDIDATES:
+            # Few enough updates to choose from all of them
+            timestamps, values = store.series(project_id, metric, lo, hi)
+        else:
+            timestamps = np.concatenate([stats['min_time'], stats['max_time']])
+            values = np.concatenate([stats['min'], stats['max']])
+            timestamps, first = np.unique(timestamps, return_index=True)
+            values = values[first]
+        chosen = lttb(timestamps, values, points)
+        columns = {
+            'timestamp': (timestamps[chosen] // 1000).tolist(),
+            'value': values[chosen].tolist()
+        }
+
+    return {
+        'project_id': project_id,
+        'metric': metric,
+        'method': method,
+        'start': from_micros(lo),
+        'end': from_micros(hi),
+        'total': total,
+        'points': len(columns['timestamp']),
+        'columns': columns
+    }
+
+
+def to_arrow(result: Dict) -> bytes:
+    """Serialize a downsample() result as an Arrow IPC stream; the other
+    fields travel as schema metadata"""
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed")
+    import pyarrow
+    import pyarrow.ipc
+    columns = result['columns']
+    arrays = {
+        name: pyarrow.array(
+            values,
+            type=pyarrow.timestamp('ms') if name == 'timestamp'
+            else pyarrow.int64() if name == 'count' else pyarrow.float64()
+        )
+        for name, values in columns.items()
+    }
+    metadata = {key: str(value) for key, value in result.items() if key != 'columns'}
+    table = pyarrow.table(arrays).replace_schema_metadata(metadata)
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+import asyncio
+import json
+import os
+import time
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+EPOCH = date(1970, 1, 1)
+
+def to_days(day: str) -> int:
+    """Convert an ISO date to days since the epoch"""
+    return (date.fromisoformat(day) - EPOCH).days
+
+def from_days(days: int) -> str:
+    return (EPOCH + timedelta(days=int(days))).isoformat()
+
+
+def _masked_mean_std(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise mean and population stddev over the `valid` entries"""
+    count = valid.sum(axis=1)
+    mean = np.where(valid, values, 0.0).sum(axis=1) / count
+    deviations = np.where(valid, values - mean[:, None], 0.0)
+    return mean, np.sqrt((deviations * deviations).sum(axis=1) / count)
+
+
+class IndicatorStore:
+    """On-disk columnar cache of economic time series.
+
+    Each series is one .npy file holding a (2, n) float64 array: row 0 is
+    the observation date in days since the epoch, row 1 the value. Files
+    are memory-mapped for reads and replaced atomically on append, so
+    readers in other processes never see a half-written series.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def load(self, series_id: str) -> np.ndarray:
+        """The (2, n) array of a series, memory-mapped; empty if not cached"""
+        path = self._path(series_id)
+        if not os.path.exists(path):
+            return np.empty((2, 0))
+        return np.load(path, mmap_mode='r')
+
+    def last_date(self, series_id: str) -> Optional[str]:
+        data = self.load(series_id)
+        return from_days(data[0, -1]) if data.shape[1] else None
+
+    def append(self, series_id: str, days: np.ndarray, values: np.ndarray) -> int:
+        """Add observations dated after the last cached one; returns how many were added"""
+        existing = self.load(series_id)
+        if existing.shape[1]:
+            newer = days > existing[0, -1]
+            days, values = days[newer], values[newer]
+        if not len(days):
+            return 0
+        combined = np.concatenate([existing, np.vstack([days, values])], axis=1)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(series_id)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            np.save(f, combined)
+        os.replace(temp, path)
+        return len(days)
+
+    def read_sync_state(self) -> Dict[str, float]:
+        try:
+            with open(os.path.join(self.cache_dir, 'sync_state.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_sync_state(self, state: Dict[str, float]) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, 'sync_state.json')
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp, path)
+
+    def _path(self, series_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{series_id}.npy")
+
+
+class IndicatorEngine:
+    """Multi-series FRED indicator features and the economic outlook score.
+
+    sync() asks FRED only for observations after the last cached date of
+    each series, all series concurrently. Series synced within
+    `sync_interval` seconds are not requested at all, so warm calls to
+    outlook() are served from the local cache without network I/O.
+
+    Features use the last `window` observations of every series at once:
+    trend is the least-squares slope relative to the window mean,
+    volatility the standard deviation of period-over-period changes, and
+    zscore the latest value against the window mean and deviation.
+    """
+
+    FEATURES = ('latest', 'trend', 'volatility', 'zscore')
+
+    def __init__(self, fetcher, url: str, api_key: Optional[str], series: List[Dict],
+                 cache_dir: str = 'indicator_cache', sync_interval: float = 86400,
+                 window: int = 12, trend_scale: float = 50.0, volatility_scale: float = 10.0,
+                 clock=time.time):
+        self.fetcher = fetcher
+        self.url = url
+        self.api_key = api_key
+        self.series = [
+            {'id': entry['id'], 'weight': entry.get('weight', 1.0), 'direction': entry.get('direction', 1)}
+            for entry in series
+        ]
+        self.store = IndicatorStore(cache_dir)
+        self.sync_interval = sync_interval
+        self.window = window
+        self.trend_scale = trend_scale
+        self.volatility_scale = volatility_scale
+        self.clock = clock
+        self._synced_at = self.store.read_sync_state()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls, fetcher, url: str, api_key: Optional[str],
+                      settings: Dict) -> 'IndicatorEngine':
+        """Build an engine from the `economic_indicators` config section"""
+        return cls(
+            fetcher,
+            url,
+            api_key,
+            settings.get('series') or [{'id': 'GDP'}],
+            cache_dir=settings.get('cache_dir', 'indicator_cache'),
+            sync_interval=settings.get('sync_interval', 86400),
+            window=settings.get('window', 12),
+            trend_scale=settings.get('trend_scale', 50.0),
+            volatility_scale=settings.get('volatility_scale', 10.0)
+        )
+
+    async def sync(self, force: bool = False) -> Dict[str, int]:
+        """Fetch new observations of every due series; returns how many each gained"""
+        async with self._lock:
+            now = self.clock()
+            due = [
+                entry['id'] for entry in self.series
+                if force or now - self._synced_at.get(entry['id'], float('-inf')) >= self.sync_interval
+            ]
+            if not due:
+                return {}
+            added = await asyncio.gather(*(self._sync_series(series_id) for series_id in due))
+            results = {}
+            for series_id, count in zip(due, added):
+                if count is not None:
+                    self._synced_at[series_id] = now
+                    results[series_id] = count
+            if results:
+                self.store.write_sync_state(self._synced_at)
+            return results
+
+    async def _sync_series(self, series_id: str) -> Optional[int]:
+        params = {'series_id': series_id, 'api_key': self.api_key, 'file_type': 'json'}
+        last = self.store.last_date(series_id)
+        if last is not None:
+            params['observation_start'] = from_days(to_days(last) + 1)
+        data = await self.fetcher.fetch_json('economic_indicators', self.url, params)
+        if data is None:
+            return None
+        days, values = self._parse(data.get('observations', []))
+        return self.store.append(series_id, days, values)
+
+    def _parse(self, observations: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        days, values = [], []
+        for observation in observations:
+            try:
+                value = float(observation['value'])  # FRED marks missing values with '.'
+                day = to_days(observation['date'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            days.append(day)
+            values.append(value)
+        order = np.argsort(days, kind='stable')
+        return np.asarray(days, dtype=np.float64)[order], np.asarray(values, dtype=np.float64)[order]
+
+    def features(self) -> Dict[str, Dict]:
+        """Features of every cached series, computed in one vectorized pass"""
+        tails = np.full((len(self.series), self.window), np.nan)
+        last_dates = {}
+        for row, entry in enumerate(self.series):
+            data = self.store.load(entry['id'])
+            tail = data[1, -self.window:]
+            tails[row, self.window - len(tail):] = tail
+            if data.shape[1]:
+                last_dates[entry['id']] = from_days(data[0, -1])
+
+        columns = self._feature_columns(tails)
+        return {
+            entry['id']: dict(
+                {name: float(columns[name][row]) for name in self.FEATURES},
+                date=last_dates[entry['id']]
+            )
+            for row, entry in enumerate(self.series)
+            if entry['id'] in last_dates and not np.isnan(columns['zscore'][row])
+        }
+
+    def _feature_columns(self, tails: np.ndarray) -> Dict[str, np.ndarray]:
+        valid = ~np.isnan(tails)
+        count = valid.sum(axis=1)
+        usable = count >= 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean, std = _masked_mean_std(tails, valid)
+
+            # Least-squares slope against observation position
+            positions = np.broadcast_to(np.arange(tails.shape[1], dtype=np.float64), tails.shape)
+            x_mean, _ = _masked_mean_std(positions, valid)
+            x = np.where(valid, positions - x_mean[:, None], 0.0)
+            y = np.where(valid, tails - mean[:, None], 0.0)
+            trend = (x * y).sum(axis=1) / (x * x).sum(axis=1) / np.abs(mean)
+
+            changes = np.diff(tails, axis=1) / np.abs(tails[:, :-1])
+            _, volatility = _masked_mean_std(changes, np.isfinite(changes))
+
+            latest = tails[:, -1]
+            zscore = np.where(std > 0, (latest - mean) / std, 0.0)
+
+        return {
+            'latest': latest,
+            'trend': np.where(usable & np.isfinite(trend), trend, 0.0),
+            'volatility': np.where(usable & np.isfinite(volatility), volatility, 0.0),
+            'zscore': np.where(usable, zscore, np.nan)
+        }
+
+    def outlook_score(self, features: Dict[str, Dict]) -> float:
+        """Economic outlook from 0 (bad for projects) to 1 (good); 0.5 is neutral.
+
+        Each series contributes direction * (tanh(trend_scale * trend) +
+        tanh(zscore)) / 2, damped by 1 / (1 + volatility_scale * volatility)
+        and weighted by its configured weight.
+        """
+        total = 0.0
+        weights = 0.0
+        for entry in self.series:
+            feature = features.get(entry['id'])
+            if feature is None:
+                continue
+            signal = entry['direction'] * (
+                np.tanh(self.trend_scale * feature['trend']) + np.tanh(feature['zscore'])
+            ) / 2
+            damping = 1 / (1 + self.volatility_scale * feature['volatility'])
+            total += entry['weight'] * damping * signal
+            weights += entry['weight']
+        if weights == 0:
+            return 0.5
+        return float(np.clip(0.5 + 0.5 * total / weights, 0.0, 1.0))
+
+    async def outlook(self) -> Tuple[float, Dict[str, Dict]]:
+        """Sync due series, then score the outlook from the local cache"""
+        await self.sync()
+        features = self.features()
+        return self.outlook_score(features), features
@@ -0,0 +1,185 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import json
+import os
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+class ScoringBackend:
+    """Interface for turning a project's inputs into a total risk score.
+
+    Backends see both the raw input metrics and the factor scores derived
+    from them. score_one() serves the per-project path and score_batch()
+    the portfolio path, which passes whole columns at once.
+    """
+
+    # Whether score_one() needs the raw input metrics, not just factor scores
+    needs_inputs = False
+
+    def score_one(self, inputs: Optional[Dict[str, float]], factors: Dict[str, float]) -> float:
+        raise NotImplementedError
+
+    def score_batch(self, inputs: Dict[str, np.ndarray], factors: Dict[str, np.ndarray]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class RuleBasedBackend(ScoringBackend):
+    """Hand-tuned weighted sum of the factor scores"""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+
+    def score_one(self, inputs: Optional[Dict[str, float]], factors: Dict[str, float]) -> float:
+        return sum(factors[factor] * weight for factor, weight in self.weights.items())
+
+    def score_batch(self, inputs: Dict[str, np.ndarray], factors: Dict[str, np.ndarray]) -> np.ndarray:
+        # Accumulate left to right, in the same order as the scalar sum()
+        total = 0
+        for factor, weight in self.weights.items():
+            total = total + factors[factor] * weight
+        return total
+
+
+class LinearModelBackend(ScoringBackend):
+    """Linear model over the input metrics, trained by train_risk_model().
+
+    The model is a float64 .npy of one coefficient per input metric followed
+    by the intercept, with the metric names in a .json file next to it. It
+    is memory-mapped on the first score, not when the backend is created,
+    so worker startup does not pay for it. Scores are clipped to [0, 1].
+    """
+
+    needs_inputs = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._features = None
+        self._weights = None
+
+    def load(self) -> Tuple[List[str], np.ndarray]:
+        if self._weights is None:
+            with open(metadata_path(self.path)) as f:
+                features = json.load(f)['features']
+            weights = np.load(self.path, mmap_mode='r')
+            if weights.shape != (len(features) + 1,):
+                raise ValueError(f"{self.path} does not match its feature list")
+            self._features = features
+            self._weights = weights
+        return self._features, self._weights
+
+    def __getstate__(self) -> Dict:
+        # Worker processes map the model file themselves instead of receiving a copy
+        return {'path': self.path, '_features': None, '_weights': None}
+
+    def score_one(self, inputs: Optional[Dict[str, float]], factors: Dict[str, float]) -> float:
+        features, weights = self.load()
+        inputs = inputs or {}
+        total = float(weights[-1])
+        for i, feature in enumerate(features):
+            total += inputs.get(feature, 0) * float(weights[i])
+        return min(1.0, max(0.0, total))
+
+    def score_batch(self, inputs: Dict[str, np.ndarray], factors: Dict[str, np.ndarray]) -> np.ndarray:
+        features, weights = self.load()
+        size = len(next(iter(factors.values())))
+        total = np.full(size, float(weights[-1]))
+        for i, feature in enumerate(features):
+            column = inputs.get(feature)
+            if column is not None:
+                total += column * weights[i]
+        return np.clip(total, 0.0, 1.0)
+
+
+def metadata_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.json'
+
+def training_set(history, features: List[str], project_ids: Optional[List[str]] = None,
+                 horizon: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Input metrics of each tracked update and the risk `horizon` updates later.
+
+    Risk is 1 - health_score. Missing inputs count as 0, as when scoring.
+    """
+    if project_ids is None:
+        project_ids = history.project_ids()
+    inputs, targets = [], []
+    for project_id in project_ids:
+        columns = history.metric_history(project_id, features + ['health_score'])
+        health = columns['health_score']
+        if len(health) <= horizon:
+            continue
+        rows = np.column_stack([columns[feature][:-horizon] for feature in features])
+        target = 1 - health[horizon:]
+        known = ~np.isnan(target)
+        inputs.append(np.nan_to_num(rows[known], nan=0.0))
+        targets.append(target[known])
+    if not inputs:
+        return np.empty((0, len(features))), np.empty(0)
+    return np.concatenate(inputs), np.concatenate(targets)
+
+def train_risk_model(history, path: str, features: List[str],
+                     project_ids: Optional[List[str]] = None, horizon: int = 1,
+                     alpha: float = 1.0, min_samples: int = 20) -> Dict:
+    """Fit a ridge regression on tracked history and export it for LinearModelBackend"""
+    from sklearn.linear_model import Ridge
+
+    inputs, targets = training_set(history, features, project_ids, horizon)
+    if len(targets) < min_samples:
+        raise ValueError(f"need at least {min_samples} samples to train, got {len(targets)}")
+    model = Ridge(alpha=alpha).fit(inputs, targets)
+
+    weights = np.append(model.coef_, model.intercept_).astype(np.float64)
+    metadata = {
+        'features': list(features),
+        'horizon': horizon,
+        'alpha': alpha,
+        'samples': len(targets),
+        'r2': float(model.score(inputs, targets)),
+        'trained_at': datetime.now().isoformat()
+    }
+    # Write both files atomically so running workers never load a partial model
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as f:
+        np.save(f, weights)
+    os.replace(temp, path)
+    temp = f"{metadata_path(path)}.{os.getpid()}.tmp"
+    with open(temp, 'w') as f:
+        json.dump(metadata, f)
+    os.replace(temp, metadata_path(path))
+    return metadata
+
+def create_scoring_backend(settings: Dict, weights: Dict[str, float]) -> ScoringBackend:
+    """Build the backend described by the `risk_model` config section"""
+    backend = settings.get('backend', 'rules')
+    if backend == 'rules':
+        return RuleBasedBackend(weights)
+    if backend == 'linear':
+        path = settings.get('model_path', 'risk_model.npy')
+        if not os.path.exists(path):
+            print(f"Risk model {path} not found, falling back to rule-based scoring")
+            return RuleBasedBackend(weights)
+        return LinearModelBackend(path)
+    raise ValueError(f"Unknown risk model backend: {backend}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from agents.risk_scoring import INPUT_METRICS
+    from config import get_section
+    from storage.history import create_history_store
+
+    settings = get_section('risk_model')
+    parser = argparse.ArgumentParser(description="Train the linear risk model on tracked history")
+    parser.add_argument("--out", default=settings.get('model_path', 'risk_model.npy'))
+    parser.add_argument("--horizon", type=int, default=settings.get('horizon', 1))
+    parser.add_argument("--alpha", type=float, default=settings.get('alpha', 1.0))
+    args = parser.parse_args()
+
+    history = create_history_store(get_section('history'))
+    print(json.dumps(train_risk_model(
+        history, args.out, INPUT_METRICS, horizon=args.horizon, alpha=args.alpha
+    ), indent=2))
+    history.close()
@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import os
+import threading
+from utils.cache import LRUCache
+
+BUNDLED_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sentiment_lexicon.txt')
+NLTK_LEXICON = 'sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt'
+
+
+def article_key(article: Dict) -> str:
+    """Cache key for an article: its URL, or a hash of its text if it has none"""
+    url = article.get('url')
+    if url:
+        return url
+    return hashlib.sha1(article_text(article).encode('utf-8')).hexdigest()
+
+def article_text(article: Dict) -> str:
+    return ' '.join(
+        article.get(field) or '' for field in ('title', 'description', 'content')
+    ).strip()
+
+
+class SentimentScorer:
+    """VADER sentiment for news articles, scored in batches and cached per article.
+
+    NLTK and the lexicon are loaded on first use, not at import. The lexicon
+    is the first of: `lexicon_path`, NLTK's downloaded vader_lexicon, or the
+    finance lexicon bundled next to this module, so scoring works offline.
+    Articles not yet in the cache are split into batches of `batch_size`
+    and scored on a thread pool, off the event loop.
+    """
+
+    def __init__(self, lexicon_path: Optional[str] = None, workers: int = 2,
+                 batch_size: int = 100, cache_size: int = 10000):
+        self.lexicon_path = lexicon_path
+        self.batch_size = batch_size
+        self.cache = LRUCache(max_entries=cache_size)
+        self.articles_scored = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sentiment')
+        self._analyzer = None
+        self._analyzer_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'SentimentScorer':
+        """Build a scorer from the `sentiment` config section"""
+        return cls(
+            lexicon_path=settings.get('lexicon_path'),
+            workers=settings.get('workers', 2),
+            batch_size=settings.get('batch_size', 100),
+            cache_size=settings.get('cache_size', 10000)
+        )
+
+    async def score_articles(self, articles: List[Dict]) -> List[float]:
+        """VADER compound score (-1 to 1) of each article"""
+        keys = [article_key(article) for article in articles]
+        scores = {}
+        pending = {}
+        for key, article in zip(keys, articles):
+            if key in scores or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                scores[key] = cached
+            else:
+                pending[key] = article_text(article)
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            items = list(pending.items())
+            batches = [
+                items[start:start + self.batch_size]
+                for start in range(0, len(items), self.batch_size)
+            ]
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, self._score_batch, [text for _, text in batch])
+                for batch in batches
+            ))
+            self.articles_scored += len(items)
+            for batch, batch_scores in zip(batches, results):
+                for (key, _), score in zip(batch, batch_scores):
+                    self.cache.set(key, score)
+                    scores[key] = score
+
+        return [scores[key] for key in keys]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _score_batch(self, texts: List[str]) -> List[float]:
+        analyzer = self.load()
+        return [analyzer.polarity_scores(text)['compound'] if text else 0.0 for text in texts]
+
+    def load(self):
+        """Load NLTK and the lexicon once; called on first use unless done earlier"""
+        if self._analyzer is None:
+            with self._analyzer_lock:
+                if self._analyzer is None:
+                    self._analyzer = _build_analyzer(self.lexicon_path)
+        return self._analyzer
+
+
+def _build_analyzer(lexicon_path: Optional[str]):
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+    if lexicon_path is None:
+        try:
+            return SentimentIntensityAnalyzer(NLTK_LEXICON)
+        except LookupError:
+            lexicon_path = BUNDLED_LEXICON
+
+    analyzer = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+    with open(lexicon_path, encoding='utf-8') as f:
+        # Same tab-separated format as VADER's lexicon: token, mean valence, ...
+        analyzer.lexicon_file = '\n'.join(line for line in f.read().splitlines() if line.strip())
+    analyzer.lexicon = analyzer.make_lex_dict()
+    analyzer.constants = VaderConstants()
+    return analyzer
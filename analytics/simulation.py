@@ -0,0 +1,283 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import zlib
+from agents.risk_scoring import INPUT_METRICS, RiskScoringAgent
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+LEVELS = ['low', 'medium', 'high', 'critical']
+
+# Metrics that may go negative; every other input metric is a rate or count
+SIGNED_METRICS = {'budget_variance'}
+_SIGNED = [metric in SIGNED_METRICS for metric in INPUT_METRICS]
+
+
+class ScenarioModel:
+    """Distribution of a project's input metrics `horizon` updates ahead.
+
+    Fitted to tracked history as a random walk: the latest values plus the
+    mean step per update, with the covariance of the steps, both scaled by
+    the horizon. Metrics a project never reported stay at 0, as they do
+    when scoring, unless a what-if shifts them.
+    """
+
+    def __init__(self, mean: np.ndarray, factor: np.ndarray, observations: int = 0):
+        self.mean = mean
+        self.factor = factor  # samples are mean + factor @ z, z standard normal
+        self.observations = observations
+
+    @classmethod
+    def fit(cls, history: Dict[str, np.ndarray], horizon: int = 1,
+            min_std: float = 0.01) -> 'ScenarioModel':
+        """Fit to metric_history() columns of INPUT_METRICS, oldest first"""
+        values = np.column_stack([np.asarray(history[metric], dtype=np.float64) for metric in INPUT_METRICS])
+        tracked = ~np.all(np.isnan(values), axis=0)
+
+        latest = np.zeros(len(INPUT_METRICS))
+        for i in np.flatnonzero(tracked):
+            column = values[:, i]
+            latest[i] = column[~np.isnan(column)][-1]
+
+        # Steps between updates of the metrics the project reports
+        steps = np.diff(values[:, tracked], axis=0)
+        drift = np.zeros(len(INPUT_METRICS))
+        covariance = np.zeros((len(INPUT_METRICS), len(INPUT_METRICS)))
+        complete = steps[~np.isnan(steps).any(axis=1)]
+        if len(complete) >= 2:
+            drift[tracked] = complete.mean(axis=0)
+            covariance[np.ix_(tracked, tracked)] = np.atleast_2d(np.cov(complete, rowvar=False))
+        elif len(steps):
+            # Too few complete steps for a covariance: use each metric's own steps
+            known = ~np.isnan(steps)
+            counts = np.maximum(known.sum(axis=0), 1)
+            mean_step = np.where(known, steps, 0.0).sum(axis=0) / counts
+            drift[tracked] = mean_step
+            covariance[tracked, tracked] = (np.where(known, steps - mean_step, 0.0) ** 2).sum(axis=0) / counts
+
+        # Even a flat history leaves some uncertainty in what comes next
+        floor = np.where(tracked, min_std ** 2, 0.0)
+        covariance[np.diag_indices_from(covariance)] = np.maximum(np.diag(covariance), floor)
+        mean = latest + drift * horizon
+        mean = np.where(_SIGNED, mean, np.maximum(mean, 0.0))
+        return cls(mean, _factor(covariance * horizon), len(values))
+
+    def sample(self, rng, size: int, scale: np.ndarray, shift: np.ndarray) -> np.ndarray:
+        """(size x metrics) draws, with what-if scale and shift applied to each metric"""
+        draws = self.mean + rng.standard_normal((size, len(self.mean))) @ self.factor.T
+        draws = draws * scale + shift
+        return np.where(_SIGNED, draws, np.maximum(draws, 0.0))
+
+
+def _factor(covariance: np.ndarray) -> np.ndarray:
+    """Square root of a covariance matrix, tolerating singular ones"""
+    # Constant metrics keep exactly zero spread
+    active = np.flatnonzero(np.diag(covariance) > 0)
+    block = covariance[np.ix_(active, active)]
+    try:
+        root = np.linalg.cholesky(block + np.eye(len(active)) * 1e-12)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(block)
+        root = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+    factor = np.zeros_like(covariance)
+    factor[np.ix_(active, active)] = root
+    return factor
+
+def _quantile_key(q: float) -> str:
+    return f"p{q * 100:g}"
+
+
+class MonteCarloSimulator:
+    """Monte Carlo forecast of project risk under sampled metric scenarios.
+
+    Scenarios are drawn from a ScenarioModel fitted to the project's last
+    `history_window` updates and scored with RiskScoringAgent's vectorized
+    path in chunks of `chunk_size`, so memory stays bounded however many
+    samples are requested. Only level counts and a `bins`-bucket histogram
+    of scores are kept, from which probabilities and quantiles are read.
+
+    Runs are reproducible: each chunk draws from its own generator spawned
+    from (seed, project id), so a project's result depends only on the
+    seed and sample count, not on how a portfolio run was split across
+    worker processes.
+    """
+
+    def __init__(self, risk_agent: RiskScoringAgent, samples: int = 10000,
+                 max_samples: int = 1000000, chunk_size: int = 65536,
+                 history_window: int = 90, min_std: float = 0.01,
+                 quantiles: Tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95),
+                 bins: int = 10000, workers: int = 1):
+        self.risk_agent = risk_agent
+        self.samples = samples
+        self.max_samples = max_samples
+        self.chunk_size = chunk_size
+        self.history_window = history_window
+        self.min_std = min_std
+        self.quantiles = tuple(quantiles)
+        self.bins = bins
+        self.workers = workers
+
+    @classmethod
+    def from_settings(cls, risk_agent: RiskScoringAgent, settings: Dict) -> 'MonteCarloSimulator':
+        """Build a simulator from the `simulation` config section"""
+        return cls(
+            risk_agent,
+            samples=settings.get('samples', 10000),
+            max_samples=settings.get('max_samples', 1000000),
+            chunk_size=settings.get('chunk_size', 65536),
+            history_window=settings.get('history_window', 90),
+            min_std=settings.get('min_std', 0.01),
+            quantiles=tuple(settings.get('quantiles', (0.05, 0.25, 0.5, 0.75, 0.95))),
+            bins=settings.get('bins', 10000),
+            workers=settings.get('workers', 1)
+        )
+
+    def fit(self, history, project_id: str, horizon: int = 1) -> ScenarioModel:
+        columns = history.metric_history(project_id, INPUT_METRICS, count=self.history_window)
+        return ScenarioModel.fit(columns, horizon, self.min_std)
+
+    def simulate(self, history, project_id: str, samples: Optional[int] = None,
+                 horizon: int = 1, seed: Optional[int] = None, scale: Optional[Dict] = None,
+                 shift: Optional[Dict] = None, market_risk: Optional[float] = None) -> Dict:
+        """Level probabilities and score quantiles of a project `horizon` updates ahead"""
+        samples, horizon, seed = self._validate(samples, horizon, seed)
+        model = self.fit(history, project_id, horizon)
+        result = self.run(model, project_id, samples, seed, scale, shift, market_risk)
+        result.update({'project_id': project_id, 'horizon': horizon, 'seed': seed})
+        return result
+
+    def simulate_portfolio(self, history, project_ids: Optional[List[str]] = None,
+                           samples: Optional[int] = None, horizon: int = 1,
+                           seed: Optional[int] = None, scale: Optional[Dict] = None,
+                           shift: Optional[Dict] = None,
+                           market_risks: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
+        """simulate() for many projects, spread over `workers` processes"""
+        samples, horizon, seed = self._validate(samples, horizon, seed)
+        if project_ids is None:
+            project_ids = sorted(history.project_ids())
+        market_risks = market_risks or {}
+        jobs = [
+            (self.fit(history, project_id, horizon), project_id, samples, seed,
+             scale, shift, market_risks.get(project_id))
+            for project_id in project_ids
+        ]
+
+        if self.workers <= 1 or len(jobs) <= 1:
+            results = [self.run(*job) for job in jobs]
+        else:
+            settings = self._worker_settings()
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(
+                    _run_job, [self.risk_agent] * len(jobs), [settings] * len(jobs), jobs
+                ))
+
+        for result in results:
+            result.update({'horizon': horizon, 'seed': seed})
+        return dict(zip(project_ids, results))
+
+    def run(self, model: ScenarioModel, project_id: str, samples: int, seed: int,
+            scale: Optional[Dict] = None, shift: Optional[Dict] = None,
+            market_risk: Optional[float] = None) -> Dict:
+        """Draw and score `samples` scenarios from a fitted model"""
+        scale_vector = self._what_if(scale, 1.0)
+        shift_vector = self._what_if(shift, 0.0)
+        thresholds = self.risk_agent.thresholds
+        edges = [thresholds['medium'], thresholds['high'], thresholds['critical']]
+
+        level_counts = np.zeros(len(LEVELS), dtype=np.int64)
+        histogram = np.zeros(self.bins, dtype=np.int64)
+        total = 0.0
+        chunks = -(-samples // self.chunk_size)
+        children = np.random.SeedSequence([seed, zlib.crc32(project_id.encode('utf-8'))]).spawn(chunks)
+        for chunk, child in enumerate(children):
+            size = min(self.chunk_size, samples - chunk * self.chunk_size)
+            draws = model.sample(np.random.default_rng(child), size, scale_vector, shift_vector)
+            columns = {metric: draws[:, i] for i, metric in enumerate(INPUT_METRICS)}
+            if market_risk is not None:
+                columns['market_risk'] = np.full(size, market_risk)
+            scores = self.risk_agent.total_scores(columns)
+
+            level_counts += np.bincount(np.digitize(scores, edges), minlength=len(LEVELS))
+            buckets = np.minimum((np.clip(scores, 0.0, 1.0) * self.bins).astype(np.int64), self.bins - 1)
+            histogram += np.bincount(buckets, minlength=self.bins)
+            total += float(scores.sum())
+
+        cumulative = np.cumsum(histogram)
+        return {
+            'samples': samples,
+            'history_points': model.observations,
+            'expected_metrics': {
+                metric: round(float(value), 4)
+                for metric, value in zip(INPUT_METRICS, model.mean * scale_vector + shift_vector)
+            },
+            'probabilities': {
+                level: float(count) / samples for level, count in zip(LEVELS, level_counts)
+            },
+            'mean_score': round(total / samples, 4),
+            'quantiles': {
+                _quantile_key(q): round((int(np.searchsorted(cumulative, q * samples)) + 0.5) / self.bins, 4)
+                for q in self.quantiles
+            }
+        }
+
+    def _validate(self, samples: Optional[int], horizon: int, seed: Optional[int]) -> Tuple[int, int, int]:
+        samples = self.samples if samples is None else int(samples)
+        horizon = int(horizon)
+        if not 1 <= samples <= self.max_samples:
+            raise ValueError(f"samples must be between 1 and {self.max_samples}")
+        if horizon < 1:
+            raise ValueError("horizon must be at least 1 update")
+        # Without a seed, pick one and report it so the run can be repeated
+        seed = int(np.random.SeedSequence().entropy % 2 ** 63) if seed is None else int(seed)
+        if seed < 0:
+            raise ValueError("seed must be non-negative")
+        return samples, horizon, seed
+
+    def _what_if(self, changes: Optional[Dict], default: float) -> np.ndarray:
+        changes = changes or {}
+        unknown = set(changes) - set(INPUT_METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        return np.array([float(changes.get(metric, default)) for metric in INPUT_METRICS])
+
+    def _worker_settings(self) -> Dict:
+        return {
+            'chunk_size': self.chunk_size,
+            'quantiles': self.quantiles,
+            'bins': self.bins
+        }
+
+
+def _run_job(risk_agent: RiskScoringAgent, settings: Dict, job: Tuple) -> Dict:
+    """Worker entry point: run one project's simulation with a copy of the parent's risk agent.
+
+    The agent travels whole, scoring backend included, so workers score
+    exactly as the parent does whatever its weights and backend.
+    """
+    simulator = MonteCarloSimulator(
+        risk_agent, chunk_size=settings['chunk_size'],
+        quantiles=settings['quantiles'], bins=settings['bins']
+    )
+    return simulator.run(*job)
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from config import get_section
+    from storage.history import create_history_store
+
+    settings = get_section('simulation')
+    parser = argparse.ArgumentParser(description="Simulate risk for every tracked project")
+    parser.add_argument("--samples", type=int, default=settings.get('samples', 10000))
+    parser.add_argument("--horizon", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=settings.get('workers', 1))
+    args = parser.parse_args()
+
+    simulator = MonteCarloSimulator.from_settings(RiskScoringAgent(), settings)
+    simulator.workers = args.workers
+    history = create_history_store(get_section('history'))
+    results = simulator.simulate_portfolio(history, samples=args.samples, horizon=args.horizon, seed=args.seed)
+    print(json.dumps(results, indent=2))
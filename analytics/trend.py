@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, Optional
+from collections import deque
+import math
+
+class TrendTracker:
+    """Running statistics over a sliding window of health scores.
+
+    Keeps the sums needed for a least-squares slope (sum y, sum x*y), the
+    rolling mean/stddev (sum y^2) and an EWMA, so each update is O(1)
+    regardless of the window size. x is the position within the window.
+    """
+
+    # Recompute sums from the window this often to bound floating point drift
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, window: int = 4, ewma_alpha: float = 0.3,
+                 initial_scores: Iterable[float] = ()):
+        if window < 2:
+            raise ValueError("window must hold at least 2 points")
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.scores = deque(maxlen=window)
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.sum_yy = 0.0
+        self.ewma = None
+        self._pushes = 0
+        for score in initial_scores:
+            self.push(score)
+
+    def push(self, score: float) -> None:
+        """Add the newest score, evicting the oldest once the window is full"""
+        if len(self.scores) == self.window:
+            oldest = self.scores[0]
+            self.sum_y -= oldest
+            self.sum_yy -= oldest * oldest
+            # Every remaining point shifts one position to the left
+            self.sum_xy -= self.sum_y
+            position = self.window - 1
+        else:
+            position = len(self.scores)
+        self.sum_xy += position * score
+        self.sum_y += score
+        self.sum_yy += score * score
+        self.scores.append(score)
+
+        if self.ewma is None:
+            self.ewma = score
+        else:
+            self.ewma = self.ewma_alpha * score + (1 - self.ewma_alpha) * self.ewma
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_INTERVAL == 0:
+            self._resync()
+
+    @property
+    def count(self) -> int:
+        return len(self.scores)
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Least-squares slope of the scores in the window"""
+        n = len(self.scores)
+        if n < 2:
+            return None
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        variance = n * sum_xx - sum_x * sum_x
+        return (n * self.sum_xy - sum_x * self.sum_y) / variance
+
+    @property
+    def mean(self) -> Optional[float]:
+        n = len(self.scores)
+        return self.sum_y / n if n else None
+
+    @property
+    def stddev(self) -> Optional[float]:
+        """Population standard deviation of the scores in the window"""
+        n = len(self.scores)
+        if not n:
+            return None
+        mean = self.sum_y / n
+        return math.sqrt(max(self.sum_yy / n - mean * mean, 0.0))
+
+    def statistics(self) -> Dict:
+        return {
+            'count': self.count,
+            'slope': self.slope,
+            'ewma': self.ewma,
+            'rolling_mean': self.mean,
+            'rolling_std': self.stddev
+        }
+
+    def _resync(self) -> None:
+        self.sum_y = sum(self.scores)
+        self.sum_yy = sum(y * y for y in self.scores)
+        self.sum_xy = sum(x * y for x, y in enumerate(self.scores))
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable
+import hashlib
+from fastapi import Request
+from fastapi.responses import Response
+from services.response_cache import ResponseCache, accepted_encodings
+
+def make_etag(resource: str, version: str) -> str:
+    # Weak: workers render the same version with their own generation timestamp
+    digest = hashlib.sha1(f"{resource}@{version}".encode('utf-8')).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def http_date(timestamp: str) -> str:
+    """HTTP-date of an ISO timestamp; naive timestamps are local time"""
+    return format_datetime(datetime.fromisoformat(timestamp).astimezone(timezone.utc), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """Whether the client's cached copy is current (If-None-Match wins over If-Modified-Since)"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        # Weak comparison: W/ prefixes are ignored
+        opaque = etag[2:] if etag.startswith('W/') else etag
+        return any(
+            (tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()) == opaque
+            for tag in if_none_match.split(',')
+        )
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def conditional_response(request: Request, cache: ResponseCache, resource: str,
+                         version: str, modified_at: str, media_type: str,
+                         render: Callable[[], bytes]) -> Response:
+    """Respond 304 if the client has this version, else serve it from the response cache.
+
+    `version` identifies the resource's content; `render` builds the body only
+    when the cache does not hold that version yet.
+    """
+    etag = make_etag(resource, version)
+    last_modified = http_date(modified_at)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': last_modified,
+        'Cache-Control': 'no-cache',  # clients may store it but must revalidate
+        'Vary': 'Accept-Encoding'
+    }
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    body, coding = cache.body(
+        resource, version, accepted_encodings(request.headers.get('accept-encoding')), render
+    )
+    if coding != 'identity':
+        headers['Content-Encoding'] = coding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,146 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from agents.registry import get_agent
+from analytics.simulation import MonteCarloSimulator
+from config import get_section
+from services.assessment import RiskAssessmentService
+from services.chat import ChatResponder
+from services.feature_store import FeatureStore
+from services.ingestion import IngestionPipeline
+from services.live_updates import LiveUpdateHub
+from services.market_refresher import MarketDataRefresher
+from services.report_pipeline import ReportPipeline
+from services.response_cache import ResponseCache
+from services.summary_index import PortfolioSummaryIndex
+from storage.alert_log import AlertLog
+from storage.history import HistoryStore
+from storage.state import StateStore, create_state_store
+from utils.metrics import register_cache, register_queue
+from utils.profiler import SamplingProfiler
+
+if TYPE_CHECKING:
+    from agents.market_analysis import MarketAnalysisAgent
+    from agents.project_tracking import ProjectTrackingAgent
+    from agents.reporting import ReportingAgent
+    from agents.risk_scoring import RiskScoringAgent
+
+# Agents and services are created once per worker process and shared by the
+# routes (through Depends) and main.py's startup/shutdown hooks. State that
+# must agree across uvicorn workers lives in the `history` and `state` backends.
+# Agents come from the agent registry, which imports each agent's module on
+# first use rather than when this module is imported.
+
+@lru_cache(maxsize=None)
+def get_state_store() -> StateStore:
+    return create_state_store(get_section('state'))
+
+def get_risk_agent() -> 'RiskScoringAgent':
+    return get_agent('risk_scoring')
+
+def get_project_agent() -> 'ProjectTrackingAgent':
+    return get_agent('project_tracking')
+
+def get_reporting_agent() -> 'ReportingAgent':
+    return get_agent('reporting')
+
+def get_market_agent() -> 'MarketAnalysisAgent':
+    return get_agent('market_analysis')
+
+def get_alert_log() -> AlertLog:
+    return get_reporting_agent().alert_log
+
+def get_history_store() -> HistoryStore:
+    return get_project_agent().history
+
+@lru_cache(maxsize=None)
+def get_feature_store() -> FeatureStore:
+    project_agent = get_project_agent()
+    return FeatureStore.from_settings(
+        get_risk_agent(),
+        get_section('market_risk'),
+        metrics_loader=lambda project_id: (project_agent.get_project_status(project_id) or {}).get('metrics')
+    )
+
+@lru_cache(maxsize=None)
+def get_market_refresher() -> MarketDataRefresher:
+    return MarketDataRefresher.from_settings(
+        get_market_agent(),
+        get_section('market_data'),
+        state_store=get_state_store(),
+        on_update=get_feature_store().update_market
+    )
+
+@lru_cache(maxsize=None)
+def get_report_pipeline() -> ReportPipeline:
+    return ReportPipeline.from_settings(
+        get_reporting_agent(), get_section('reporting'), state_store=get_state_store()
+    )
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> ResponseCache:
+    return ResponseCache.from_settings(get_section('response_cache'))
+
+@lru_cache(maxsize=None)
+def get_live_updates() -> LiveUpdateHub:
+    return LiveUpdateHub(sync_interval=get_section('state').get('sync_interval', 1.0))
+
+def _load_project_summary(project_id: str):
+    project_agent = get_project_agent()
+    return (
+        get_report_pipeline().latest_risk(project_id),
+        project_agent.get_project_status(project_id),
+        project_agent.detect_anomalies(project_id)
+    )
+
+@lru_cache(maxsize=None)
+def get_summary_index() -> PortfolioSummaryIndex:
+    # Agents are resolved when a project is first looked up, not at startup
+    return PortfolioSummaryIndex(
+        project_loader=_load_project_summary,
+        sync_interval=get_section('state').get('sync_interval', 1.0)
+    )
+
+@lru_cache(maxsize=None)
+def get_chat_responder() -> ChatResponder:
+    return ChatResponder.from_settings(get_summary_index(), get_section('chat'))
+
+@lru_cache(maxsize=None)
+def get_assessment_service() -> RiskAssessmentService:
+    return RiskAssessmentService(
+        get_project_agent(), get_risk_agent(), get_report_pipeline(), get_live_updates(),
+        get_feature_store(), summary_index=get_summary_index()
+    )
+
+@lru_cache(maxsize=None)
+def get_ingestion_pipeline() -> IngestionPipeline:
+    settings = get_section('ingestion')
+    return IngestionPipeline(
+        get_project_agent(),
+        get_risk_agent(),
+        on_scored=get_assessment_service().publish_many,
+        batch_size=settings.get('batch_size', 5000),
+        max_errors=settings.get('max_errors', 20),
+        feature_store=get_feature_store(),
+        summary_index=get_summary_index()
+    )
+
+@lru_cache(maxsize=None)
+def get_simulator() -> MonteCarloSimulator:
+    return MonteCarloSimulator.from_settings(get_risk_agent(), get_section('simulation'))
+
+@lru_cache(maxsize=None)
+def get_profiler() -> SamplingProfiler:
+    return SamplingProfiler.from_settings(get_section('profiling'))
+
+def register_metrics() -> None:
+    """Export cache and queue statistics of the shared services at /metrics"""
+    register_cache('upstream_fetch', lambda: get_market_agent().fetcher.cache)
+    register_cache('sentiment', lambda: get_market_agent().sentiment.cache)
+    register_cache('risk_report', lambda: get_reporting_agent().report_cache)
+    register_cache('feature_vectors', get_feature_store)
+    register_cache('responses', get_response_cache)
+    register_cache('chat_intents', get_chat_responder)
+    register_queue('report_alerts', lambda: get_report_pipeline().alert_queue.qsize())
+    register_queue('report_renders', lambda: get_report_pipeline().render_queue.qsize())
+    register_queue('alert_dispatch', lambda: get_reporting_agent().dispatcher.pending_count())
+    register_queue('live_update_events', lambda: get_live_updates().queued_events())
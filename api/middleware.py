@@ -0,0 +1,46 @@
+import time
+from utils.metrics import REGISTRY
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time to serve HTTP requests, by route template',
+    ['method', 'route', 'status']
+)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request.
+
+    Requests are labelled with the matched route's path template rather
+    than the raw path, so per-project URLs share one series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope['method'], route_template(scope), status
+            ).observe(time.perf_counter() - started)
+
+def route_template(scope) -> str:
+    """Full path template of the route that served a request"""
+    # FastAPI resolves routes of included routers through an effective route
+    # context carrying the prefixed path; plain Starlette routes carry it themselves
+    context = (scope.get('fastapi') or {}).get('effective_route_context')
+    path = getattr(context, 'path', None) or getattr(scope.get('route'), 'path', None)
+    return path or 'unmatched'
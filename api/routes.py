@@ -1,15 +1,31 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from datetime import datetime
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import asyncio
 import random
-from agents.risk_scoring import RiskScoringAgent
-from agents.project_tracking import ProjectTrackingAgent
-from agents.reporting import ReportingAgent
+from agents.risk_scoring import RiskScoringAgent, INPUT_METRICS
+from analytics import downsampling
+from analytics.simulation import MonteCarloSimulator
+from api.dependencies import (
+    get_alert_log, get_assessment_service, get_chat_responder, get_feature_store,
+    get_history_store, get_ingestion_pipeline, get_live_updates, get_market_refresher,
+    get_report_pipeline, get_response_cache, get_risk_agent, get_simulator
+)
+from api.conditional import conditional_response
+from services.assessment import RiskAssessmentService
+from services.chat import ChatResponder
+from services.feature_store import FeatureStore
+from services.ingestion import IngestionPipeline
+from services.live_updates import LiveUpdateHub
+from services.market_refresher import MarketDataRefresher
+from services.report_pipeline import ReportPipeline
+from services.response_cache import ResponseCache
+from storage.alert_log import AlertLog
+from storage.history import HistoryStore
 
 router = APIRouter()
-risk_agent = RiskScoringAgent()
-project_agent = ProjectTrackingAgent()
-reporting_agent = ReportingAgent()
 
 # Sample project data
 sample_projects = {
@@ -29,14 +45,17 @@ sample_projects = {
     }
 }
 
-@router.get("/project/{project_id}/risk", response_class=JSONResponse)
-async def get_project_risk(project_id: str):
-    """Get current risk assessment for a project"""
-    if project_id not in sample_projects:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Generate sample metrics (in real app would come from database)
-    metrics = {
+class SimulationScenario(BaseModel):
+    """Body of a what-if simulation request; every field is optional"""
+    samples: Optional[int] = None
+    horizon: int = 1
+    seed: Optional[int] = None
+    scale: Optional[Dict[str, float]] = None
+    shift: Optional[Dict[str, float]] = None
+
+def _sample_metrics() -> Dict:
+    """Generate sample metrics (in real app would come from database)"""
+    return {
         "budget_variance": random.uniform(0, 0.3),
         "payment_delays": random.randint(0, 3),
         "schedule_delay": random.uniform(0, 0.4),
@@ -46,78 +65,253 @@ async def get_project_risk(project_id: str):
         "defect_rate": random.uniform(0, 0.25),
         "tech_debt": random.uniform(0, 0.2)
     }
+
+def _latest_assessment(project_id: str, assessments: RiskAssessmentService):
+    """Current status and risk of a project, seeding projects that never reported"""
+    status = assessments.project_agent.get_project_status(project_id)
+    if not status:
+        assessments.assess(project_id, _sample_metrics())
+        status = assessments.project_agent.get_project_status(project_id)
     
-    # Update project status with these metrics
-    project_agent.update_project_status(project_id, metrics)
+    # Polling reads the latest assessment; scoring only happens on change
+    risk_data = assessments.latest(project_id)
+    if risk_data is None:
+        risk_data = assessments.score(project_id, status['metrics'])
+    return status, risk_data
+
+@router.get("/project/{project_id}/risk", response_class=JSONResponse)
+async def get_project_risk(project_id: str, request: Request,
+                           assessments: RiskAssessmentService = Depends(get_assessment_service),
+                           response_cache: ResponseCache = Depends(get_response_cache)):
+    """Get current risk assessment for a project"""
+    if project_id not in sample_projects:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    # Calculate risk score
-    risk_data = risk_agent.calculate_project_risk(metrics)
+    status, risk_data = _latest_assessment(project_id, assessments)
     
-    # Generate report (not used in this endpoint but available)
-    report = reporting_agent.generate_risk_report(project_id, risk_data)
+    # Each assessment is a new version of the response, identified by its timestamp
+    def render() -> bytes:
+        return JSONResponse({
+            "project": sample_projects[project_id],
+            "metrics": status['metrics'],
+            "risk": risk_data,
+            "timestamp": datetime.now().isoformat()
+        }).body
     
-    # Check if we need to send alerts
-    if risk_data['level'] in ['critical', 'high']:
-        reporting_agent.send_alert(project_id, risk_data)
+    return conditional_response(
+        request, response_cache, f"risk:{project_id}", risk_data['timestamp'],
+        risk_data['timestamp'], "application/json", render
+    )
+
+@router.post("/project/{project_id}/metrics", response_class=JSONResponse)
+async def update_project_metrics(project_id: str, metrics: dict,
+                                 assessments: RiskAssessmentService = Depends(get_assessment_service)):
+    """Report new metrics for a project, rescoring it and notifying subscribers"""
+    if project_id not in sample_projects:
+        raise HTTPException(status_code=404, detail="Project not found")
     
+    risk_data = assessments.assess(project_id, metrics)
     return {
-        "project": sample_projects[project_id],
-        "metrics": metrics,
-        "risk": risk_data,
-        "timestamp": datetime.now().isoformat()
+        "status": assessments.project_agent.get_project_status(project_id),
+        "risk": risk_data
     }
 
+@router.post("/project/{project_id}/simulate", response_class=JSONResponse)
+async def simulate_project_risk(project_id: str, scenario: Optional[SimulationScenario] = None,
+                                assessments: RiskAssessmentService = Depends(get_assessment_service),
+                                feature_store: FeatureStore = Depends(get_feature_store),
+                                simulator: MonteCarloSimulator = Depends(get_simulator)):
+    """Monte Carlo forecast of a project's risk, optionally under what-if changes
+
+    All fields are optional: {"samples": 100000, "horizon": 4, "seed": 42,
+    "scale": {"attrition_rate": 2.0}, "shift": {"defect_rate": 0.05}}.
+    `horizon` counts status updates ahead; `scale` and `shift` change the
+    sampled metrics. Passing the returned `seed` back repeats a run exactly.
+    """
+    if project_id not in sample_projects:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    scenario = scenario or SimulationScenario()
+    _latest_assessment(project_id, assessments)
+    market_risk = feature_store.market_risks([project_id])[0]
+    try:
+        # Large runs take a while; keep the event loop serving other requests
+        return await asyncio.to_thread(
+            simulator.simulate,
+            assessments.project_agent.history,
+            project_id,
+            samples=scenario.samples,
+            horizon=scenario.horizon,
+            seed=scenario.seed,
+            scale=scenario.scale,
+            shift=scenario.shift,
+            market_risk=market_risk
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/project/{project_id}/stream")
+async def stream_project_updates(project_id: str,
+                                 live_updates: LiveUpdateHub = Depends(get_live_updates)):
+    """Stream risk deltas and new alerts as server-sent events"""
+    if project_id not in sample_projects:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    return StreamingResponse(
+        live_updates.stream(project_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _query_alerts(alert_log: AlertLog, project_id: Optional[str], severity: Optional[List[str]],
+                  min_severity: Optional[str], since: Optional[str], until: Optional[str],
+                  cursor: Optional[int], limit: int) -> Dict:
+    try:
+        return alert_log.query(project_id, severity, min_severity, since, until, cursor, limit)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @router.get("/project/{project_id}/alerts", response_class=JSONResponse)
-async def get_project_alerts(project_id: str):
-    """Get recent alerts for a project"""
+async def get_project_alerts(project_id: str,
+                             severity: Optional[List[str]] = Query(None),
+                             min_severity: Optional[str] = None,
+                             since: Optional[str] = None, until: Optional[str] = None,
+                             cursor: Optional[int] = None, limit: int = Query(50, ge=1, le=500),
+                             alert_log: AlertLog = Depends(get_alert_log)):
+    """Alerts logged for a project, newest first
+
+    Filter by `severity` (repeatable) or `min_severity`, and an ISO
+    `since`/`until` time range. Pass `next_cursor` back as `cursor` for
+    the next page.
+    """
     if project_id not in sample_projects:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Generate sample alerts
-    alerts = []
-    for i in range(3):
-        alerts.append({
-            "id": f"alert-{i}",
-            "project_id": project_id,
-            "title": f"Sample Alert {i+1}",
-            "message": f"This is a sample alert message about potential risks in {sample_projects[project_id]['name']}",
-            "severity": random.choice(["low", "medium", "high", "critical"]),
-            "timestamp": datetime.now().isoformat()
-        })
+    return _query_alerts(alert_log, project_id, severity, min_severity, since, until, cursor, limit)
+
+@router.get("/alerts", response_class=JSONResponse)
+async def get_alerts(severity: Optional[List[str]] = Query(None),
+                     min_severity: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     cursor: Optional[int] = None, limit: int = Query(50, ge=1, le=500),
+                     alert_log: AlertLog = Depends(get_alert_log)):
+    """Alerts across all projects, newest first, e.g. ?severity=critical&since=<an hour ago>"""
+    return _query_alerts(alert_log, None, severity, min_severity, since, until, cursor, limit)
+
+@router.get("/project/{project_id}/history")
+async def get_project_history(project_id: str, request: Request, metric: str = "health_score",
+                              start: Optional[str] = None, end: Optional[str] = None,
+                              points: int = Query(500, ge=2, le=10000), method: str = "minmax",
+                              format: str = "json",
+                              history: HistoryStore = Depends(get_history_store)):
+    """A metric's history over an ISO `start`/`end` range, downsampled for charting
+
+    `method` is "minmax" (min, max, mean and count per time bucket) or
+    "lttb" (representative updates). Columns are returned as JSON arrays
+    with epoch-millisecond timestamps, or as an Arrow IPC stream with
+    `format=arrow` or an Accept of application/vnd.apache.arrow.stream.
+    """
+    if project_id not in sample_projects:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    return {"alerts": alerts}
+    arrow = format == "arrow" or downsampling.ARROW_MEDIA_TYPE in request.headers.get("accept", "")
+    if arrow and not downsampling.ARROW_AVAILABLE:
+        raise HTTPException(status_code=406, detail="Arrow output requires pyarrow")
+    try:
+        # SQLite-backed histories aggregate on disk; keep the event loop free meanwhile
+        result = await asyncio.to_thread(
+            downsampling.downsample, history, project_id, metric, start, end, points, method
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if arrow:
+        return Response(downsampling.to_arrow(result), media_type=downsampling.ARROW_MEDIA_TYPE)
+    return JSONResponse(result)
 
 @router.get("/project/{project_id}/report", response_class=HTMLResponse)
-async def get_project_report(project_id: str):
+async def get_project_report(project_id: str, request: Request,
+                             report_pipeline: ReportPipeline = Depends(get_report_pipeline),
+                             assessments: RiskAssessmentService = Depends(get_assessment_service),
+                             response_cache: ResponseCache = Depends(get_response_cache)):
     """Generate HTML risk report for a project"""
     if project_id not in sample_projects:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Generate sample risk data
-    risk_data = {
-        "score": random.uniform(0.1, 0.9),
-        "level": random.choice(["low", "medium", "high", "critical"]),
-        "factors": {
-            "financial": random.uniform(0.1, 0.9),
-            "schedule": random.uniform(0.1, 0.9),
-            "resources": random.uniform(0.1, 0.9),
-            "technical": random.uniform(0.1, 0.9)
+    # Render from the latest assessment, scoring the project if it has none yet
+    _, risk_data = _latest_assessment(project_id, assessments)
+    return conditional_response(
+        request, response_cache, f"report:{project_id}", risk_data['timestamp'],
+        risk_data['timestamp'], "text/html; charset=utf-8",
+        lambda: report_pipeline.get_report(project_id, risk_data).encode('utf-8')
+    )
+
+@router.post("/portfolio/risk", response_class=JSONResponse)
+async def get_portfolio_risk(portfolio: dict,
+                             risk_agent: RiskScoringAgent = Depends(get_risk_agent)):
+    """Score a batch of projects in one vectorized pass
+
+    Accepts either {"projects": [{"project_id": ..., <metrics>}, ...]} or
+    columnar {"project_ids": [...], "columns": {<metric>: [...]}}.
+    """
+    if "columns" in portfolio:
+        columns = portfolio["columns"]
+        project_ids = portfolio.get("project_ids", [])
+    else:
+        projects = portfolio.get("projects", [])
+        project_ids = [p.get("project_id") for p in projects]
+        columns = {
+            metric: [p.get(metric, 0) for p in projects]
+            for metric in INPUT_METRICS
         }
+
+    try:
+        results = risk_agent.calculate_portfolio_risk(columns)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {
+        "project_ids": project_ids,
+        "score": results["score"].tolist(),
+        "level": results["level"].tolist(),
+        "factors": {
+            factor: scores.tolist() for factor, scores in results["factors"].items()
+        },
+        "timestamp": results["timestamp"]
     }
+
+@router.get("/market", response_class=JSONResponse)
+async def get_market_snapshot(market_refresher: MarketDataRefresher = Depends(get_market_refresher)):
+    """Get the latest market indicators with staleness metadata"""
+    return await market_refresher.get()
+
+@router.get("/features/stats", response_class=JSONResponse)
+async def get_feature_stats(feature_store: FeatureStore = Depends(get_feature_store)):
+    """Feature vector cache hit/miss counters"""
+    return feature_store.stats()
+
+@router.post("/ingest", response_class=JSONResponse)
+async def ingest_metrics(request: Request, fmt: str = Query(None, alias="format"),
+                         ingestion_pipeline: IngestionPipeline = Depends(get_ingestion_pipeline)):
+    """Stream NDJSON or CSV metric rows into project tracking and risk scoring"""
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
     
-    return reporting_agent.generate_risk_report(project_id, risk_data)
+    try:
+        return await ingestion_pipeline.ingest(request.stream(), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @router.post("/chat")
-async def handle_chat_message(message: dict):
-    """Handle chat messages and return AI response"""
-    user_message = message.get("text", "")
-    
-    # Simple response logic (in real app would use NLP)
-    if "risk" in user_message.lower():
-        return {"response": "The current risk level is medium. The main factors are schedule delay (45%) and budget variance (30%)."}
-    elif "schedule" in user_message.lower():
-        return {"response": "The project is currently 2 weeks behind schedule. The risk factor is 0.45 (medium)."}
-    elif "budget" in user_message.lower():
-        return {"response": "Current budget utilization is at 65%. The risk factor is 0.30 (low)."}
-    else:
-        return {"response": "I can provide information about project risks, schedule, and budget. What would you like to know?"}
\ No newline at end of file
+async def handle_chat_message(message: dict,
+                              responder: ChatResponder = Depends(get_chat_responder)):
+    """Answer a chat message from live project and portfolio data
+
+    Send {"text": ..., "project_id": <optional current project>}; projects
+    named in the text ("project 2", "project-002") take precedence.
+    """
+    text = message.get("text", "")
+    project_id = message.get("project_id")
+    if not isinstance(text, str) or not (project_id is None or isinstance(project_id, str)):
+        raise HTTPException(status_code=422, detail="text and project_id must be strings")
+    return responder.answer(text, project_id)
\ No newline at end of file
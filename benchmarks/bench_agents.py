@@ -0,0 +1,51 @@
+# Micro-benchmarks of the per-project agent methods on the request path.
+import random
+from agents.project_tracking import ProjectTrackingAgent
+from agents.reporting import ReportingAgent
+from agents.risk_scoring import RiskScoringAgent, INPUT_METRICS
+from benchmarks.harness import benchmark
+from services.feature_store import FeatureStore
+from storage.history import RingBufferHistoryStore
+
+def sample_metrics(rng: random.Random) -> dict:
+    metrics = {metric: rng.uniform(0, 0.5) for metric in INPUT_METRICS}
+    metrics.update({
+        'schedule_variance': rng.uniform(-0.2, 0.2),
+        'resource_changes': rng.uniform(0, 0.3),
+        'quality_metrics': rng.uniform(0.5, 1),
+        'stakeholder_satisfaction': rng.uniform(0.5, 1)
+    })
+    return metrics
+
+@benchmark('agents')
+def calculate_project_risk():
+    agent = RiskScoringAgent()
+    metrics = sample_metrics(random.Random(0))
+    return lambda: agent.calculate_project_risk(metrics)
+
+@benchmark('agents')
+def update_project_status():
+    agent = ProjectTrackingAgent(RingBufferHistoryStore(retention=1000))
+    rng = random.Random(0)
+    updates = [sample_metrics(rng) for _ in range(256)]
+    counter = iter(range(1 << 62))
+    return lambda: agent.update_project_status('project-001', updates[next(counter) % 256])
+
+@benchmark('agents', params={'cached': [False, True]})
+def generate_risk_report(cached):
+    agent = ReportingAgent()
+    risk_data = RiskScoringAgent().calculate_project_risk(sample_metrics(random.Random(0)))
+    if cached:
+        return lambda: agent.generate_risk_report('project-001', risk_data)
+    counter = iter(range(1 << 62))
+    # A new score each call, so every render misses the report cache
+    return lambda: agent.generate_risk_report(
+        'project-001', dict(risk_data, score=next(counter) / 1e6)
+    )
+
+@benchmark('agents')
+def feature_store_lookup():
+    store = FeatureStore(RiskScoringAgent())
+    store.update_metrics('project-001', sample_metrics(random.Random(0)))
+    store.get('project-001')
+    return lambda: store.get('project-001')
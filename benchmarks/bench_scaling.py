@@ -0,0 +1,74 @@
+# Scaling benchmarks over portfolio size and project history length.
+import random
+from datetime import datetime, timedelta
+import numpy as np
+from agents.project_tracking import ProjectTrackingAgent
+from agents.risk_scoring import RiskScoringAgent, INPUT_METRICS
+from analytics.downsampling import downsample
+from analytics.simulation import MonteCarloSimulator
+from benchmarks.bench_agents import sample_metrics
+from benchmarks.harness import benchmark
+from storage.history import RingBufferHistoryStore, SQLiteHistoryStore
+
+PORTFOLIO_SIZES = [1000, 10000, 100000]
+HISTORY_LENGTHS = [100, 1000, 10000]
+
+def tracked_agent(length: int) -> ProjectTrackingAgent:
+    agent = ProjectTrackingAgent(RingBufferHistoryStore(retention=length))
+    agent.anomaly_seed_points = length
+    rng = random.Random(0)
+    agent.update_project_statuses([('project-001', sample_metrics(rng)) for _ in range(length)])
+    return agent
+
+@benchmark('scaling', params={'projects': PORTFOLIO_SIZES})
+def calculate_portfolio_risk(projects):
+    agent = RiskScoringAgent()
+    rng = np.random.default_rng(0)
+    portfolio = {metric: rng.uniform(0, 0.5, projects) for metric in INPUT_METRICS}
+    return lambda: agent.calculate_portfolio_risk(portfolio)
+
+@benchmark('scaling', params={'projects': PORTFOLIO_SIZES})
+def update_project_statuses(projects):
+    agent = ProjectTrackingAgent(RingBufferHistoryStore(retention=16))
+    rng = random.Random(0)
+    updates = [(f"project-{i}", sample_metrics(rng)) for i in range(projects)]
+    return lambda: agent.update_project_statuses(updates)
+
+@benchmark('scaling', params={'history': HISTORY_LENGTHS})
+def get_trend_statistics(history):
+    agent = tracked_agent(history)
+    # Drop the cached tracker each call so it is reseeded from history
+    def run():
+        agent._trends.clear()
+        return agent.get_trend_statistics('project-001')
+    return run
+
+@benchmark('scaling', params={'history': HISTORY_LENGTHS})
+def backfill_anomalies(history):
+    agent = tracked_agent(history)
+    return lambda: agent.backfill_anomalies(['project-001'])
+
+@benchmark('scaling', params={'samples': [10000, 100000, 1000000]})
+def simulate(samples):
+    agent = tracked_agent(100)
+    simulator = MonteCarloSimulator(RiskScoringAgent())
+    return lambda: simulator.simulate(agent.history, 'project-001', samples=samples, seed=0)
+
+@benchmark('scaling', params={'history': [1000, 100000, 1000000]})
+def downsample_history(history):
+    store = SQLiteHistoryStore(':memory:')
+    start = datetime(2020, 1, 1)
+    rng = random.Random(0)
+    for offset in range(0, history, 100000):
+        store.append_many([
+            ('project-001', {
+                'timestamp': (start + timedelta(minutes=i)).isoformat(),
+                'metrics': {'schedule_variance': rng.random()},
+                'health_score': rng.random(),
+                'trend': 'stable'
+            })
+            for i in range(offset, min(history, offset + 100000))
+        ])
+    # The first call builds the rollups; timed calls read them
+    downsample(store, 'project-001', points=500)
+    return lambda: downsample(store, 'project-001', points=500)
@@ -0,0 +1,114 @@
+# Minimal benchmark harness: registration, timing, JSON baselines and comparison.
+#
+# A benchmark is a setup function decorated with @benchmark. It receives one
+# value of each declared parameter and returns the zero-argument callable to
+# time, so setup work is never measured.
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from itertools import product
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+BENCHMARKS = []
+
+def benchmark(group: str, params: Optional[Dict[str, List]] = None):
+    """Register a setup function returning the callable to time"""
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS.append({'group': group, 'name': setup.__name__, 'setup': setup, 'params': params or {}})
+        return setup
+    return register
+
+def benchmark_ids(entry: Dict) -> List[Dict]:
+    """Every (id, kwargs) combination of a registered benchmark's parameters"""
+    names = list(entry['params'])
+    cases = []
+    for values in product(*(entry['params'][name] for name in names)):
+        kwargs = dict(zip(names, values))
+        suffix = ','.join(f"{name}={value}" for name, value in kwargs.items())
+        cases.append({
+            'id': f"{entry['group']}.{entry['name']}" + (f"[{suffix}]" if suffix else ''),
+            'kwargs': kwargs
+        })
+    return cases
+
+def time_callable(func: Callable, repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """Per-call timings: calls per run are chosen so a run lasts at least `min_time`"""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)) + 1)
+    runs = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': float(runs.min()),
+        'median': float(np.median(runs)),
+        'mean': float(runs.mean()),
+        'ops_per_sec': float(1 / runs.min())
+    }
+
+def run(pattern: Optional[str] = None, repeat: int = 5, min_time: float = 0.2) -> Dict[str, Dict]:
+    """Time every registered benchmark whose id contains `pattern`"""
+    results = {}
+    for entry in BENCHMARKS:
+        for case in benchmark_ids(entry):
+            if pattern and pattern not in case['id']:
+                continue
+            func = entry['setup'](**case['kwargs'])
+            results[case['id']] = time_callable(func, repeat, min_time)
+            print(f"{case['id']:<60} {results[case['id']]['min'] * 1e6:>12.1f} us")
+    return results
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def save(path: str, benchmarks: Dict[str, Dict], load: Optional[Dict] = None) -> None:
+    """Write results as a JSON baseline"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'benchmarks': benchmarks, 'load': load or {}}, f, indent=2)
+
+def load_baseline(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.2) -> List[Dict]:
+    """Benchmarks and load tests that got more than `threshold` slower than the baseline.
+
+    Micro-benchmarks compare their fastest run; load tests compare p95
+    latency and requests/sec.
+    """
+    regressions = []
+    for name, result in current.get('benchmarks', {}).items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before and result['min'] > before['min'] * (1 + threshold):
+            regressions.append({'name': name, 'metric': 'min', 'baseline': before['min'], 'current': result['min']})
+    for name, result in current.get('load', {}).items():
+        before = baseline.get('load', {}).get(name)
+        if not before:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append({'name': name, 'metric': 'p95_ms', 'baseline': before['p95_ms'], 'current': result['p95_ms']})
+        if result['rps'] < before['rps'] / (1 + threshold):
+            regressions.append({'name': name, 'metric': 'rps', 'baseline': before['rps'], 'current': result['rps']})
+    return regressions
@@ -0,0 +1,114 @@
+# In-process ASGI load test: requests are sent straight to the app object,
+# so results measure the application rather than sockets or a client library.
+import asyncio
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+async def asgi_request(app, method: str, path: str, body: bytes = b'',
+                       headers: Iterable[Tuple[bytes, bytes]] = ()) -> Tuple[int, bytes]:
+    """Send one HTTP request to an ASGI app and return (status, body)"""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'benchmark'), (b'content-length', str(len(body)).encode())] + list(headers),
+        'client': ('127.0.0.1', 0),
+        'server': ('benchmark', 80)
+    }
+    pending = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    finished = asyncio.Event()
+    status = None
+    chunks = []
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return status, b''.join(chunks)
+
+async def load_test(app, method: str, path: str, requests: int = 1000, concurrency: int = 10,
+                    body: Optional[Dict] = None, warmup: int = 10) -> Dict:
+    """Send `requests` requests from `concurrency` concurrent clients.
+
+    Reports requests/sec and p50/p95/p99 latency in milliseconds.
+    """
+    payload = json.dumps(body).encode() if body is not None else b''
+    headers = [(b'content-type', b'application/json')] if body is not None else []
+    for _ in range(warmup):
+        await asgi_request(app, method, path, payload, headers)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            status, _ = await asgi_request(app, method, path, payload, headers)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1e3, [50, 95, 99])
+    return {
+        'method': method,
+        'path': path,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'rps': requests / elapsed,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99)
+    }
+
+# Endpoints exercised by the load test: name -> (method, path, JSON body)
+SCENARIOS = {
+    'project_risk': ('GET', '/api/project/project-001/risk', None),
+    'project_metrics': ('POST', '/api/project/project-002/metrics', {
+        'budget_variance': 0.1, 'schedule_delay': 0.2, 'defect_rate': 0.05
+    }),
+    'chat': ('POST', '/api/chat', {'text': 'Which projects are deteriorating?'}),
+    'portfolio_risk': ('POST', '/api/portfolio/risk', {
+        'projects': [{'project_id': f'p{i}', 'budget_variance': i / 1000} for i in range(1000)]
+    })
+}
+
+def run_load(app, names: Optional[List[str]] = None, requests: int = 1000,
+             concurrency: int = 10) -> Dict[str, Dict]:
+    results = {}
+    for name, (method, path, body) in SCENARIOS.items():
+        if names and name not in names:
+            continue
+        results[name] = asyncio.run(load_test(app, method, path, requests, concurrency, body))
+        result = results[name]
+        print(f"{name:<20} {result['rps']:>9.0f} req/s  p50 {result['p50_ms']:.2f} ms"
+              f"  p95 {result['p95_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms"
+              f"  errors {result['errors']}")
+    return results
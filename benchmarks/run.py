@@ -0,0 +1,44 @@
+# Run the benchmark suite and the ASGI load test, optionally saving a JSON
+# baseline and comparing against an earlier one.
+#
+#   python -m benchmarks.run --save benchmarks/baseline.json
+#   python -m benchmarks.run --compare benchmarks/baseline.json
+#
+# Exits with status 1 when a comparison finds a regression.
+import argparse
+import sys
+from benchmarks import bench_agents, bench_scaling  # registers the benchmarks
+from benchmarks.harness import compare, load_baseline, run, save
+from benchmarks.load import run_load
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agents and API endpoints")
+    parser.add_argument("--filter", help="only run benchmarks whose id contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per load scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--no-load", action="store_true", help="skip the ASGI load test")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    results = {'benchmarks': run(args.filter, args.repeat, args.min_time), 'load': {}}
+    if not args.no_load:
+        from main import app
+        results['load'] = run_load(app, requests=args.requests, concurrency=args.concurrency)
+
+    if args.save:
+        save(args.save, results['benchmarks'], results['load'])
+    if args.compare:
+        regressions = compare(load_baseline(args.compare), results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']} {regression['metric']}: "
+                  f"{regression['baseline']:.6g} -> {regression['current']:.6g}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Throughput and latency of the rule-based and linear risk scoring backends.
+#
+#   python -m benchmarks.scoring_backends [--rows 100000]
+#
+# The linear model is trained on a synthetic history in a temporary directory,
+# so the benchmark does not touch the configured history or model files.
+import argparse
+import os
+import tempfile
+import timeit
+import numpy as np
+from agents.risk_scoring import RiskScoringAgent, INPUT_METRICS
+from analytics.risk_model import LinearModelBackend, RuleBasedBackend, train_risk_model
+from storage.history import RingBufferHistoryStore
+
+def synthetic_history(projects: int = 200, updates: int = 50, seed: int = 0) -> RingBufferHistoryStore:
+    rng = np.random.default_rng(seed)
+    history = RingBufferHistoryStore(retention=updates)
+    for p in range(projects):
+        for u in range(updates):
+            metrics = {metric: float(rng.uniform(0, 0.5)) for metric in INPUT_METRICS}
+            health = 1 - min(1.0, 0.8 * metrics['schedule_delay'] + 0.6 * metrics['budget_variance'])
+            history.append(f"project-{p}", {
+                'timestamp': f"2024-01-01T00:00:{u:02d}",
+                'metrics': metrics,
+                'health_score': health,
+                'trend': 'stable'
+            })
+    return history
+
+def measure(agent: RiskScoringAgent, portfolio, projects, repeat: int = 5):
+    batch_seconds = min(timeit.repeat(lambda: agent.calculate_portfolio_risk(portfolio), number=1, repeat=repeat))
+    single = timeit.Timer(lambda: [agent.calculate_project_risk(project) for project in projects])
+    single_seconds = min(single.repeat(number=1, repeat=repeat)) / len(projects)
+    return batch_seconds, single_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark risk scoring backends")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--single", type=int, default=2000, help="projects scored one at a time")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    portfolio = {metric: rng.uniform(0, 0.5, args.rows) for metric in INPUT_METRICS}
+    projects = [
+        {metric: float(portfolio[metric][i]) for metric in INPUT_METRICS}
+        for i in range(min(args.single, args.rows))
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'risk_model.npy')
+        train_risk_model(synthetic_history(), path, INPUT_METRICS)
+        rules = RiskScoringAgent()
+        rules.backend = RuleBasedBackend(rules.risk_factors)
+        linear = RiskScoringAgent(backend=LinearModelBackend(path))
+
+        load_seconds = timeit.timeit(lambda: LinearModelBackend(path).load(), number=100) / 100
+        print(f"linear model load (mmap): {load_seconds * 1e6:.0f} us")
+        print(f"{'backend':<8} {'batch rows/s':>14} {'batch ms':>10} {'single us':>10}")
+        for name, agent in (('rules', rules), ('linear', linear)):
+            batch_seconds, single_seconds = measure(agent, portfolio, projects)
+            print(f"{name:<8} {args.rows / batch_seconds:>14,.0f} {batch_seconds * 1e3:>10.1f} "
+                  f"{single_seconds * 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
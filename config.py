@@ -0,0 +1,22 @@
+import os
+from functools import lru_cache
+from typing import Dict
+import yaml
+
+CONFIG_PATH = os.environ.get(
+    'RISK_CONFIG_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yaml')
+)
+
+@lru_cache(maxsize=None)
+def load_config(path: str = CONFIG_PATH) -> Dict:
+    """Load application settings from config.yaml"""
+    try:
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+def get_section(name: str) -> Dict:
+    """Return a top-level config section, or an empty dict if it is not set"""
+    return load_config().get(name) or {}
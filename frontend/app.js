@@ -2,6 +2,8 @@
 let currentProjectId = 'project-001';
 let riskData = {};
 let alertHistory = [];
+let pollTimer = null;
+const POLL_INTERVAL_MS = 30000;
 
 // Initialize the dashboard
 document.addEventListener('DOMContentLoaded', function() {
@@ -13,6 +15,9 @@ document.addEventListener('DOMContentLoaded', function() {
     fetchProjectData();
     fetchAlerts();
     
+    // Receive pushed updates, polling only while the stream is unavailable
+    connectLiveUpdates();
+    
     // Set up chat interface
     document.getElementById('sendButton').addEventListener('click', sendChatMessage);
     document.getElementById('chatInput').addEventListener('keypress', function(e) {
@@ -80,7 +85,8 @@ async function fetchProjectData() {
         const response = await fetch(`/api/project/${currentProjectId}/risk`);
         if (!response.ok) throw new Error('Network response was not ok');
         
-        riskData = await response.json();
+        const data = await response.json();
+        riskData = data.risk;
         updateDashboard(riskData);
     } catch (error) {
         console.error('Error fetching project data:', error);
@@ -156,13 +162,58 @@ async function fetchAlerts() {
         const response = await fetch(`/api/project/${currentProjectId}/alerts`);
         if (!response.ok) throw new Error('Network response was not ok');
         
-        alertHistory = await response.json();
+        const data = await response.json();
+        alertHistory = data.alerts;
         renderAlerts();
     } catch (error) {
         console.error('Error fetching alerts:', error);
     }
 }
 
+// Subscribe to server-sent risk deltas and alerts for the current project
+function connectLiveUpdates() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    
+    const source = new EventSource(`/api/project/${currentProjectId}/stream`);
+    source.addEventListener('snapshot', event => {
+        riskData = JSON.parse(event.data);
+        updateDashboard(riskData);
+    });
+    source.addEventListener('risk', event => {
+        const delta = JSON.parse(event.data);
+        riskData = {
+            ...riskData,
+            ...delta,
+            factors: { ...riskData.factors, ...(delta.factors || {}) }
+        };
+        updateDashboard(riskData);
+    });
+    source.addEventListener('alert', event => {
+        alertHistory.unshift(JSON.parse(event.data));
+        renderAlerts();
+    });
+    source.onopen = stopPolling;
+    // EventSource reconnects on its own; poll in the meantime
+    source.onerror = startPolling;
+}
+
+// Fall back to periodic polling
+function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(() => {
+        fetchProjectData();
+        fetchAlerts();
+    }, POLL_INTERVAL_MS);
+}
+
+function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
 // Render alerts to the UI
 function renderAlerts() {
     const container = document.getElementById('alertsContainer');
@@ -199,11 +250,21 @@ function sendChatMessage() {
     addChatMessage('user', message);
     input.value = '';
     
-    // Simulate AI response
-    setTimeout(() => {
-        const response = generateChatResponse(message);
-        addChatMessage('ai', response);
-    }, 1000);
+    // Answered by the server from live data; fall back to the local summary if it is unreachable
+    fetch('/api/chat', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({text: message, project_id: currentProjectId})
+    })
+        .then(response => {
+            if (!response.ok) throw new Error('Network response was not ok');
+            return response.json();
+        })
+        .then(data => addChatMessage('ai', data.response))
+        .catch(error => {
+            console.error('Error sending chat message:', error);
+            addChatMessage('ai', generateChatResponse(message));
+        });
 }
 
 // Add message to chat UI
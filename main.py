@@ -1,50 +1,132 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from agents.market_analysis import MarketAnalysisAgent
-from agents.risk_scoring import RiskScoringAgent
-from agents.project_tracking import ProjectTrackingAgent
-from agents.reporting import ReportingAgent
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from agents.registry import loaded_agent, warm
+from api.dependencies import (
+    get_live_updates, get_market_refresher, get_profiler, get_report_pipeline,
+    get_state_store, get_summary_index, register_metrics
+)
+from api.middleware import MetricsMiddleware
 from api.routes import router as api_router
-import uvicorn
+from config import get_section
+from utils.metrics import REGISTRY
+import argparse
+import gc
 import os
 
+# Preload mode: import the agents and their libraries now rather than on
+# first use. Under a pre-forking server (gunicorn --preload with uvicorn
+# workers) the forked workers then share these pages copy-on-write;
+# gc.freeze() keeps the collector in each worker from writing to them.
+if os.environ.get('RISK_PRELOAD', '0') not in ('', '0') or get_section('server').get('preload', False):
+    warm()
+    gc.freeze()
+
 app = FastAPI(title="AI-Powered Project Risk Management System",
               description="Real-time project risk detection and mitigation system",
               version="1.0.0")
 
-# Initialize agents
-market_agent = MarketAnalysisAgent()
-risk_agent = RiskScoringAgent()
-project_agent = ProjectTrackingAgent()
-reporting_agent = ReportingAgent()
-
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
 # Serve static files for frontend
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
+# Route timings, cache hit ratios and queue depths
+if get_section('metrics').get('enabled', True):
+    app.add_middleware(MetricsMiddleware)
+    register_metrics()
+
+def shared_backends() -> bool:
+    """Whether history, state and the alert log are stored where every worker process can reach them"""
+    return all(
+        get_section(section).get('backend', 'memory') == 'sqlite'
+        for section in ('history', 'state', 'alerts')
+    )
+
 @app.get("/")
 async def serve_frontend():
     """Serve the frontend dashboard"""
     with open("frontend/index.html") as f:
         return HTMLResponse(content=f.read(), status_code=200)
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this worker process"""
+    return Response(content=REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
+def _profiler():
+    # The profiler endpoints only exist when profiling is opted in
+    if not get_section('profiling').get('enabled', False):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return get_profiler()
+
+@app.post("/debug/profiler/start")
+async def start_profiler(interval: float = Query(None, gt=0)):
+    """Start sampling stacks of this worker process"""
+    profiler = _profiler()
+    if not profiler.start(interval):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return profiler.status()
+
+@app.post("/debug/profiler/stop")
+async def stop_profiler():
+    """Stop sampling; the capture stays available until the next start"""
+    profiler = _profiler()
+    profiler.stop()
+    return profiler.status()
+
+@app.get("/debug/profiler")
+async def profiler_output():
+    """Captured samples as folded stacks, ready for flamegraph.pl or speedscope"""
+    return PlainTextResponse(_profiler().folded())
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize application state on startup"""
     print("Starting up risk management system...")
-    # Initialize any required resources here
+    await get_market_refresher().start()
+    await get_report_pipeline().start()
+    await get_live_updates().start(get_state_store())
+    await get_summary_index().start(get_state_store())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown"""
     print("Shutting down risk management system...")
+    await get_market_refresher().stop()
+    await get_report_pipeline().stop()
+    await get_live_updates().stop()
+    await get_summary_index().stop()
+    get_profiler().stop()
+    # Only agents this worker actually created hold connections to close
+    market_agent = loaded_agent('market_analysis')
+    if market_agent is not None:
+        market_agent.fetcher.close()
+        market_agent.sentiment.close()
+    reporting_agent = loaded_agent('reporting')
+    if reporting_agent is not None:
+        reporting_agent.alert_log.close()
+    project_agent = loaded_agent('project_tracking')
+    if project_agent is not None:
+        project_agent.history.close()
+    get_state_store().close()
 
 if __name__ == "__main__":
     # Create frontend directory if it doesn't exist
     os.makedirs("frontend", exist_ok=True)
     
-    # Run the application
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    server = get_section('server')
+    parser = argparse.ArgumentParser(description="Run the risk management API server")
+    parser.add_argument("--host", default=server.get('host', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=server.get('port', 8000))
+    parser.add_argument("--workers", type=int, default=server.get('workers', 1))
+    args = parser.parse_args()
+    
+    # Every worker process needs to see the same history, assessments and alerts
+    if args.workers > 1 and not shared_backends():
+        raise SystemExit("Running several workers needs the sqlite `history`, `state` and `alerts` backends")
+    
+    # Run the application; workers are separate processes importing main:app
+    import uvicorn
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
@@ -0,0 +1,314 @@
+from typing import Dict, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from email.mime.text import MIMEText
+import asyncio
+import queue
+import smtplib
+import threading
+import time
+
+LEVEL_ORDER = ['low', 'medium', 'high', 'critical']
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` sends per second with bursts of `capacity`"""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class SMTPConnectionPool:
+    """Pool of persistent SMTP connections, reconnecting when one goes bad"""
+
+    def __init__(self, host: str, port: int = 587, use_tls: bool = True,
+                 username: str = None, password: str = None, size: int = 2,
+                 timeout: float = 10, idle_check: float = 30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.connections_opened = 0
+
+    @contextmanager
+    def connection(self):
+        """Borrow a live connection; it is discarded if the caller fails with it"""
+        server = self._checkout()
+        try:
+            yield server
+        except Exception:
+            self._discard(server)
+            raise
+        else:
+            try:
+                self._idle.put_nowait((server, time.monotonic()))
+            except queue.Full:
+                self._discard(server)
+
+    def close(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - returned_at < self.idle_check:
+                return server
+            # Connections idle for a while may have been dropped by the server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(server)
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.connections_opened += 1
+        return server
+
+    def _discard(self, server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+class SMTPTransport:
+    """Delivers messages through a pooled SMTP connection"""
+
+    def __init__(self, pool: SMTPConnectionPool):
+        self.pool = pool
+
+    def send(self, message: MIMEText) -> None:
+        with self.pool.connection() as server:
+            server.send_message(message)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class LogTransport:
+    """Prints messages instead of delivering them"""
+
+    def send(self, message: MIMEText) -> None:
+        print(f"Would send email alert: {message.as_string()}")
+
+    def close(self) -> None:
+        pass
+
+
+class AlertDispatcher:
+    """Batches, deduplicates and rate-limits alert emails.
+
+    Alerts for the same project and recipient arriving within
+    `coalesce_window` seconds are merged into one message. An alert at the
+    same level as one already pending or sent within `dedup_window` seconds
+    is dropped. Messages go out through a token bucket; failed sends wait in
+    a bounded retry queue and are retried up to `max_retries` times.
+    """
+
+    def __init__(self, transport, sender: str, recipients: List[str],
+                 coalesce_window: float = 60, dedup_window: float = 900,
+                 rate_limit: float = 1.0, burst: int = 10, retry_queue_size: int = 100,
+                 max_retries: int = 3, retry_backoff: float = 30, flush_interval: float = 5,
+                 clock=time.monotonic):
+        self.transport = transport
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.coalesce_window = coalesce_window
+        self.dedup_window = dedup_window
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.bucket = TokenBucket(rate_limit, burst, clock=clock)
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'sent': 0, 'failed': 0, 'dropped': 0}
+        self._pending = {}    # (project_id, recipient) -> {'since': t, 'alerts': [...]}
+        self._last_sent = {}  # (project_id, recipient, level) -> t
+        self._retries = deque(maxlen=retry_queue_size)
+        self._lock = threading.Lock()
+        self._task = None
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'AlertDispatcher':
+        """Build a dispatcher from the `notifications.email` config section"""
+        if settings.get('delivery', 'log') == 'smtp':
+            transport = SMTPTransport(SMTPConnectionPool(
+                settings['smtp_server'],
+                settings.get('smtp_port', 587),
+                use_tls=settings.get('use_tls', True),
+                username=settings.get('username') or None,
+                password=settings.get('password') or None,
+                size=settings.get('pool_size', 2),
+                timeout=settings.get('timeout', 10)
+            ))
+        else:
+            transport = LogTransport()
+        return cls(
+            transport,
+            sender=settings.get('sender', 'risk-system@company.com'),
+            recipients=settings.get('recipients') or ['project-managers@company.com'],
+            coalesce_window=settings.get('coalesce_window', 60),
+            dedup_window=settings.get('dedup_window', 900),
+            rate_limit=settings.get('rate_limit', 1.0),
+            burst=settings.get('burst', 10),
+            retry_queue_size=settings.get('retry_queue_size', 100),
+            max_retries=settings.get('max_retries', 3),
+            retry_backoff=settings.get('retry_backoff', 30),
+            flush_interval=settings.get('flush_interval', 5)
+        )
+
+    def submit(self, project_id: str, level: str, subject: str, body: str) -> bool:
+        """Queue an alert for every recipient; False if it was a duplicate for all"""
+        now = self.clock()
+        accepted = False
+        with self._lock:
+            self.stats['submitted'] += 1
+            for recipient in self.recipients:
+                if self._is_duplicate(project_id, recipient, level, now):
+                    self.stats['deduplicated'] += 1
+                    continue
+                batch = self._pending.setdefault(
+                    (project_id, recipient), {'since': now, 'alerts': []}
+                )
+                batch['alerts'].append({'level': level, 'subject': subject, 'body': body})
+                accepted = True
+        return accepted
+
+    def flush(self, force: bool = False) -> int:
+        """Send due batches and retries; returns the number of messages sent"""
+        now = self.clock()
+        with self._lock:
+            due = [
+                key for key, batch in self._pending.items()
+                if force or now - batch['since'] >= self.coalesce_window
+            ]
+            outgoing = [(key, self._pending.pop(key)['alerts'], 0) for key in due]
+            while self._retries and (force or self._retries[0]['retry_at'] <= now):
+                retry = self._retries.popleft()
+                outgoing.append((retry['key'], retry['alerts'], retry['attempts']))
+
+        sent = 0
+        for index, (key, alerts, attempts) in enumerate(outgoing):
+            if not self.bucket.try_acquire():
+                # Out of tokens: put the rest back to go out on a later flush
+                with self._lock:
+                    for later_key, later_alerts, later_attempts in outgoing[index:]:
+                        self._requeue(later_key, later_alerts, later_attempts, now)
+                break
+            try:
+                self.transport.send(self._build_message(key, alerts))
+            except (smtplib.SMTPException, OSError) as e:
+                print(f"Failed to send alert to {key[1]}: {str(e)}")
+                with self._lock:
+                    self.stats['failed'] += 1
+                    if attempts + 1 <= self.max_retries:
+                        self._schedule_retry(key, alerts, attempts + 1, now)
+                    else:
+                        self.stats['dropped'] += 1
+                continue
+            with self._lock:
+                for alert in alerts:
+                    self._last_sent[(key[0], key[1], alert['level'])] = self.clock()
+                self.stats['sent'] += 1
+            sent += 1
+        return sent
+
+    def pending_count(self) -> int:
+        """Alert batches waiting to be sent, including retries"""
+        with self._lock:
+            return len(self._pending) + len(self._retries)
+
+    async def start(self) -> None:
+        """Flush due batches every `flush_interval` seconds in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop, sending whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.flush, True)
+        self.transport.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"Alert dispatch error: {str(e)}")
+
+    def _is_duplicate(self, project_id: str, recipient: str, level: str, now: float) -> bool:
+        pending = self._pending.get((project_id, recipient))
+        if pending and any(alert['level'] == level for alert in pending['alerts']):
+            return True
+        last_sent = self._last_sent.get((project_id, recipient, level))
+        return last_sent is not None and now - last_sent < self.dedup_window
+
+    def _requeue(self, key, alerts: List[Dict], attempts: int, now: float) -> None:
+        if attempts:
+            self._schedule_retry(key, alerts, attempts, now, backoff=False)
+            return
+        # The batch was due already, so it stays due for the next flush with tokens
+        batch = self._pending.setdefault(key, {'since': now, 'alerts': []})
+        batch['since'] = min(batch['since'], now - self.coalesce_window)
+        batch['alerts'][:0] = alerts
+
+    def _schedule_retry(self, key, alerts: List[Dict], attempts: int, now: float,
+                        backoff: bool = True) -> None:
+        if len(self._retries) == self._retries.maxlen:
+            self.stats['dropped'] += 1  # the oldest retry falls off the queue
+        self._retries.append({
+            'key': key,
+            'alerts': alerts,
+            'attempts': attempts,
+            'retry_at': now + (self.retry_backoff * 2 ** (attempts - 1) if backoff else 0)
+        })
+
+    def _build_message(self, key, alerts: List[Dict]) -> MIMEText:
+        project_id, recipient = key
+        worst = max(alerts, key=lambda alert: LEVEL_ORDER.index(alert['level'])
+                    if alert['level'] in LEVEL_ORDER else -1)
+        if len(alerts) == 1:
+            subject = worst['subject']
+            body = worst['body']
+        else:
+            subject = f"{worst['subject']} (+{len(alerts) - 1} more)"
+            body = "\n\n".join(alert['body'] for alert in alerts)
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        return msg
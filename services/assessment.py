@@ -0,0 +1,115 @@
+from typing import Dict, Optional
+import asyncio
+from storage.alert_log import make_alert
+
+class RiskAssessmentService:
+    """Records project metrics, scores them and publishes the result.
+
+    Every route that produces a risk assessment goes through this service,
+    so reports, alerts, live subscribers and the chat summary index all see
+    the same assessment.
+    Scores are built from the FeatureStore's cached feature vectors. Reads
+    look the vector up too, which is a cache hit unless the project's
+    metrics or the market changed. Reads never publish: when market risk
+    counts towards the score and the market moved since this worker made
+    the project's latest assessment, reads are answered with a rescore of
+    the vector that only this worker keeps.
+    """
+
+    def __init__(self, project_agent, risk_agent, report_pipeline, live_updates, feature_store,
+                 summary_index=None):
+        self.project_agent = project_agent
+        self.risk_agent = risk_agent
+        self.report_pipeline = report_pipeline
+        self.live_updates = live_updates
+        self.feature_store = feature_store
+        self.summary_index = summary_index
+        self._scored = {}    # project_id -> (feature versions, timestamp) of the latest assessment made here
+        self._rescored = {}  # project_id -> (feature versions, risk_data) scored for reads, never published
+
+    def publish(self, project_id: str, risk_data: Dict) -> None:
+        """Hand a new risk assessment to every downstream consumer"""
+        self._scored[project_id] = (self.feature_store.version(project_id), risk_data['timestamp'])
+        self._rescored.pop(project_id, None)
+        # Reports render lazily and alerts are sent by background workers
+        self.report_pipeline.record_risk(project_id, risk_data)
+        if self.summary_index is not None:
+            self.summary_index.record_risk(project_id, risk_data)
+        self._push_live(project_id, risk_data)
+
+    async def publish_many(self, risks: Dict[str, Dict]) -> None:
+        """publish() the latest assessments of many projects.
+
+        The state store and summary index take the batch in a worker thread;
+        only queueing follow-up work and live pushes run on the event loop.
+        """
+        for project_id, risk_data in risks.items():
+            self._scored[project_id] = (self.feature_store.version(project_id), risk_data['timestamp'])
+            self._rescored.pop(project_id, None)
+        previous = await asyncio.to_thread(self._record_risks, risks)
+        self.report_pipeline.enqueue_work(risks, previous)
+        for project_id, risk_data in risks.items():
+            self._push_live(project_id, risk_data)
+
+    def _record_risks(self, risks: Dict[str, Dict]) -> Dict[str, Optional[Dict]]:
+        previous = self.report_pipeline.store_risks(risks)
+        if self.summary_index is not None:
+            self.summary_index.record_risks(risks)
+        return previous
+
+    def _push_live(self, project_id: str, risk_data: Dict) -> None:
+        # Push the change to live subscribers
+        self.live_updates.publish_risk(project_id, risk_data)
+        if risk_data['level'] in self.report_pipeline.alert_levels:
+            self.live_updates.publish_alert(project_id, make_alert(project_id, risk_data))
+
+    def score(self, project_id: str, metrics: Dict) -> Dict:
+        """Score metrics once and publish the result"""
+        self.feature_store.update_metrics(project_id, metrics)
+        return self._score_features(project_id)
+
+    def assess(self, project_id: str, metrics: Dict) -> Dict:
+        """Record new project metrics and score them"""
+        status = self.project_agent.update_project_status(project_id, metrics)
+        if self.summary_index is not None:
+            self.summary_index.record_status(
+                project_id, status, self.project_agent.detect_anomalies(project_id)
+            )
+        return self.score(project_id, metrics)
+
+    def latest(self, project_id: str) -> Optional[Dict]:
+        """Most recent assessment for a project, made by any worker.
+
+        A project with features but no assessment yet is scored from them,
+        without publishing the result.
+        """
+        features = self.feature_store.get(project_id)
+        risk_data = self.report_pipeline.latest_risk(project_id)
+        if features is None:
+            return risk_data
+        if risk_data is None:
+            return self._rescore(project_id, features)
+        # Only an assessment this worker made is known to be built from the
+        # features it holds; another worker's may be newer than them
+        scored = self._scored.get(project_id)
+        if (scored is not None and self.risk_agent.market_weight
+                and scored[1] == risk_data.get('timestamp')
+                and scored[0] != self.feature_store.version(project_id)):
+            return self._rescore(project_id, features)
+        return risk_data
+
+    def _rescore(self, project_id: str, features: Dict[str, float]) -> Dict:
+        # Kept per feature version, so repeated reads return the same assessment
+        version = self.feature_store.version(project_id)
+        rescored = self._rescored.get(project_id)
+        if rescored is None or rescored[0] != version:
+            rescored = self._rescored[project_id] = (version, self.risk_agent.score_features(features))
+        return rescored[1]
+
+    def _score_features(self, project_id: str) -> Dict:
+        return self._publish_score(project_id, self.feature_store.get(project_id))
+
+    def _publish_score(self, project_id: str, features: Dict[str, float]) -> Dict:
+        risk_data = self.risk_agent.score_features(features)
+        self.publish(project_id, risk_data)
+        return risk_data
@@ -0,0 +1,250 @@
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import re
+
+# Intents by priority; a message gets the first intent any of whose words it contains
+INTENTS = [
+    ('anomalies', r'anomal\w*|unusual|outliers?|spikes?'),
+    ('top_risks', r'riskiest|highest|most at risk|top (?:\d+ )?(?:risks?|risky|projects?)|worst|critical|high[- ]risk'),
+    ('trend', r'trends?|trending|improv\w*|deteriorat\w*|declin\w*|worsen\w*|health\w*|getting (?:better|worse)'),
+    ('schedule', r'schedules?|delay\w*|late|behind|milestones?|deadlines?'),
+    ('budget', r'budgets?|costs?|spend\w*|financ\w*|money'),
+    ('factors', r'factors?|drivers?|why|causes?|breakdown'),
+    ('summary', r'portfolio|overview|summary|summari[sz]e|all projects|how many'),
+    ('risk', r'risk\w*|scores?|status|level'),
+    ('help', r'help|what can you (?:do|tell)|hello|hi'),
+]
+PRIORITY = {name: i for i, (name, _) in enumerate(INTENTS)}
+MATCHER = re.compile('|'.join(rf'\b(?P<{name}>{pattern})\b' for name, pattern in INTENTS))
+# "project 7", "project-007", "#7", or an id-like token such as "proj_7" or "acme-42"
+PROJECT_REFERENCE = re.compile(r'\bproject[\s_-]*#?\s*0*(\d+)\b|#0*(\d+)\b')
+PROJECT_TOKEN = re.compile(r'\b[a-z][a-z0-9]*[-_][\w-]*\d[\w-]*')
+IMPROVING = re.compile(r'\b(?:improv\w*|better)\b')
+CRITICAL = re.compile(r'\bcritical\b')
+HIGH_RISK = re.compile(r'\bhigh[- ]risk\b')
+TOP_COUNT = re.compile(r'\btop (\d+)\b')
+
+FACTOR_NAMES = {
+    'financial': 'financial', 'schedule': 'schedule', 'resources': 'resourcing',
+    'technical': 'technical', 'market': 'market'
+}
+
+
+class ChatResponder:
+    """Answers chat messages from the PortfolioSummaryIndex.
+
+    Messages are matched against one precompiled pattern holding every
+    intent's keywords; results for normalized message text are kept in an
+    LRU cache, so repeated questions skip the regex entirely. Answers are
+    built from index lookups only, which keeps each one to microseconds.
+    """
+
+    def __init__(self, summary_index, intent_cache_size: int = 4096, list_limit: int = 5):
+        self.index = summary_index
+        self.list_limit = list_limit
+        self.match = lru_cache(maxsize=intent_cache_size)(self._match)
+
+    @classmethod
+    def from_settings(cls, summary_index, settings: Dict) -> 'ChatResponder':
+        """Build a responder from the `chat` config section"""
+        return cls(
+            summary_index,
+            intent_cache_size=settings.get('intent_cache_size', 4096),
+            list_limit=settings.get('list_limit', 5)
+        )
+
+    @property
+    def hits(self) -> int:
+        return self.match.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self.match.cache_info().misses
+
+    def answer(self, text: str, project_id: Optional[str] = None) -> Dict:
+        """Reply to a message, about `project_id` unless the message names a project"""
+        intent, references, improving, levels, count = self.match(' '.join(text.lower().split()))
+        for reference in references:
+            if self.index.project(reference) is not None:
+                project_id = reference
+                break
+        else:
+            if references and project_id is None:
+                return self._reply(f"I have no data for {references[0]} yet.", intent, None)
+
+        if intent == 'help':
+            return self._reply(
+                "Ask me about a project's risk, risk factors, schedule, budget, trend or anomalies, "
+                "or about the portfolio: the riskiest projects, which are deteriorating or improving, "
+                "and an overview.", intent, project_id
+            )
+        if intent == 'top_risks' and references and project_id is not None:
+            intent = 'risk'  # "is project 7 critical?"
+        if intent == 'top_risks':
+            return self._top_risks(levels, count or self.list_limit)
+        if intent == 'summary' or (intent == 'risk' and project_id is None):
+            return self._summary()
+        if project_id is None:
+            if intent == 'trend':
+                return self._portfolio_trend('improving' if improving else 'deteriorating')
+            if intent == 'anomalies':
+                return self._portfolio_anomalies()
+            return self._reply(
+                "I can answer about project risks, factors, schedule, budget, trends and anomalies. "
+                "Which project, or the whole portfolio?", 'help', None
+            )
+
+        entry = self.index.project(project_id)
+        if entry is None:
+            return self._reply(f"I have no data for {project_id} yet.", intent, project_id)
+        if intent == 'trend':
+            return self._project_trend(entry)
+        if intent == 'anomalies':
+            return self._project_anomalies(entry)
+        if entry['score'] is None:
+            return self._reply(f"{project_id} has not been scored yet.", intent, project_id)
+        if intent == 'factors':
+            return self._project_factors(entry)
+        if intent in ('schedule', 'budget'):
+            return self._project_factor(entry, 'schedule' if intent == 'schedule' else 'financial', intent)
+        return self._project_risk(entry)
+
+    def _match(self, text: str) -> Tuple[str, Tuple[str, ...], bool, Optional[Tuple[str, ...]], Optional[int]]:
+        """Intent, referenced project ids, whether improvement was asked about,
+        the risk levels asked about (None for any) and how many projects to list"""
+        found = {match.lastgroup for match in MATCHER.finditer(text)}
+        intent = min(found, key=PRIORITY.get) if found else 'help'
+        references = [
+            f"project-{int(a or b):03d}" for a, b in PROJECT_REFERENCE.findall(text)
+        ] + PROJECT_TOKEN.findall(text)
+        if CRITICAL.search(text):
+            levels = ('critical',)
+        elif HIGH_RISK.search(text):
+            levels = ('high', 'critical')
+        else:
+            levels = None
+        count = TOP_COUNT.search(text)
+        return (
+            intent, tuple(dict.fromkeys(references)), bool(IMPROVING.search(text)), levels,
+            min(int(count.group(1)), 50) if count and int(count.group(1)) else None
+        )
+
+    def _project_risk(self, entry: Dict) -> Dict:
+        factors = self._top_factors(entry)
+        text = (
+            f"{entry['project_id']} is at {entry['level']} risk with a score of {entry['score']:.2f}."
+        )
+        if factors:
+            text += " The main factors are " + ", ".join(
+                f"{FACTOR_NAMES.get(name, name)} ({value:.0%})" for name, value in factors
+            ) + "."
+        if entry['trend'] in ('improving', 'deteriorating'):
+            text += f" Its health is {entry['trend']}."
+        return self._reply(text, 'risk', entry['project_id'], {
+            'score': entry['score'], 'level': entry['level'], 'factors': entry['factors']
+        })
+
+    def _project_factors(self, entry: Dict) -> Dict:
+        ordered = sorted(entry['factors'].items(), key=lambda item: item[1], reverse=True)
+        text = f"Risk factors for {entry['project_id']}: " + ", ".join(
+            f"{FACTOR_NAMES.get(name, name)} {value:.2f}" for name, value in ordered
+        ) + f" (overall {entry['score']:.2f}, {entry['level']})."
+        return self._reply(text, 'factors', entry['project_id'], {'factors': entry['factors']})
+
+    def _project_factor(self, entry: Dict, factor: str, intent: str) -> Dict:
+        value = entry['factors'].get(factor)
+        if value is None:
+            return self._reply(f"{entry['project_id']} has no {factor} risk score.", intent, entry['project_id'])
+        level = 'high' if value >= 0.6 else 'medium' if value >= 0.4 else 'low'
+        text = f"The {FACTOR_NAMES[factor]} risk of {entry['project_id']} is {value:.2f} ({level})."
+        variance = entry['metrics'].get('schedule_variance' if factor == 'schedule' else 'budget_variance')
+        if isinstance(variance, (int, float)):
+            text += f" Its latest {intent} variance is {variance:.0%}."
+        return self._reply(text, intent, entry['project_id'], {factor: value})
+
+    def _project_trend(self, entry: Dict) -> Dict:
+        project_id = entry['project_id']
+        if entry['trend'] is None:
+            text = f"{project_id} has no status updates yet."
+        elif entry['trend'] == 'neutral':
+            text = f"{project_id} has too few updates for a trend; its health score is {entry['health_score']:.2f}."
+        else:
+            text = f"{project_id} is {entry['trend']}, with a health score of {entry['health_score']:.2f}."
+        return self._reply(text, 'trend', project_id, {
+            'trend': entry['trend'], 'health_score': entry['health_score']
+        })
+
+    def _project_anomalies(self, entry: Dict) -> Dict:
+        anomalies = entry['anomalies'] or []
+        if anomalies:
+            text = f"{entry['project_id']} has {len(anomalies)} anomal{'y' if len(anomalies) == 1 else 'ies'}: " + "; ".join(
+                f"{a.get('message', a.get('type', 'anomaly'))} ({a.get('severity', 'unknown')})" for a in anomalies
+            ) + "."
+        else:
+            text = f"No anomalies in the latest update of {entry['project_id']}."
+        return self._reply(text, 'anomalies', entry['project_id'], {'anomalies': anomalies})
+
+    def _top_risks(self, levels: Optional[Tuple[str, ...]], count: int) -> Dict:
+        entries = self.index.top_risks(count, levels)
+        if not entries or entries[0]['score'] is None:
+            scope = ' at that level' if levels else ''
+            return self._reply(f"No scored projects{scope} yet.", 'top_risks', None, {'projects': []})
+        text = "Riskiest projects: " + self._list(entries) + "."
+        return self._reply(text, 'top_risks', None, {'projects': [self._brief(e) for e in entries]})
+
+    def _portfolio_trend(self, trend: str) -> Dict:
+        count, entries = self.index.with_trend(trend, self.list_limit)
+        if not count:
+            text = f"No projects are {trend}."
+        else:
+            text = f"{count} project{'s are' if count != 1 else ' is'} {trend}: {self._list(entries)}"
+            text += "." if count <= len(entries) else f", and {count - len(entries)} more."
+        return self._reply(text, 'trend', None, {
+            'trend': trend, 'count': count, 'projects': [self._brief(e) for e in entries]
+        })
+
+    def _portfolio_anomalies(self) -> Dict:
+        count, entries = self.index.with_anomalies(self.list_limit)
+        if not count:
+            text = "No project's latest update raised anomalies."
+        else:
+            text = f"{count} project{'s have' if count != 1 else ' has'} anomalies: {self._list(entries)}"
+            text += "." if count <= len(entries) else f", and {count - len(entries)} more."
+        return self._reply(text, 'anomalies', None, {
+            'count': count, 'projects': [self._brief(e) for e in entries]
+        })
+
+    def _summary(self) -> Dict:
+        summary = self.index.summary()
+        if not summary['projects']:
+            return self._reply("No projects have reported yet.", 'summary', None, summary)
+        text = f"Tracking {summary['projects']} project{'s' if summary['projects'] != 1 else ''}"
+        if summary['scored']:
+            levels = ", ".join(
+                f"{summary['levels'][level]} {level}" for level in reversed(list(summary['levels']))
+                if summary['levels'][level]
+            )
+            text += f": {levels} risk; mean score {summary['mean_score']:.2f}"
+        text += "."
+        trends = summary['trends']
+        if trends.get('deteriorating') or trends.get('improving'):
+            text += f" {trends.get('deteriorating', 0)} deteriorating, {trends.get('improving', 0)} improving."
+        if summary['anomalous']:
+            text += f" {summary['anomalous']} with anomalies."
+        return self._reply(text, 'summary', None, summary)
+
+    def _top_factors(self, entry: Dict) -> List[Tuple[str, float]]:
+        factors = sorted(entry['factors'].items(), key=lambda item: item[1], reverse=True)
+        return [(name, value) for name, value in factors[:2] if value > 0]
+
+    def _list(self, entries: List[Dict]) -> str:
+        return ", ".join(
+            f"{e['project_id']} ({e['score']:.2f} {e['level']})" if e['score'] is not None else e['project_id']
+            for e in entries
+        )
+
+    def _brief(self, entry: Dict) -> Dict:
+        return {key: entry[key] for key in ('project_id', 'score', 'level', 'trend', 'health_score')}
+
+    def _reply(self, text: str, intent: str, project_id: Optional[str], data: Optional[Dict] = None) -> Dict:
+        return {'response': text, 'intent': intent, 'project_id': project_id, 'data': data or {}}
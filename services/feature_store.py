@@ -0,0 +1,139 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+
+class FeatureStore:
+    """Cached risk feature vectors joining project metrics with market signals.
+
+    A project's vector holds the factor scores RiskScoringAgent derives from
+    its latest metrics, plus the market risk of the project's sector when a
+    market snapshot is known. Inputs are versioned: update_metrics() bumps
+    the project's version and update_market() bumps the market version only
+    if the per-sector market risk actually changed. A cached vector is
+    served while both versions it was built from are current, so lookups
+    are a dict read and a tuple compare.
+
+    Projects this process has not seen are loaded through `metrics_loader`
+    (e.g. from shared project history) on first lookup.
+    """
+
+    def __init__(self, risk_agent, metrics_loader: Optional[Callable[[str], Dict]] = None,
+                 sector_weight: float = 0.5, default_sector: Optional[str] = None,
+                 sectors: Optional[Dict[str, str]] = None):
+        self.risk_agent = risk_agent
+        self.metrics_loader = metrics_loader
+        self.sector_weight = sector_weight
+        self.default_sector = default_sector
+        self.hits = 0
+        self.misses = 0
+        self._metrics = {}        # project_id -> latest metrics
+        self._versions = {}       # project_id -> metrics version
+        self._sectors = dict(sectors or {})  # project_id -> sector
+        self._vectors = {}        # project_id -> (metrics version, market version, features)
+        self._market_version = 0
+        self._market_risk = None  # {'sectors': {sector: risk}, 'macro': risk}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, risk_agent, settings: Dict,
+                      metrics_loader: Optional[Callable[[str], Dict]] = None) -> 'FeatureStore':
+        """Build a store from the `market_risk` config section"""
+        return cls(
+            risk_agent,
+            metrics_loader=metrics_loader,
+            sector_weight=settings.get('sector_weight', 0.5),
+            default_sector=settings.get('default_sector'),
+            sectors=settings.get('project_sectors')
+        )
+
+    def set_sector(self, project_id: str, sector: Optional[str]) -> None:
+        with self._lock:
+            if self._sectors.get(project_id) != sector:
+                self._sectors[project_id] = sector
+                self._vectors.pop(project_id, None)
+
+    def update_metrics(self, project_id: str, metrics: Dict) -> None:
+        with self._lock:
+            self._metrics[project_id] = metrics
+            self._versions[project_id] = self._versions.get(project_id, 0) + 1
+
+    def update_metrics_many(self, updates: List[Tuple[str, Dict]]) -> None:
+        with self._lock:
+            for project_id, metrics in updates:
+                self._metrics[project_id] = metrics
+                self._versions[project_id] = self._versions.get(project_id, 0) + 1
+
+    def update_market(self, snapshot: Optional[Dict]) -> bool:
+        """Take a new market snapshot; True if it changed any project's market risk"""
+        if not snapshot:
+            return False
+        volatility = snapshot.get('market_volatility', 0.0)
+        outlook = snapshot.get('economic_outlook', 0.5)
+        market_risk = {
+            'macro': (volatility + (1 - outlook)) / 2,
+            'sectors': dict(snapshot.get('sector_risks') or {})
+        }
+        with self._lock:
+            if market_risk == self._market_risk:
+                return False
+            self._market_risk = market_risk
+            self._market_version += 1
+            return True
+
+    def market_risk(self, sector: Optional[str]) -> Optional[float]:
+        """Market risk of a sector: its news risk blended with macro risk"""
+        market = self._market_risk
+        if market is None:
+            return None
+        sector_risk = market['sectors'].get(sector, market['macro'])
+        return min(1.0, self.sector_weight * sector_risk + (1 - self.sector_weight) * market['macro'])
+
+    def version(self, project_id: str) -> Tuple[int, int]:
+        """Versions of the inputs behind a project's current features"""
+        return self._versions.get(project_id, 0), self._market_version
+
+    def get(self, project_id: str) -> Optional[Dict[str, float]]:
+        """Feature vector of a project, or None if it has no metrics"""
+        entry = self._vectors.get(project_id)
+        if (entry is not None and entry[0] == self._versions.get(project_id)
+                and entry[1] == self._market_version):
+            self.hits += 1
+            return entry[2]
+
+        self.misses += 1
+        with self._lock:
+            metrics = self._metrics.get(project_id)
+        if metrics is None:
+            if self.metrics_loader is None:
+                return None
+            metrics = self.metrics_loader(project_id)
+            if not metrics:
+                return None
+            self.update_metrics(project_id, metrics)
+
+        with self._lock:
+            metrics_version, market_version = self.version(project_id)
+            sector = self._sectors.get(project_id, self.default_sector)
+            market_risk = self.market_risk(sector)
+        data = metrics if market_risk is None else dict(metrics, market_risk=market_risk)
+        features = self.risk_agent.assess_features(data)
+        self._vectors[project_id] = (metrics_version, market_version, features)
+        return features
+
+    def market_risks(self, project_ids: List[str]) -> List[float]:
+        """Market risk of each project's sector, NaN when there is no snapshot"""
+        with self._lock:
+            return [
+                self.market_risk(self._sectors.get(project_id, self.default_sector))
+                if self._market_risk is not None else float('nan')
+                for project_id in project_ids
+            ]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._vectors),
+            'market_version': self._market_version
+        }
@@ -0,0 +1,111 @@
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from utils.cache import TTLCache
+from utils.metrics import REGISTRY
+
+# Status codes worth retrying; anything else that is not a 200 fails fast
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+FETCH_SECONDS = REGISTRY.histogram(
+    'upstream_fetch_duration_seconds', 'Latency of upstream HTTP requests, per attempt', ['source']
+)
+FETCH_ERRORS = REGISTRY.counter(
+    'upstream_fetch_errors_total', 'Failed upstream HTTP attempts', ['source', 'reason']
+)
+
+class AsyncFetcher:
+    """Non-blocking JSON fetcher for upstream data sources.
+
+    Requests run on a dedicated thread pool over one pooled requests.Session,
+    so the event loop never blocks. Each source gets its own timeout, failed
+    calls are retried with exponential backoff and successful responses are
+    cached for `cache_ttl` seconds. Concurrent callers asking for the same
+    URL share a single in-flight request.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 5.0, retries: int = 2,
+                 backoff: float = 0.5, cache_ttl: float = 300,
+                 source_timeouts: Optional[Dict[str, float]] = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.source_timeouts = source_timeouts or {}
+        self.cache = TTLCache(cache_ttl)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='fetcher')
+        self._inflight = {}
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'AsyncFetcher':
+        """Build a fetcher from the `market_data` config section"""
+        return cls(
+            pool_size=settings.get('pool_size', 10),
+            timeout=settings.get('timeout', 5.0),
+            retries=settings.get('retries', 2),
+            backoff=settings.get('backoff', 0.5),
+            cache_ttl=settings.get('cache_ttl', 300),
+            source_timeouts=settings.get('timeouts')
+        )
+
+    async def fetch_json(self, source: str, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Fetch and decode a JSON document, or return None if the source failed"""
+        params = params or {}
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._fetch_with_retry(source, url, params))
+        self._inflight[key] = task
+        try:
+            data = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(key, None)
+        if data is not None:
+            self.cache.set(key, data)
+        return data
+
+    async def _fetch_with_retry(self, source: str, url: str, params: Dict) -> Optional[Dict]:
+        loop = asyncio.get_running_loop()
+        timeout = self.source_timeouts.get(source, self.timeout)
+        request = partial(self.session.get, url, params=params, timeout=timeout)
+
+        latency = FETCH_SECONDS.labels(source)
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await loop.run_in_executor(self._executor, request)
+                latency.observe(time.perf_counter() - started)
+                if response.status_code == 200:
+                    return response.json()
+                FETCH_ERRORS.inc(1, source, str(response.status_code))
+                if response.status_code not in RETRYABLE_STATUS:
+                    print(f"Fetch from {source} failed with status {response.status_code}")
+                    return None
+                error = f"status {response.status_code}"
+            except (requests.RequestException, ValueError) as e:
+                FETCH_ERRORS.inc(1, source, type(e).__name__)
+                error = str(e)
+
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+        print(f"Fetch from {source} failed after {self.retries + 1} attempts: {error}")
+        return None
+
+    def close(self) -> None:
+        """Release pooled connections and worker threads"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,221 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import csv
+import json
+import time
+from math import isfinite
+from agents.risk_scoring import INPUT_METRICS
+
+def _reject_constant(name: str):
+    raise ValueError(f"{name} is not a valid metric value")
+
+# Shared by every line: json.loads builds a new decoder per call when given parse_constant
+_ndjson_decoder = json.JSONDecoder(parse_constant=_reject_constant)
+
+class IngestionPipeline:
+    """Incremental NDJSON/CSV metrics ingestion in micro-batches.
+
+    The request body is consumed chunk by chunk, so memory is bounded by the
+    batch size rather than the body size. Each row needs a `project_id`;
+    every other field must be numeric and becomes a metric. Valid rows are
+    grouped into batches of `batch_size` and pushed through
+    ProjectTrackingAgent.update_project_statuses and
+    RiskScoringAgent.calculate_portfolio_risk off the event loop. The latest
+    risk of every project in a batch is handed to `on_scored`, a function
+    or coroutine function, as one {project_id: risk_data} dict. With a
+    FeatureStore, the batch's metrics are recorded in it and each project's
+    sector market risk is scored alongside its metrics. With a
+    PortfolioSummaryIndex, each project's latest status in the batch is
+    recorded in it with its anomalies.
+    """
+
+    FORMATS = ('ndjson', 'csv')
+    MAX_LINE_BYTES = 1 << 20
+
+    def __init__(self, project_agent, risk_agent,
+                 on_scored: Optional[Callable[[Dict[str, Dict]], Any]] = None,
+                 batch_size: int = 5000, max_errors: int = 20, feature_store=None,
+                 summary_index=None):
+        self.project_agent = project_agent
+        self.risk_agent = risk_agent
+        self.feature_store = feature_store
+        self.summary_index = summary_index
+        self.on_scored = on_scored
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+
+    async def ingest(self, chunks: AsyncIterator[bytes], fmt: str = 'ndjson') -> Dict:
+        """Consume a body stream and return per-batch and overall statistics"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported ingestion format: {fmt}")
+        started = time.perf_counter()
+        stats = {'rows': 0, 'accepted': 0, 'rejected': 0, 'batches': [], 'errors': []}
+        batch = []
+        batch_rejected = 0
+        batch_started = time.perf_counter()
+        header = None
+
+        async for numbers, lines in self._line_chunks(chunks):
+            if fmt == 'csv' and header is None:
+                header = next(csv.reader([lines[0]]))
+                numbers, lines = numbers[1:], lines[1:]
+            stats['rows'] += len(lines)
+            for line_number, row in zip(numbers, self._parse(fmt, header, lines)):
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    batch.append(self._validate(row))
+                except (ValueError, TypeError) as e:
+                    stats['rejected'] += 1
+                    batch_rejected += 1
+                    if len(stats['errors']) < self.max_errors:
+                        stats['errors'].append({'line': line_number, 'error': str(e)})
+                    continue
+
+                if len(batch) >= self.batch_size:
+                    await self._process_batch(batch, batch_rejected, batch_started, stats)
+                    batch, batch_rejected, batch_started = [], 0, time.perf_counter()
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+
+        if batch or batch_rejected:
+            await self._process_batch(batch, batch_rejected, batch_started, stats)
+        if self.summary_index is not None and stats['accepted']:
+            # Re-sort the index's rankings here, not in the next question's read on the event loop
+            await asyncio.to_thread(self.summary_index.rerank)
+
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = elapsed
+        stats['rows_per_sec'] = stats['rows'] / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    async def _process_batch(self, batch: List[Tuple[str, Dict]], rejected: int,
+                             started: float, stats: Dict) -> None:
+        if batch:
+            # Scoring takes a while for large batches; keep the event loop serving other requests
+            scored = await asyncio.to_thread(self._score_batch, batch)
+            if asyncio.iscoroutinefunction(self.on_scored):
+                await self.on_scored(scored)
+            elif self.on_scored is not None:
+                self.on_scored(scored)
+
+        elapsed = time.perf_counter() - started
+        rows = len(batch) + rejected
+        stats['accepted'] += len(batch)
+        stats['batches'].append({
+            'rows': rows,
+            'accepted': len(batch),
+            'rejected': rejected,
+            'rows_per_sec': rows / elapsed if elapsed > 0 else 0.0
+        })
+
+    def _score_batch(self, batch: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        """Apply a batch of updates and return the latest risk of every project in it"""
+        statuses = self.project_agent.update_project_statuses(batch)
+        if self.summary_index is not None:
+            # Only the newest status per project is current
+            latest = {project_id: status for (project_id, _), status in zip(batch, statuses)}
+            self.summary_index.record_statuses(
+                (project_id, status, self.project_agent.detect_anomalies(project_id, status))
+                for project_id, status in latest.items()
+            )
+        columns = {
+            name: [metrics.get(name, 0) for _, metrics in batch]
+            for name in self._input_metrics(batch)
+        }
+        if self.feature_store is not None:
+            self.feature_store.update_metrics_many(batch)
+            columns['market_risk'] = self.feature_store.market_risks(
+                [project_id for project_id, _ in batch]
+            )
+        results = self.risk_agent.calculate_portfolio_risk(columns)
+        scores = results['score'].tolist()
+        levels = results['level'].tolist()
+        factors = {
+            factor: values.tolist() for factor, values in results['factors'].items()
+        }
+        # Only the newest row per project is the project's current risk
+        latest = {project_id: i for i, (project_id, _) in enumerate(batch)}
+        return {
+            project_id: {
+                'score': scores[i],
+                'level': levels[i],
+                'factors': {factor: values[i] for factor, values in factors.items()},
+                'timestamp': results['timestamp']
+            }
+            for project_id, i in latest.items()
+        }
+
+    def _input_metrics(self, batch: List[Tuple[str, Dict]]) -> List[str]:
+        """Risk model inputs present anywhere in the batch"""
+        present = set()
+        for _, metrics in batch:
+            present.update(metrics)
+        return [name for name in INPUT_METRICS if name in present]
+
+    def _validate(self, row) -> Tuple[str, Dict]:
+        """Split a parsed row into its project id and numeric metrics"""
+        if type(row) is not dict:
+            raise ValueError("row must be an object")
+        project_id = row.pop('project_id', None)
+        if type(project_id) is not str or not project_id:
+            raise ValueError("missing project_id")
+        for name, value in row.items():
+            kind = type(value)
+            if kind is float:
+                if not isfinite(value):
+                    raise ValueError(f"metric {name!r} is not finite")
+            elif kind is not int:
+                raise ValueError(f"metric {name!r} is not numeric")
+        return project_id, row
+
+    def _parse(self, fmt: str, header: Optional[List[str]], lines: List[str]) -> List:
+        """Parse lines into row dicts, or the exception raised for a bad line"""
+        if fmt == 'ndjson':
+            # Every line is decoded on its own, so a bad line cannot merge with its neighbours
+            parse = _ndjson_decoder.decode
+        else:
+            parse = lambda line: self._parse_csv_row(header, line)
+
+        rows = []
+        for line in lines:
+            try:
+                rows.append(parse(line))
+            except (ValueError, TypeError) as e:
+                rows.append(e)
+        return rows
+
+    def _parse_csv_row(self, header: List[str], line: str) -> Dict:
+        values = next(csv.reader([line]))
+        if len(values) != len(header):
+            raise ValueError(f"expected {len(header)} fields, got {len(values)}")
+        row = {}
+        for name, value in zip(header, values):
+            if name == 'project_id':
+                row[name] = value
+            elif value != '':
+                row[name] = float(value)
+        return row
+
+    async def _line_chunks(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[List[int], List[str]]]:
+        """Split a byte stream into lists of non-empty decoded lines, one per chunk"""
+        buffer = b''
+        line_number = 0
+        async for chunk in chunks:
+            buffer += chunk
+            raw_lines = buffer.split(b'\n')
+            buffer = raw_lines.pop()
+            if len(buffer) > self.MAX_LINE_BYTES:
+                raise ValueError(f"line {line_number + len(raw_lines) + 1} exceeds {self.MAX_LINE_BYTES} bytes")
+            numbers, lines = [], []
+            for raw in raw_lines:
+                line_number += 1
+                line = raw.decode('utf-8', errors='replace').strip()
+                if line:
+                    numbers.append(line_number)
+                    lines.append(line)
+            if lines:
+                yield numbers, lines
+        line = buffer.decode('utf-8', errors='replace').strip()
+        if line:
+            yield [line_number + 1], [line]
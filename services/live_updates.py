@@ -0,0 +1,130 @@
+from typing import AsyncIterator, Dict, Optional
+from collections import defaultdict
+import asyncio
+import json
+
+class LiveUpdateHub:
+    """Fans risk deltas and alerts out to every subscriber of a project.
+
+    Each assessment is published once and delivered to all viewers of the
+    project, so the number of viewers never multiplies scoring work. Slow
+    subscribers have bounded queues and lose their oldest events first.
+
+    With a shared StateStore, start() also polls it for assessments made by
+    other worker processes and relays them to this process's subscribers.
+    """
+
+    def __init__(self, queue_size: int = 100, keepalive: float = 15.0,
+                 sync_interval: float = 1.0):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.sync_interval = sync_interval
+        self._subscribers = defaultdict(set)  # project_id -> {asyncio.Queue}
+        self._latest = {}  # project_id -> last published risk data
+        self._task = None
+
+    async def start(self, state_store=None) -> None:
+        """Relay risk assessments written to a shared store by other workers"""
+        if state_store is None or not state_store.shared or self._task is not None:
+            return
+        version, current = await asyncio.to_thread(state_store.changes_since, 'risk', 0)
+        for project_id, risk_data in current.items():
+            self._latest.setdefault(project_id, risk_data)
+        self._task = asyncio.create_task(self._sync(state_store, version))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sync(self, state_store, version: int) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                version, changes = await asyncio.to_thread(
+                    state_store.changes_since, 'risk', version
+                )
+            except Exception as e:
+                print(f"Live update sync error: {str(e)}")
+                continue
+            # Assessments made in this process come back unchanged and publish nothing
+            for project_id, risk_data in changes.items():
+                self.publish_risk(project_id, risk_data)
+
+    def subscribe(self, project_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[project_id].add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(project_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[project_id]
+
+    def subscriber_count(self, project_id: Optional[str] = None) -> int:
+        if project_id is not None:
+            return len(self._subscribers.get(project_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def queued_events(self) -> int:
+        """Events waiting in subscriber queues"""
+        return sum(queue.qsize() for queues in self._subscribers.values() for queue in queues)
+
+    def latest(self, project_id: str) -> Optional[Dict]:
+        return self._latest.get(project_id)
+
+    def publish_risk(self, project_id: str, risk_data: Dict) -> Optional[Dict]:
+        """Publish what changed since the last assessment; None if nothing did"""
+        previous = self._latest.get(project_id)
+        self._latest[project_id] = risk_data
+        if previous is None:
+            delta = {key: risk_data[key] for key in ('score', 'level', 'factors')}
+        else:
+            delta = {
+                key: risk_data[key] for key in ('score', 'level')
+                if risk_data[key] != previous.get(key)
+            }
+            factors = {
+                factor: score for factor, score in risk_data['factors'].items()
+                if score != previous['factors'].get(factor)
+            }
+            if factors:
+                delta['factors'] = factors
+            if not delta:
+                return None
+        delta['timestamp'] = risk_data.get('timestamp')
+        self.publish(project_id, 'risk', delta)
+        return delta
+
+    def publish_alert(self, project_id: str, alert: Dict) -> None:
+        self.publish(project_id, 'alert', alert)
+
+    def publish(self, project_id: str, event: str, data: Dict) -> None:
+        message = (event, data)
+        for queue in self._subscribers.get(project_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def stream(self, project_id: str) -> AsyncIterator[str]:
+        """Server-sent events for one subscriber, starting with a full snapshot"""
+        queue = self.subscribe(project_id)
+        try:
+            latest = self._latest.get(project_id)
+            if latest is not None:
+                yield self._format('snapshot', latest)
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield self._format(event, data)
+        finally:
+            self.unsubscribe(project_id, queue)
+
+    def _format(self, event: str, data: Dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
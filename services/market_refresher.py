@@ -0,0 +1,162 @@
+from typing import Callable, Dict, Optional
+from datetime import datetime
+import asyncio
+import time
+
+class MarketDataRefresher:
+    """Keeps an in-memory snapshot of market indicators fresh in the background.
+
+    A scheduler task calls MarketAnalysisAgent.analyze_market_trends every
+    `interval` seconds. Readers get the latest snapshot immediately, tagged
+    with its age. A snapshot older than `max_age` is stale: with
+    stale_while_revalidate on, readers still get it at once while a refresh
+    runs in the background; otherwise they wait for fresh data. At most
+    `max_concurrent_refreshes` refreshes run at any time.
+
+    With a shared StateStore, snapshots are published to it and adopted
+    from it, so worker processes skip refreshes another worker just made.
+    Every newly taken snapshot is passed to `on_update`. A refresh in which
+    the agent could read no source (it returns None) leaves the current
+    snapshot in place.
+    """
+
+    def __init__(self, market_agent, interval: float = 300, max_age: float = 600,
+                 stale_while_revalidate: bool = True, max_concurrent_refreshes: int = 1,
+                 clock=time.time, state_store=None,
+                 on_update: Optional[Callable[[Dict], None]] = None):
+        self.market_agent = market_agent
+        self.state = state_store
+        self.on_update = on_update
+        self.interval = interval
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_concurrent_refreshes = max_concurrent_refreshes
+        self.clock = clock
+        self._data = None
+        self._fetched_at = None
+        self._refreshing = set()
+        self._task = None
+
+    @classmethod
+    def from_settings(cls, market_agent, settings: Dict,
+                      state_store=None,
+                      on_update: Optional[Callable[[Dict], None]] = None) -> 'MarketDataRefresher':
+        """Build a refresher from the `market_data` config section"""
+        return cls(
+            market_agent,
+            interval=settings.get('refresh_interval', 300),
+            max_age=settings.get('max_age', 600),
+            stale_while_revalidate=settings.get('stale_while_revalidate', True),
+            max_concurrent_refreshes=settings.get('max_concurrent_refreshes', 1),
+            state_store=state_store,
+            on_update=on_update
+        )
+
+    async def start(self) -> None:
+        """Start the periodic refresh task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the refresh task and any refresh still in flight"""
+        tasks = list(self._refreshing)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict:
+        """Latest market data with staleness metadata, without any network I/O"""
+        self._adopt_shared()
+        age = self.clock() - self._fetched_at if self._fetched_at is not None else None
+        return {
+            'data': self._data,
+            'fetched_at': (
+                datetime.fromtimestamp(self._fetched_at).isoformat()
+                if self._fetched_at is not None else None
+            ),
+            'age_seconds': age,
+            'stale': age is None or age > self.max_age,
+            'refreshing': bool(self._refreshing)
+        }
+
+    async def get(self) -> Dict:
+        """Snapshot for a reader, revalidating it first if it is stale"""
+        snapshot = self.snapshot()
+        if not snapshot['stale']:
+            return snapshot
+
+        task = self._schedule_refresh()
+        if self._data is not None and self.stale_while_revalidate:
+            return snapshot
+        if task is None and self._refreshing:
+            task = next(iter(self._refreshing))
+        if task is not None:
+            await asyncio.shield(task)
+        return self.snapshot()
+
+    async def refresh(self) -> Optional[Dict]:
+        """Refresh now (subject to the concurrency cap) and wait for the result"""
+        task = self._schedule_refresh()
+        if task is not None:
+            await task
+        return self._data
+
+    def _schedule_refresh(self) -> Optional[asyncio.Task]:
+        if len(self._refreshing) >= self.max_concurrent_refreshes:
+            return None
+        task = asyncio.create_task(self._refresh_once())
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+        return task
+
+    async def _refresh_once(self) -> None:
+        started_at = self.clock()
+        try:
+            data = await self.market_agent.analyze_market_trends()
+        except Exception as e:
+            print(f"Market data refresh failed: {str(e)}")
+            return
+        if data is None:
+            # No source could be read; the previous snapshot is kept and ages normally
+            return
+        # A slower refresh must not overwrite newer data
+        if self._fetched_at is None or started_at >= self._fetched_at:
+            self._data = data
+            self._fetched_at = started_at
+            if self.state is not None:
+                self.state.set('market', 'snapshot', {'data': data, 'fetched_at': started_at})
+            self._notify()
+
+    def _adopt_shared(self) -> None:
+        """Take over a newer snapshot published by another worker"""
+        if self.state is None:
+            return
+        shared = self.state.get('market', 'snapshot')
+        if shared is not None and (self._fetched_at is None or shared['fetched_at'] > self._fetched_at):
+            self._data = shared['data']
+            self._fetched_at = shared['fetched_at']
+            self._notify()
+
+    def _notify(self) -> None:
+        if self.on_update is not None and self._data is not None:
+            self.on_update(self._data)
+
+    def _refreshed_elsewhere(self) -> bool:
+        """Whether another worker published a snapshot within the last interval"""
+        if self.state is None or not self.state.shared:
+            return False
+        self._adopt_shared()
+        return self._fetched_at is not None and self.clock() - self._fetched_at < self.interval
+
+    async def _run(self) -> None:
+        while True:
+            if self._refreshed_elsewhere():
+                task = None
+            else:
+                task = self._schedule_refresh()
+            if task is not None:
+                await asyncio.gather(task, return_exceptions=True)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,270 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from agents.risk_scoring import INPUT_METRICS, RiskScoringAgent
+from storage.history import TRENDS
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Latest metrics checked by ProjectTrackingAgent.detect_anomalies; its statistical
+# anomalies come from the agent's detectors, see PortfolioJobRunner.run
+ANOMALY_RULES = [
+    # (metric, threshold, anomaly type, severity, message)
+    ('schedule_variance', 0.2, 'schedule', 'high', 'Significant schedule variance detected'),
+    ('resource_changes', 0.3, 'resources', 'medium', 'High resource turnover detected')
+]
+# Market risk of each project's sector is packed after the risk inputs; NaN when unknown
+METRIC_COLUMNS = INPUT_METRICS + ['market_risk'] + [metric for metric, *_ in ANOMALY_RULES]
+FACTORS = ['financial', 'schedule', 'resources', 'technical']
+LEVELS = ['low', 'medium', 'high', 'critical']
+
+# Output columns written by the workers, all float64
+OUTPUT_COLUMNS = (
+    ['score', 'level', 'slope', 'trend']
+    + FACTORS + ['market']
+    + [f'anomaly_{metric}' for metric, *_ in ANOMALY_RULES]
+)
+
+
+class _SharedArray:
+    """A NumPy array backed by a named shared memory block"""
+
+    def __init__(self, shape: Tuple[int, ...], name: str = None):
+        size = max(int(np.prod(shape)) * 8, 1)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.array = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+
+    def close(self, unlink: bool = False) -> None:
+        del self.array
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _run_shard(inputs_name: str, scores_name: str, outputs_name: str, shape: Dict,
+               start: int, stop: int, risk_agent: RiskScoringAgent, settings: Dict) -> int:
+    """Worker entry point: score rows [start, stop) in place in shared memory.
+
+    `risk_agent` is a copy of the parent's, scoring backend included, so
+    workers score exactly as the per-project path does.
+    """
+    inputs = _SharedArray(shape['inputs'], inputs_name)
+    scores = _SharedArray(shape['scores'], scores_name)
+    outputs = _SharedArray(shape['outputs'], outputs_name)
+    try:
+        _score_rows(
+            inputs.array[start:stop], scores.array[start:stop],
+            outputs.array[start:stop], risk_agent, settings
+        )
+    finally:
+        inputs.close()
+        scores.close()
+        outputs.close()
+    return stop - start
+
+
+def _score_rows(inputs: np.ndarray, scores: np.ndarray, outputs: np.ndarray,
+                risk_agent: RiskScoringAgent, settings: Dict) -> None:
+    """Risk, trend and anomaly flags for a block of projects.
+
+    Every row is computed independently, so results do not depend on how
+    the portfolio was sharded.
+    """
+    column = {name: i for i, name in enumerate(OUTPUT_COLUMNS)}
+
+    risk = risk_agent.calculate_portfolio_risk({
+        metric: inputs[:, i] for i, metric in enumerate(METRIC_COLUMNS[:len(INPUT_METRICS) + 1])
+    })
+    outputs[:, column['score']] = risk['score']
+    for code, level in enumerate(LEVELS):
+        outputs[risk['level'] == level, column['level']] = code
+    for factor in FACTORS:
+        outputs[:, column[factor]] = risk['factors'][factor]
+    # Only blended into the score, and reported, when the agent weights market risk
+    outputs[:, column['market']] = risk['factors'].get('market', np.nan)
+
+    # Least-squares slope over each row's window; NaN marks unused slots
+    valid = ~np.isnan(scores)
+    counts = valid.sum(axis=1)
+    x = np.cumsum(valid, axis=1) - 1.0
+    y = np.where(valid, scores, 0.0)
+    x = np.where(valid, x, 0.0)
+    n = counts.astype(np.float64)
+    sum_x = x.sum(axis=1)
+    sum_y = y.sum(axis=1)
+    denominator = n * (x * x).sum(axis=1) - sum_x * sum_x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(
+            denominator > 0,
+            (n * (x * y).sum(axis=1) - sum_x * sum_y) / denominator,
+            np.nan
+        )
+    trend = np.select(
+        [slope > settings['improving_slope'], slope < settings['deteriorating_slope']],
+        [TRENDS.index('improving'), TRENDS.index('deteriorating')],
+        default=TRENDS.index('stable')
+    )
+    trend = np.where(counts - 1 < settings['min_history'], TRENDS.index('neutral'), trend)
+    outputs[:, column['slope']] = slope
+    outputs[:, column['trend']] = trend
+
+    offset = len(INPUT_METRICS) + 1
+    for i, (metric, threshold, *_) in enumerate(ANOMALY_RULES):
+        outputs[:, column[f'anomaly_{metric}']] = inputs[:, offset + i] > threshold
+
+
+class PortfolioJobRunner:
+    """Rescores a whole portfolio across a pool of worker processes.
+
+    Latest metrics and recent health scores are packed into shared memory
+    arrays once; workers attach to them by name and write results into a
+    shared output array, so no per-project dicts are pickled. Projects are
+    split into contiguous shards and results are merged back in input order.
+
+    Workers score with a copy of `risk_agent`, and with a FeatureStore each
+    project's sector market risk is scored alongside its metrics, so results
+    match the per-project /risk path.
+
+    Statistical anomalies need each project's metric history, so the parent
+    finds them shard by shard with the tracking agent's detectors while the
+    workers score.
+    """
+
+    def __init__(self, project_agent, risk_agent, workers: int = 4,
+                 shard_size: int = 10000, progress: Optional[Callable[[int, int], None]] = None,
+                 feature_store=None):
+        self.project_agent = project_agent
+        self.risk_agent = risk_agent
+        self.feature_store = feature_store
+        self.workers = workers
+        self.shard_size = shard_size
+        self.progress = progress
+
+    @classmethod
+    def from_settings(cls, project_agent, risk_agent, settings: Dict,
+                      progress: Optional[Callable[[int, int], None]] = None,
+                      feature_store=None) -> 'PortfolioJobRunner':
+        """Build a runner from the `portfolio_jobs` config section"""
+        return cls(
+            project_agent,
+            risk_agent,
+            workers=settings.get('workers', 4),
+            shard_size=settings.get('shard_size', 10000),
+            progress=progress,
+            feature_store=feature_store
+        )
+
+    def run(self, project_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Rescore projects (all tracked ones by default) and return results by id"""
+        if project_ids is None:
+            project_ids = sorted(self.project_agent.history.project_ids())
+        total = len(project_ids)
+        window = self.project_agent.trend_window
+        shape = {
+            'inputs': (total, len(METRIC_COLUMNS)),
+            'scores': (total, window),
+            'outputs': (total, len(OUTPUT_COLUMNS))
+        }
+        inputs = _SharedArray(shape['inputs'])
+        scores = _SharedArray(shape['scores'])
+        outputs = _SharedArray(shape['outputs'])
+        try:
+            self._pack(project_ids, inputs.array, scores.array)
+            settings = {
+                'improving_slope': self.project_agent.improving_slope,
+                'deteriorating_slope': self.project_agent.deteriorating_slope,
+                'min_history': self.project_agent.trend_min_history
+            }
+            shards = [
+                (start, min(start + self.shard_size, total))
+                for start in range(0, total, self.shard_size)
+            ]
+            names = (inputs.shm.name, scores.shm.name, outputs.shm.name)
+
+            done = 0
+            anomalies = {}
+            if self.workers <= 1 or len(shards) <= 1:
+                for start, stop in shards:
+                    done += _run_shard(*names, shape, start, stop, self.risk_agent, settings)
+                    anomalies.update(self.project_agent.latest_anomalies(project_ids[start:stop]))
+                    self._report(done, total)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    futures = [
+                        pool.submit(_run_shard, *names, shape, start, stop, self.risk_agent, settings)
+                        for start, stop in shards
+                    ]
+                    for start, stop in shards:
+                        anomalies.update(self.project_agent.latest_anomalies(project_ids[start:stop]))
+                    for future in as_completed(futures):
+                        done += future.result()
+                        self._report(done, total)
+
+            return self._merge(project_ids, outputs.array, anomalies)
+        finally:
+            inputs.close(unlink=True)
+            scores.close(unlink=True)
+            outputs.close(unlink=True)
+
+    def _report(self, done: int, total: int) -> None:
+        if self.progress is not None:
+            self.progress(done, total)
+
+    def _pack(self, project_ids: List[str], inputs: np.ndarray, scores: np.ndarray) -> None:
+        history = self.project_agent.history
+        window = scores.shape[1]
+        inputs[:] = 0.0
+        scores[:] = np.nan
+        for row, project_id in enumerate(project_ids):
+            metrics = history.latest(project_id).get('metrics', {})
+            inputs[row] = [metrics.get(metric, 0) for metric in METRIC_COLUMNS]
+            recent = history.recent_scores(project_id, window)
+            scores[row, :len(recent)] = recent
+        market = METRIC_COLUMNS.index('market_risk')
+        if self.feature_store is not None:
+            inputs[:, market] = self.feature_store.market_risks(project_ids)
+        else:
+            inputs[:, market] = np.nan
+
+    def _merge(self, project_ids: List[str], outputs: np.ndarray,
+               statistical: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+        column = {name: i for i, name in enumerate(OUTPUT_COLUMNS)}
+        columns = {name: outputs[:, i].tolist() for name, i in column.items()}
+        results = {}
+        for row, project_id in enumerate(project_ids):
+            anomalies = [
+                {'type': anomaly_type, 'severity': severity, 'message': message}
+                for metric, _, anomaly_type, severity, message in ANOMALY_RULES
+                if columns[f'anomaly_{metric}'][row]
+            ] + statistical.get(project_id, [])
+            slope = columns['slope'][row]
+            factors = {factor: columns[factor][row] for factor in FACTORS}
+            if not np.isnan(columns['market'][row]):
+                factors['market'] = columns['market'][row]
+            results[project_id] = {
+                'risk': {
+                    'score': columns['score'][row],
+                    'level': LEVELS[int(columns['level'][row])],
+                    'factors': factors
+                },
+                'trend': TRENDS[int(columns['trend'][row])],
+                'slope': None if np.isnan(slope) else slope,
+                'anomalies': anomalies
+            }
+        return results
+
+
+if __name__ == '__main__':
+    from agents.project_tracking import ProjectTrackingAgent
+    from config import get_section
+
+    runner = PortfolioJobRunner.from_settings(
+        ProjectTrackingAgent(),
+        RiskScoringAgent(),
+        get_section('portfolio_jobs'),
+        progress=lambda done, total: print(f"Rescored {done}/{total} projects")
+    )
+    results = runner.run()
+    print(f"Rescored {len(results)} projects")
@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, Optional
+import asyncio
+from storage.state import MemoryStateStore, StateStore
+
+class ReportPipeline:
+    """Defers report rendering and alert delivery off the request path.
+
+    Scoring endpoints hand each new risk assessment to record_risk(), which
+    only remembers it and enqueues work. Alerts for alerting levels go onto
+    an async queue drained by a pool of alert workers; when a project's risk
+    changes a render worker pre-renders its report into the ReportingAgent
+    cache. Reports are otherwise rendered lazily by get_report().
+
+    The latest assessment per project lives in a StateStore, so with a
+    shared backend every worker process serves the same risk and report.
+    """
+
+    def __init__(self, reporting_agent, alert_workers: int = 2, render_workers: int = 1,
+                 queue_size: int = 1000, prerender: bool = True,
+                 alert_levels: Iterable[str] = ('critical', 'high'),
+                 state_store: StateStore = None):
+        self.reporting_agent = reporting_agent
+        self.state = state_store or MemoryStateStore()
+        self.alert_workers = alert_workers
+        self.render_workers = render_workers
+        self.prerender = prerender
+        self.alert_levels = set(alert_levels)
+        self.alert_queue = asyncio.Queue(maxsize=queue_size)
+        self.render_queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._pending_renders = set()
+        self._workers = []
+
+    @classmethod
+    def from_settings(cls, reporting_agent, settings: Dict,
+                      state_store: StateStore = None) -> 'ReportPipeline':
+        """Build a pipeline from the `reporting` config section"""
+        return cls(
+            reporting_agent,
+            alert_workers=settings.get('alert_workers', 2),
+            render_workers=settings.get('render_workers', 1),
+            queue_size=settings.get('queue_size', 1000),
+            prerender=settings.get('prerender', True),
+            state_store=state_store
+        )
+
+    def record_risk(self, project_id: str, risk_data: Dict) -> None:
+        """Remember a new risk assessment and enqueue any follow-up work"""
+        risks = {project_id: risk_data}
+        self.enqueue_work(risks, self.store_risks(risks))
+
+    def store_risks(self, risks: Dict[str, Dict]) -> Dict[str, Optional[Dict]]:
+        """Write many projects' new risk assessments to the state store at once,
+        returning the assessments they replace; safe to call from any thread"""
+        previous = {project_id: self.latest_risk(project_id) for project_id in risks}
+        self.state.set_many('risk', risks)
+        return previous
+
+    def enqueue_work(self, risks: Dict[str, Dict], previous: Dict[str, Optional[Dict]]) -> None:
+        """Enqueue the alerts and renders for risks written by store_risks()"""
+        dropped = self.dropped
+        for project_id, risk_data in risks.items():
+            if risk_data['level'] in self.alert_levels:
+                self._enqueue(self.alert_queue, (project_id, risk_data), report=len(risks) == 1)
+
+            before = previous[project_id]
+            changed = before is None or any(
+                before.get(key) != risk_data.get(key) for key in ('score', 'level', 'factors')
+            )
+            if self.prerender and changed and project_id not in self._pending_renders:
+                if self._enqueue(self.render_queue, project_id, report=len(risks) == 1):
+                    self._pending_renders.add(project_id)
+        if len(risks) > 1 and self.dropped > dropped:
+            print(f"Report pipeline queue full, dropped {self.dropped - dropped} items for {len(risks)} projects")
+
+    def latest_risk(self, project_id: str) -> Optional[Dict]:
+        """Most recent risk assessment for a project, from any worker"""
+        return self.state.get('risk', project_id)
+
+    def get_report(self, project_id: str, risk_data: Optional[Dict] = None) -> Optional[str]:
+        """Render (or fetch the cached render of) the latest report for a project"""
+        if risk_data is None:
+            risk_data = self.latest_risk(project_id)
+        if risk_data is None:
+            return None
+        return self.reporting_agent.generate_risk_report(project_id, risk_data)
+
+    async def start(self) -> None:
+        """Start the alert and render worker pools, the alert dispatcher and log compaction"""
+        if self._workers:
+            return
+        await self.reporting_agent.dispatcher.start()
+        await self.reporting_agent.alert_log.start()
+        self._workers = [
+            asyncio.create_task(self._alert_worker()) for _ in range(self.alert_workers)
+        ] + [
+            asyncio.create_task(self._render_worker()) for _ in range(self.render_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers; queued work that has not started is abandoned"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.reporting_agent.dispatcher.stop()
+        await self.reporting_agent.alert_log.stop()
+
+    async def join(self) -> None:
+        """Wait until every queued alert and render has been processed"""
+        await self.alert_queue.join()
+        await self.render_queue.join()
+
+    def _enqueue(self, queue: asyncio.Queue, item, report: bool = True) -> bool:
+        try:
+            queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if report:
+                print(f"Report pipeline queue full, dropping {item!r:.80}")
+            return False
+
+    async def _alert_worker(self) -> None:
+        while True:
+            project_id, risk_data = await self.alert_queue.get()
+            try:
+                await asyncio.to_thread(self.reporting_agent.send_alert, project_id, risk_data)
+            except Exception as e:
+                print(f"Failed to send alert for {project_id}: {str(e)}")
+            finally:
+                self.alert_queue.task_done()
+
+    async def _render_worker(self) -> None:
+        while True:
+            project_id = await self.render_queue.get()
+            self._pending_renders.discard(project_id)
+            try:
+                await asyncio.to_thread(self.get_report, project_id)
+            except Exception as e:
+                print(f"Failed to render report for {project_id}: {str(e)}")
+            finally:
+                self.render_queue.task_done()
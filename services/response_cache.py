@@ -0,0 +1,114 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import gzip
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressors by content coding; brotli is offered only when it is installed
+COMPRESSORS = {'gzip': lambda body, level: gzip.compress(body, compresslevel=level, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda body, level: brotli.compress(body, quality=min(level, 11))
+
+# Preferred order when a client accepts several codings equally
+PREFERENCE = ('br', 'gzip', 'identity')
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Codings from an Accept-Encoding header that we can produce, best first"""
+    if not header:
+        return ['identity']
+    weights = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding == '*':
+            for name in COMPRESSORS:
+                weights.setdefault(name, quality)
+        elif coding:
+            weights[coding] = quality
+    weights.setdefault('identity', 0.001)
+    candidates = [
+        coding for coding in PREFERENCE
+        if weights.get(coding, 0) > 0 and (coding == 'identity' or coding in COMPRESSORS)
+    ]
+    return sorted(candidates, key=lambda coding: -weights[coding]) or ['identity']
+
+
+class ResponseCache:
+    """Rendered response bodies per resource, keyed by the resource's version.
+
+    Only the newest version of each resource is kept: storing a new version
+    drops the bodies of the old one. Each entry holds the identity body and
+    any compressed variants made so far, so a body is rendered and
+    compressed at most once per version and coding. Bodies smaller than
+    `min_compress_size` bytes are always served uncompressed.
+    """
+
+    def __init__(self, max_entries: int = 1024, min_compress_size: int = 512,
+                 compress_level: int = 6):
+        self.max_entries = max_entries
+        self.min_compress_size = min_compress_size
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # resource -> (version, {coding: body})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'ResponseCache':
+        """Build a cache from the `response_cache` config section"""
+        return cls(
+            max_entries=settings.get('max_entries', 1024),
+            min_compress_size=settings.get('min_compress_size', 512),
+            compress_level=settings.get('compress_level', 6)
+        )
+
+    def body(self, resource: str, version: str, codings: List[str],
+             render: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """Body of a resource version in the first usable coding, and that coding"""
+        with self._lock:
+            entry = self._entries.get(resource)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(resource)
+                variants = entry[1]
+                self.hits += 1
+            else:
+                variants = None
+                self.misses += 1
+
+        if variants is None:
+            variants = {'identity': render()}
+            with self._lock:
+                self._entries[resource] = (version, variants)
+                self._entries.move_to_end(resource)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        identity = variants['identity']
+        for coding in codings:
+            if coding == 'identity' or len(identity) < self.min_compress_size:
+                return identity, 'identity'
+            encoded = variants.get(coding)
+            if encoded is None:
+                encoded = COMPRESSORS[coding](identity, self.compress_level)
+                variants[coding] = encoded
+            return encoded, coding
+        return identity, 'identity'
+
+    def invalidate(self, resource: str) -> None:
+        with self._lock:
+            self._entries.pop(resource, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,261 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left, insort
+from collections import defaultdict
+from heapq import merge
+from itertools import islice
+import asyncio
+import threading
+
+LEVELS = ['low', 'medium', 'high', 'critical']
+
+class PortfolioSummaryIndex:
+    """Latest risk, status and anomalies of every project, ready to query.
+
+    Entries are updated as assessments are published and status updates
+    recorded, and so is a score-ordered ranking of the projects in each
+    group a question can ask about: every scored project, each risk level,
+    each trend, and the projects with anomalies. A project lookup is a dict
+    read and a portfolio question reads the head of one or a few rankings,
+    never the whole portfolio. Rankings catch up with changed projects when
+    next read, so the updates between two reads re-sort a ranking at most once.
+
+    Projects this process has not seen are loaded through `project_loader`
+    on first lookup; it returns (risk_data, status, anomalies), any of
+    which may be None. With a shared StateStore, start() also applies
+    assessments made by other workers, and status updates recorded here
+    are published for the other workers' indexes.
+    """
+
+    # StateStore namespaces applied from other workers
+    SYNCED = ('risk', 'status')
+
+    def __init__(self, project_loader: Optional[Callable[[str], Tuple]] = None,
+                 sync_interval: float = 1.0):
+        self.project_loader = project_loader
+        self.sync_interval = sync_interval
+        self._entries = {}                 # project_id -> summary entry
+        self._rankings = defaultdict(list)  # group -> sorted (-score, project_id), riskiest first
+        self._changed = {}                 # project_id -> (groups, key) it is ranked under, until reranked
+        self._score_total = 0.0
+        self._lock = threading.Lock()
+        self._task = None
+        self._state_store = None
+
+    def record_risk(self, project_id: str, risk_data: Dict) -> None:
+        """Apply a published risk assessment"""
+        self.record_risks({project_id: risk_data})
+
+    def record_risks(self, risks: Dict[str, Dict]) -> None:
+        """Apply the published risk assessments of many projects"""
+        with self._lock:
+            for project_id, risk_data in risks.items():
+                entry = self._entry(project_id)
+                self._change(entry)
+                if entry['score'] is not None:
+                    self._score_total -= entry['score']
+                entry['score'] = risk_data['score']
+                entry['level'] = risk_data['level']
+                entry['factors'] = dict(risk_data.get('factors', {}))
+                entry['assessed_at'] = risk_data.get('timestamp')
+                self._score_total += entry['score']
+
+    def record_status(self, project_id: str, status: Dict,
+                      anomalies: Optional[List[Dict]] = None) -> None:
+        """Apply a status update; anomalies of None are loaded when first asked for"""
+        self.record_statuses([(project_id, status, anomalies)])
+
+    def record_statuses(self, updates: Iterable[Tuple[str, Dict, Optional[List[Dict]]]]) -> None:
+        """Apply a batch of (project_id, status, anomalies) updates in order"""
+        updates = list(updates)
+        with self._lock:
+            for project_id, status, anomalies in updates:
+                self._apply_status(project_id, status, anomalies)
+        if self._state_store is not None:
+            self._state_store.set_many('status', {
+                project_id: {'status': status, 'anomalies': anomalies}
+                for project_id, status, anomalies in updates
+            })
+
+    def project(self, project_id: str) -> Optional[Dict]:
+        """A copy of a project's entry, or None if nothing is known about it"""
+        with self._lock:
+            entry = self._entries.get(project_id)
+            missing = entry is None or entry['anomalies'] is None
+        if missing and self.project_loader is not None:
+            risk_data, status, anomalies = self.project_loader(project_id)
+            if entry is None and risk_data:
+                self.record_risk(project_id, risk_data)
+            if status:
+                with self._lock:
+                    self._apply_status(project_id, status, anomalies)
+        with self._lock:
+            entry = self._entries.get(project_id)
+            return dict(entry) if entry is not None else None
+
+    def top_risks(self, count: int = 5, levels: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Riskiest scored projects first, optionally only those at the given levels"""
+        with self._lock:
+            self._rerank()
+            if levels is None:
+                ranked = self._rankings['scored'][:count]
+            else:
+                ranked = list(islice(merge(*(self._rankings[f'level:{level}'] for level in levels)), count))
+            return [dict(self._entries[project_id]) for _, project_id in ranked]
+
+    def with_trend(self, trend: str, count: int = 5) -> Tuple[int, List[Dict]]:
+        """How many projects have a trend, and the riskiest of them"""
+        return self._group(f'trend:{trend}', count)
+
+    def with_anomalies(self, count: int = 5) -> Tuple[int, List[Dict]]:
+        """How many projects have anomalies in their latest update, and the riskiest of them"""
+        return self._group('anomalous', count)
+
+    def summary(self) -> Dict:
+        """Portfolio-wide counts and mean risk score"""
+        with self._lock:
+            self._rerank()
+            scored = len(self._rankings['scored'])
+            return {
+                'projects': len(self._entries),
+                'scored': scored,
+                'mean_score': self._score_total / scored if scored else None,
+                'levels': {level: len(self._rankings[f'level:{level}']) for level in LEVELS},
+                'trends': {
+                    group[len('trend:'):]: len(ranking)
+                    for group, ranking in self._rankings.items()
+                    if group.startswith('trend:') and ranking
+                },
+                'anomalous': len(self._rankings['anomalous'])
+            }
+
+    def rerank(self) -> None:
+        """Bring the rankings up to date now rather than on the next read"""
+        with self._lock:
+            self._rerank()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def start(self, state_store=None) -> None:
+        """Apply risk assessments and status updates written to a shared store by other workers"""
+        if state_store is None or not state_store.shared or self._task is not None:
+            return
+        self._state_store = state_store
+        versions = {}
+        for namespace in self.SYNCED:
+            versions[namespace], current = await asyncio.to_thread(
+                state_store.changes_since, namespace, 0
+            )
+            self._apply_changes(namespace, current)
+        self._task = asyncio.create_task(self._sync(state_store, versions))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._state_store = None
+
+    async def _sync(self, state_store, versions: Dict[str, int]) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            for namespace in self.SYNCED:
+                try:
+                    versions[namespace], changes = await asyncio.to_thread(
+                        state_store.changes_since, namespace, versions[namespace]
+                    )
+                except Exception as e:
+                    print(f"Summary index sync error: {str(e)}")
+                    continue
+                self._apply_changes(namespace, changes)
+
+    def _apply_changes(self, namespace: str, changes: Dict[str, Dict]) -> None:
+        if namespace == 'risk':
+            self.record_risks(changes)
+            return
+        with self._lock:
+            for project_id, change in changes.items():
+                self._apply_status(project_id, change['status'], change['anomalies'])
+
+    def _entry(self, project_id: str) -> Dict:
+        entry = self._entries.get(project_id)
+        if entry is None:
+            entry = self._entries[project_id] = {
+                'project_id': project_id,
+                'score': None, 'level': None, 'factors': {}, 'assessed_at': None,
+                'health_score': None, 'trend': None, 'metrics': {}, 'updated_at': None,
+                'anomalies': None
+            }
+        return entry
+
+    def _apply_status(self, project_id: str, status: Dict, anomalies: Optional[List[Dict]]) -> None:
+        entry = self._entry(project_id)
+        # A status older than the one applied already, e.g. loaded or synced late, is dropped
+        if entry['updated_at'] and status.get('timestamp') and status['timestamp'] < entry['updated_at']:
+            return
+        self._change(entry)
+        entry['health_score'] = status.get('health_score')
+        entry['trend'] = status.get('trend')
+        entry['metrics'] = dict(status.get('metrics', {}))
+        entry['updated_at'] = status.get('timestamp')
+        entry['anomalies'] = list(anomalies) if anomalies is not None else None
+
+    def _group(self, group: str, count: int) -> Tuple[int, List[Dict]]:
+        with self._lock:
+            self._rerank()
+            ranking = self._rankings.get(group, [])
+            return len(ranking), [dict(self._entries[project_id]) for _, project_id in ranking[:count]]
+
+    def _groups(self, entry: Dict) -> List[str]:
+        groups = []
+        if entry['score'] is not None:
+            groups += ['scored', f"level:{entry['level']}"]
+        if entry['trend'] is not None:
+            groups.append(f"trend:{entry['trend']}")
+        if entry['anomalies']:
+            groups.append('anomalous')
+        return groups
+
+    def _key(self, entry: Dict) -> Tuple[float, str]:
+        # Unscored projects rank after every scored one
+        return (-entry['score'] if entry['score'] is not None else 1.0, entry['project_id'])
+
+    def _change(self, entry: Dict) -> None:
+        # Called before an entry changes; rankings catch up when next read, so
+        # a project updated many times in between moves once
+        if entry['project_id'] not in self._changed:
+            self._changed[entry['project_id']] = (self._groups(entry), self._key(entry))
+
+    # Fewer moves than this in a ranking are applied one by one
+    RERANK_BATCH = 16
+
+    def _rerank(self) -> None:
+        """Move the projects changed since the rankings were last read"""
+        moves = defaultdict(dict)  # group -> {project_id: (ranked key, new key)}, None if not ranked
+        for project_id, (before, ranked_key) in self._changed.items():
+            entry = self._entries[project_id]
+            key, after = self._key(entry), self._groups(entry)
+            for group in before:
+                if group not in after:
+                    moves[group][project_id] = (ranked_key, None)
+                elif key != ranked_key:
+                    moves[group][project_id] = (ranked_key, key)
+            for group in after:
+                if group not in before:
+                    moves[group][project_id] = (None, key)
+        self._changed.clear()
+
+        for group, group_moves in moves.items():
+            ranking = self._rankings[group]
+            if len(group_moves) < self.RERANK_BATCH:
+                for ranked_key, key in group_moves.values():
+                    if ranked_key is not None:
+                        del ranking[bisect_left(ranking, ranked_key)]
+                    if key is not None:
+                        insort(ranking, key)
+                continue
+            # Many moves: one pass over the ranking instead of shifting it for each.
+            # A project has one key per ranking, so its id identifies the key.
+            ranking[:] = [key for key in ranking if key[1] not in group_moves]
+            ranking.extend(key for _, key in group_moves.values() if key is not None)
+            ranking.sort()  # two sorted runs, merged in linear time
@@ -0,0 +1,283 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import json
+import sqlite3
+import threading
+from storage.history import from_micros, to_micros
+
+SEVERITIES = ['low', 'medium', 'high', 'critical']
+
+def make_alert(project_id: str, risk_data: Dict, details: Optional[str] = None) -> Dict:
+    """The alert raised for a risk assessment, as pushed to live subscribers and logged"""
+    return {
+        "project_id": project_id,
+        "title": f"{risk_data['level'].title()} risk detected",
+        "message": f"Risk score {risk_data['score']} ({risk_data['level']})",
+        "severity": risk_data['level'],
+        "score": risk_data['score'],
+        "factors": risk_data.get('factors', {}),
+        "details": details,
+        "timestamp": risk_data['timestamp']
+    }
+
+
+class AlertLog:
+    """Append-only alert log in SQLite, indexed for newest-first queries.
+
+    Alerts get increasing ids and keep their own timestamps. Each alert also
+    gets a sequence time, its timestamp clamped so it never goes backwards
+    in id order, and the log remembers how far the latest alert ever lagged
+    behind it. A time range therefore maps to an id range, and every query -
+    per project, per severity, or across all projects - is a backward range
+    scan of one index, paged by keyset: the `cursor` is the id of the last
+    alert on the previous page.
+
+    With the sqlite backend (WAL mode) every worker process appends to and
+    reads from the same file. compact() drops alerts past the retention
+    period in small batches, one short transaction each, so writers never
+    wait for more than one batch.
+    """
+
+    def __init__(self, path: str = ':memory:', retention_days: float = 90,
+                 compact_interval: float = 3600, compact_batch: int = 1000,
+                 timeout: float = 30):
+        self.path = path
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self.compact_batch = compact_batch
+        self._lock = threading.Lock()
+        self._task = None
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            # AUTOINCREMENT: ids are never reused, even after compaction empties the table
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS alerts ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' project_id TEXT NOT NULL,'
+                ' severity INTEGER NOT NULL,'
+                ' timestamp INTEGER NOT NULL,'
+                ' score REAL,'
+                ' title TEXT NOT NULL,'
+                ' message TEXT NOT NULL,'
+                ' factors TEXT NOT NULL,'
+                ' details TEXT,'
+                ' sequence_time INTEGER NOT NULL)'
+            )
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(alerts)')]
+            if 'sequence_time' not in columns:
+                # Logs written before sequence times stored clamped timestamps
+                self._conn.execute('ALTER TABLE alerts ADD COLUMN sequence_time INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute('UPDATE alerts SET sequence_time = timestamp')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS alert_log_state (name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+            for name, columns in [
+                ('project', 'project_id, id'),
+                ('project_severity', 'project_id, severity, id'),
+                ('severity', 'severity, id'),
+                ('timestamp', 'timestamp, id'),
+                ('sequence', 'sequence_time, id')
+            ]:
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_alerts_{name} ON alerts ({columns})')
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'AlertLog':
+        """Build a log from the `alerts` config section"""
+        backend = settings.get('backend', 'memory')
+        if backend not in ('memory', 'sqlite'):
+            raise ValueError(f"Unknown alert log backend: {backend}")
+        return cls(
+            path=settings.get('path', 'alerts.db') if backend == 'sqlite' else ':memory:',
+            retention_days=settings.get('retention_days', 90),
+            compact_interval=settings.get('compact_interval', 3600),
+            compact_batch=settings.get('compact_batch', 1000)
+        )
+
+    def append(self, alert: Dict) -> int:
+        """Log one alert and return its id"""
+        return self.append_many([alert])[-1]
+
+    def append_many(self, alerts: List[Dict]) -> List[int]:
+        """Log alerts in order in one transaction, returning their ids"""
+        rows = [
+            (
+                alert['project_id'],
+                SEVERITIES.index(alert['severity']),
+                to_micros(alert['timestamp']),
+                alert.get('score'),
+                alert['title'],
+                alert['message'],
+                json.dumps(alert.get('factors') or {}),
+                alert.get('details')
+            )
+            for alert in alerts
+        ]
+        with self._lock:
+            # Under the write lock the last sequence time cannot change and the new ids are consecutive
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute('SELECT sequence_time FROM alerts ORDER BY id DESC LIMIT 1').fetchone()
+                latest = row[0] if row else 0
+                lateness = 0
+                for i, row in enumerate(rows):
+                    latest = max(latest, row[2])
+                    lateness = max(lateness, latest - row[2])
+                    rows[i] = row + (latest,)
+                self._conn.executemany(
+                    'INSERT INTO alerts (project_id, severity, timestamp, score, title, message, factors,'
+                    ' details, sequence_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                last_id = self._conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                if lateness:
+                    self._conn.execute(
+                        "INSERT INTO alert_log_state (name, value) VALUES ('max_lateness', ?)"
+                        ' ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)',
+                        (lateness,)
+                    )
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    def query(self, project_id: Optional[str] = None, severities: Optional[Iterable[str]] = None,
+              min_severity: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, cursor: Optional[int] = None,
+              limit: int = 50) -> Dict:
+        """A page of alerts, newest first, and the cursor of the next page (None on the last)"""
+        codes = self._severity_codes(severities, min_severity)
+        with self._lock:
+            lo, hi = self._id_range(since, until)
+            if cursor is not None:
+                hi = min(hi, cursor - 1)
+            rows = []
+            if codes and lo <= hi:
+                # One index range scan per severity, merged by id below
+                for code in (codes if len(codes) < len(SEVERITIES) else [None]):
+                    clauses, params = [], []
+                    if project_id is not None:
+                        clauses.append('project_id = ?')
+                        params.append(project_id)
+                    if code is not None:
+                        clauses.append('severity = ?')
+                        params.append(code)
+                    clauses.append('id BETWEEN ? AND ?')
+                    params += [lo, hi]
+                    # Late alerts in the id range may lie outside the time range; the unary +
+                    # keeps these filters off the timestamp index so the id scan is used
+                    if since:
+                        clauses.append('+timestamp >= ?')
+                        params.append(to_micros(since))
+                    if until:
+                        clauses.append('+timestamp <= ?')
+                        params.append(to_micros(until))
+                    rows.extend(self._conn.execute(
+                        'SELECT id, project_id, severity, timestamp, score, title, message, factors, details'
+                        f' FROM alerts WHERE {" AND ".join(clauses)} ORDER BY id DESC LIMIT ?',
+                        params + [limit + 1]
+                    ).fetchall())
+
+        rows.sort(key=lambda row: row[0], reverse=True)
+        page = [self._to_alert(row) for row in rows[:limit]]
+        return {
+            'alerts': page,
+            'next_cursor': page[-1]['id'] if len(rows) > limit else None
+        }
+
+    def compact(self, now: Optional[datetime] = None) -> int:
+        """Delete alerts older than the retention period; returns how many were deleted"""
+        if not self.retention_days:
+            return 0
+        cutoff = to_micros(((now or datetime.now()) - timedelta(days=self.retention_days)).isoformat())
+        deleted = 0
+        while True:
+            with self._lock:
+                count = self._conn.execute(
+                    'DELETE FROM alerts WHERE id IN'
+                    ' (SELECT id FROM alerts WHERE timestamp < ? ORDER BY timestamp, id LIMIT ?)',
+                    (cutoff, self.compact_batch)
+                ).rowcount
+            deleted += count
+            if count < self.compact_batch:
+                return deleted
+
+    async def start(self) -> None:
+        """Compact every `compact_interval` seconds in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await asyncio.to_thread(self.compact)
+                if deleted:
+                    print(f"Compacted alert log: {deleted} alerts past retention deleted")
+            except Exception as e:
+                print(f"Alert log compaction error: {str(e)}")
+            await asyncio.sleep(self.compact_interval)
+
+    def _severity_codes(self, severities: Optional[Iterable[str]], min_severity: Optional[str]) -> List[int]:
+        codes = set(range(len(SEVERITIES)))
+        for name in list(severities or []) + ([min_severity] if min_severity else []):
+            if name not in SEVERITIES:
+                raise ValueError(f"Unknown severity: {name}")
+        if severities:
+            codes &= {SEVERITIES.index(name) for name in severities}
+        if min_severity:
+            codes &= set(range(SEVERITIES.index(min_severity), len(SEVERITIES)))
+        return sorted(codes)
+
+    def _id_range(self, since: Optional[str], until: Optional[str]) -> Tuple[int, int]:
+        """Ids bounding every alert in a time range; empty ranges have lo > hi.
+
+        Sequence times are never earlier than timestamps, and at most the
+        largest lateness seen later, so the bounds may include alerts outside
+        the range but never leave one out.
+        """
+        lo, hi = 0, 2**63 - 1
+        if since:
+            row = self._conn.execute(
+                'SELECT id FROM alerts WHERE sequence_time >= ? ORDER BY sequence_time, id LIMIT 1',
+                (to_micros(since),)
+            ).fetchone()
+            lo = row[0] if row else hi
+        if until:
+            row = self._conn.execute("SELECT value FROM alert_log_state WHERE name = 'max_lateness'").fetchone()
+            row = self._conn.execute(
+                'SELECT id FROM alerts WHERE sequence_time <= ?'
+                ' ORDER BY sequence_time DESC, id DESC LIMIT 1',
+                (to_micros(until) + (row[0] if row else 0),)
+            ).fetchone()
+            hi = row[0] if row else -1
+        return lo, hi
+
+    def _to_alert(self, row) -> Dict:
+        alert_id, project_id, severity, timestamp, score, title, message, factors, details = row
+        return {
+            'id': alert_id,
+            'project_id': project_id,
+            'title': title,
+            'message': message,
+            'severity': SEVERITIES[severity],
+            'score': score,
+            'factors': json.loads(factors),
+            'details': details,
+            'timestamp': from_micros(timestamp)
+        }
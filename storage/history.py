@@ -0,0 +1,636 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+from array import array
+from datetime import datetime, timedelta
+import json
+import math
+import sqlite3
+import threading
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+EPOCH = datetime(1970, 1, 1)
+TRENDS = ['neutral', 'stable', 'improving', 'deteriorating']
+TREND_CODES = {trend: code for code, trend in enumerate(TRENDS)}
+NAN = float('nan')
+
+# Per-bucket statistics returned by HistoryStore.aggregate
+STATS = ['time', 'count', 'sum', 'min', 'max', 'min_time', 'max_time']
+# Block widths (microseconds) of the SQLite store's rollups: one minute, then 8x coarser per level
+ROLLUP_WIDTHS = [60_000_000 * 8 ** level for level in range(7)]
+ROLLUP_CHUNK = 4096  # blocks materialized per transaction
+ROLLUP_MIN_BLOCKS = 4
+
+def to_micros(timestamp: str) -> int:
+    """Convert an ISO timestamp to integer microseconds since the epoch"""
+    delta = datetime.fromisoformat(timestamp) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def from_micros(micros: int) -> str:
+    """Convert integer microseconds since the epoch back to an ISO timestamp"""
+    return (EPOCH + timedelta(microseconds=int(micros))).isoformat()
+
+
+def reduce_stats(stats: Dict[str, np.ndarray], origin: int, width: int) -> Dict[str, np.ndarray]:
+    """Regroup time-sorted partial statistics into buckets of `width` from `origin`.
+
+    A bucket's min_time and max_time come from the first part holding its
+    extreme value.
+    """
+    time = origin + (stats['time'] - origin) // width * width
+    if not len(time):
+        return {key: stats[key] for key in STATS}
+    # Times are sorted, so each bucket is a contiguous segment
+    starts = np.flatnonzero(np.diff(time, prepend=time[0] - 1))
+    counts = np.diff(np.append(starts, len(time)))
+    minima = np.minimum.reduceat(stats['min'], starts)
+    maxima = np.maximum.reduceat(stats['max'], starts)
+    segment = np.repeat(np.arange(len(starts)), counts)
+    at_min = np.flatnonzero(stats['min'] == minima[segment])
+    at_max = np.flatnonzero(stats['max'] == maxima[segment])
+    return {
+        'time': time[starts],
+        'count': np.add.reduceat(stats['count'], starts),
+        'sum': np.add.reduceat(stats['sum'], starts),
+        'min': minima,
+        'max': maxima,
+        'min_time': stats['min_time'][at_min[np.unique(segment[at_min], return_index=True)[1]]],
+        'max_time': stats['max_time'][at_max[np.unique(segment[at_max], return_index=True)[1]]]
+    }
+
+def bucket_stats(timestamps: np.ndarray, values: np.ndarray, origin: int, width: int) -> Dict[str, np.ndarray]:
+    """Vectorized per-bucket statistics of a time-sorted series"""
+    return reduce_stats({
+        'time': timestamps, 'count': np.ones(len(timestamps), dtype=np.int64),
+        'sum': values, 'min': values, 'max': values,
+        'min_time': timestamps, 'max_time': timestamps
+    }, origin, width)
+
+def _concat_stats(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {key: np.concatenate([part[key] for part in parts]) for key in STATS}
+
+
+class HistoryStore:
+    """Interface for project history backends.
+
+    Updates are the dicts produced by ProjectTrackingAgent.update_project_status:
+    {'timestamp': <ISO string>, 'metrics': {...}, 'health_score': float, 'trend': str}
+    """
+
+    # True when other processes may append to the same store
+    shared = False
+
+    def append(self, project_id: str, update: Dict) -> None:
+        raise NotImplementedError
+
+    def append_many(self, updates: List[Tuple[str, Dict]]) -> None:
+        """Append a batch of (project_id, update) pairs in order"""
+        for project_id, update in updates:
+            self.append(project_id, update)
+
+    def latest(self, project_id: str) -> Dict:
+        """Most recent update for a project, or {} if it has none"""
+        raise NotImplementedError
+
+    def recent_scores(self, project_id: str, count: int) -> List[float]:
+        """Health scores of the last `count` updates, oldest first"""
+        raise NotImplementedError
+
+    def query(self, project_id: str, start: Optional[str] = None,
+              end: Optional[str] = None) -> List[Dict]:
+        """Updates with start <= timestamp <= end, oldest first"""
+        raise NotImplementedError
+
+    def metric_history(self, project_id: str, names: List[str],
+                       count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Float64 arrays of the last `count` values of each named metric (or
+        'health_score'), oldest first, with NaN where an update lacked the metric"""
+        raise NotImplementedError
+
+    def time_range(self, project_id: str) -> Optional[Tuple[int, int]]:
+        """Microsecond timestamps of a project's first and last update, or None"""
+        raise NotImplementedError
+
+    def series(self, project_id: str, name: str, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Int64 microsecond timestamps and float64 values of one metric (or
+        'health_score') with lo <= timestamp <= hi, oldest first; updates
+        lacking a numeric value are left out"""
+        raise NotImplementedError
+
+    def aggregate(self, project_id: str, name: str, lo: int, hi: int,
+                  buckets: int) -> Dict[str, np.ndarray]:
+        """Statistics of series(project_id, name, lo, hi) in about `buckets`
+        equal time buckets.
+
+        Returns arrays over the non-empty buckets: 'time' (bucket start),
+        'count', 'sum', 'min', 'max', and 'min_time' and 'max_time', the
+        timestamps where the minimum and maximum occur. Backends may widen
+        buckets slightly to align them with precomputed rollups.
+        """
+        timestamps, values = self.series(project_id, name, lo, hi)
+        return bucket_stats(timestamps, values, lo, (hi - lo) // buckets + 1)
+
+    def count(self, project_id: str) -> int:
+        raise NotImplementedError
+
+    def project_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class _ProjectBuffer:
+    """Fixed-capacity circular columns holding one project's history.
+
+    Columns are preallocated array.array buffers (cheap per-item writes);
+    column() exposes them to NumPy without copying.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0  # next write position
+        self.timestamps = array('q', [0]) * capacity
+        self.health_scores = array('d', [0.0]) * capacity
+        self.trends = array('b', [0]) * capacity
+        self.metrics = {}
+
+    def append(self, micros: int, metrics: Dict, health_score: float, trend: str) -> None:
+        pos = self.head
+        self.timestamps[pos] = micros
+        self.health_scores[pos] = health_score
+        self.trends[pos] = TREND_CODES.get(trend, 0)
+        columns = self.metrics
+        for name, column in columns.items():
+            if name not in metrics:
+                column[pos] = NAN
+        for name, value in metrics.items():
+            column = columns.get(name)
+            if column is None:
+                if not isinstance(value, (int, float)):
+                    continue
+                column = columns[name] = array('d', [NAN]) * self.capacity
+            try:
+                column[pos] = value
+            except TypeError:
+                column[pos] = NAN  # non-numeric values are only kept in the latest update
+        self.head = (pos + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def order(self) -> np.ndarray:
+        """Physical positions of the stored entries, oldest first"""
+        start = (self.head - self.size) % self.capacity
+        return (start + np.arange(self.size)) % self.capacity
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy NumPy view of a column in physical order"""
+        if name == 'timestamp':
+            return np.frombuffer(self.timestamps, dtype=np.int64)
+        if name == 'health_score':
+            return np.frombuffer(self.health_scores, dtype=np.float64)
+        if name == 'trend':
+            return np.frombuffer(self.trends, dtype=np.int8)
+        return np.frombuffer(self.metrics[name], dtype=np.float64)
+
+    def row(self, pos: int) -> Dict:
+        return {
+            'timestamp': from_micros(self.timestamps[pos]),
+            'metrics': {
+                name: column[pos]
+                for name, column in self.metrics.items()
+                if not math.isnan(column[pos])
+            },
+            'health_score': self.health_scores[pos],
+            'trend': TRENDS[self.trends[pos]]
+        }
+
+
+class RingBufferHistoryStore(HistoryStore):
+    """In-process history keeping the last `retention` updates per project
+    in compact array-backed columns"""
+
+    def __init__(self, retention: int = 1000):
+        if retention < 1:
+            raise ValueError("retention must be at least 1")
+        self.retention = retention
+        self._buffers = {}
+        self._latest = {}
+
+    def append(self, project_id: str, update: Dict) -> None:
+        self._append(project_id, update, to_micros(update['timestamp']))
+
+    def append_many(self, updates: List[Tuple[str, Dict]]) -> None:
+        micros = {}  # batches usually share one timestamp
+        for project_id, update in updates:
+            timestamp = update['timestamp']
+            if timestamp not in micros:
+                micros[timestamp] = to_micros(timestamp)
+            self._append(project_id, update, micros[timestamp])
+
+    def _append(self, project_id: str, update: Dict, micros: int) -> None:
+        buffer = self._buffers.get(project_id)
+        if buffer is None:
+            buffer = self._buffers[project_id] = _ProjectBuffer(self.retention)
+        buffer.append(micros, update['metrics'], update['health_score'], update['trend'])
+        self._latest[project_id] = update
+
+    def latest(self, project_id: str) -> Dict:
+        return self._latest.get(project_id, {})
+
+    def recent_scores(self, project_id: str, count: int) -> List[float]:
+        buffer = self._buffers.get(project_id)
+        if buffer is None or count <= 0:
+            return []
+        positions = buffer.order()[-count:]
+        return buffer.column('health_score')[positions].tolist()
+
+    def query(self, project_id: str, start: Optional[str] = None,
+              end: Optional[str] = None) -> List[Dict]:
+        buffer = self._buffers.get(project_id)
+        if buffer is None:
+            return []
+        positions = buffer.order()
+        timestamps = buffer.column('timestamp')[positions]
+        lo = np.searchsorted(timestamps, to_micros(start), 'left') if start else 0
+        hi = np.searchsorted(timestamps, to_micros(end), 'right') if end else len(positions)
+        return [buffer.row(pos) for pos in positions[lo:hi]]
+
+    def metric_history(self, project_id: str, names: List[str],
+                       count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        buffer = self._buffers.get(project_id)
+        if buffer is None:
+            return {name: np.empty(0) for name in names}
+        positions = buffer.order()
+        if count is not None:
+            positions = positions[len(positions) - min(count, len(positions)):]
+        return {
+            name: (
+                buffer.column(name)[positions]
+                if name == 'health_score' or name in buffer.metrics
+                else np.full(len(positions), np.nan)
+            )
+            for name in names
+        }
+
+    def time_range(self, project_id: str) -> Optional[Tuple[int, int]]:
+        buffer = self._buffers.get(project_id)
+        if buffer is None:
+            return None
+        positions = buffer.order()
+        return buffer.timestamps[positions[0]], buffer.timestamps[positions[-1]]
+
+    def series(self, project_id: str, name: str, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        buffer = self._buffers.get(project_id)
+        if buffer is None or (name != 'health_score' and name not in buffer.metrics):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        positions = buffer.order()
+        timestamps = buffer.column('timestamp')[positions]
+        first = np.searchsorted(timestamps, lo, 'left')
+        last = np.searchsorted(timestamps, hi, 'right')
+        timestamps = timestamps[first:last]
+        values = buffer.column(name)[positions[first:last]]
+        present = ~np.isnan(values)
+        return timestamps[present], values[present]
+
+    def count(self, project_id: str) -> int:
+        buffer = self._buffers.get(project_id)
+        return buffer.size if buffer is not None else 0
+
+    def project_ids(self) -> List[str]:
+        return list(self._buffers)
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """On-disk history with an index on (project_id, timestamp).
+
+    aggregate() reads per-block rollups instead of every update: blocks of
+    ROLLUP_WIDTHS, materialized the first time a chart needs them and kept
+    in history_rollups. history_rollup_marks records the time range each
+    project, metric and width has complete rollups for; an append inside
+    that range cuts it short at the block the update lands in.
+    project_counts keeps each project's number of updates, so count() is
+    one primary key lookup however long the history grows.
+    """
+
+    def __init__(self, path: str = 'project_history.db', timeout: float = 30):
+        self.path = path
+        # Several uvicorn workers can append to the same WAL-mode file
+        self.shared = path != ':memory:'
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS project_history ('
+                ' project_id TEXT NOT NULL,'
+                ' timestamp INTEGER NOT NULL,'
+                ' health_score REAL NOT NULL,'
+                ' trend TEXT NOT NULL,'
+                ' metrics TEXT NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_project_history_project_ts'
+                ' ON project_history (project_id, timestamp)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS history_rollups ('
+                ' project_id TEXT NOT NULL, metric TEXT NOT NULL, width INTEGER NOT NULL,'
+                ' start INTEGER NOT NULL, count INTEGER NOT NULL, sum REAL NOT NULL,'
+                ' min REAL NOT NULL, max REAL NOT NULL,'
+                ' min_time INTEGER NOT NULL, max_time INTEGER NOT NULL,'
+                ' PRIMARY KEY (project_id, metric, width, start)) WITHOUT ROWID'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS history_rollup_marks ('
+                ' project_id TEXT NOT NULL, metric TEXT NOT NULL, width INTEGER NOT NULL,'
+                ' rolled_from INTEGER NOT NULL, rolled_until INTEGER NOT NULL,'
+                ' PRIMARY KEY (project_id, metric, width)) WITHOUT ROWID'
+            )
+        with self._lock, self._conn:
+            # Under the write lock, so counts of an existing history are filled in before any append
+            self._conn.execute('BEGIN IMMEDIATE')
+            if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'project_counts'").fetchone() is None:
+                self._conn.execute(
+                    'CREATE TABLE project_counts ('
+                    ' project_id TEXT PRIMARY KEY, updates INTEGER NOT NULL) WITHOUT ROWID'
+                )
+                self._conn.execute(
+                    'INSERT INTO project_counts'
+                    ' SELECT project_id, COUNT(*) FROM project_history GROUP BY project_id'
+                )
+
+    def append(self, project_id: str, update: Dict) -> None:
+        self.append_many([(project_id, update)])
+
+    def append_many(self, updates: List[Tuple[str, Dict]]) -> None:
+        rows = [
+            (
+                project_id,
+                to_micros(update['timestamp']),
+                update['health_score'],
+                update['trend'],
+                json.dumps(update['metrics'])
+            )
+            for project_id, update in updates
+        ]
+        earliest = {}
+        counts = {}
+        for row in rows:
+            if row[0] not in earliest or row[1] < earliest[row[0]]:
+                earliest[row[0]] = row[1]
+            counts[row[0]] = counts.get(row[0], 0) + 1
+        # One transaction per batch
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT INTO project_history VALUES (?, ?, ?, ?, ?)', rows)
+            self._conn.executemany(
+                'INSERT INTO project_counts VALUES (?, ?)'
+                ' ON CONFLICT (project_id) DO UPDATE SET updates = updates + excluded.updates',
+                list(counts.items())
+            )
+            # Rollups of blocks an update lands in are rebuilt on next use
+            self._conn.executemany(
+                'UPDATE history_rollup_marks SET rolled_until = :t - :t % width'
+                ' WHERE project_id = :project_id AND rolled_until > :t - :t % width',
+                [{'project_id': project_id, 't': t} for project_id, t in earliest.items()]
+            )
+
+    def latest(self, project_id: str) -> Dict:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT timestamp, metrics, health_score, trend FROM project_history'
+                ' WHERE project_id = ? ORDER BY timestamp DESC, rowid DESC LIMIT 1',
+                (project_id,)
+            ).fetchone()
+        return self._to_update(row) if row else {}
+
+    def recent_scores(self, project_id: str, count: int) -> List[float]:
+        if count <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT health_score FROM project_history WHERE project_id = ?'
+                ' ORDER BY timestamp DESC, rowid DESC LIMIT ?',
+                (project_id, count)
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def query(self, project_id: str, start: Optional[str] = None,
+              end: Optional[str] = None) -> List[Dict]:
+        lo = to_micros(start) if start else -2**63
+        hi = to_micros(end) if end else 2**63 - 1
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT timestamp, metrics, health_score, trend FROM project_history'
+                ' WHERE project_id = ? AND timestamp BETWEEN ? AND ?'
+                ' ORDER BY timestamp, rowid',
+                (project_id, lo, hi)
+            ).fetchall()
+        return [self._to_update(row) for row in rows]
+
+    def metric_history(self, project_id: str, names: List[str],
+                       count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT health_score, metrics FROM project_history WHERE project_id = ?'
+                ' ORDER BY timestamp DESC, rowid DESC LIMIT ?',
+                (project_id, -1 if count is None else count)
+            ).fetchall()
+        rows.reverse()
+        columns = {name: np.full(len(rows), np.nan) for name in names}
+        for i, (health_score, metrics) in enumerate(rows):
+            metrics = json.loads(metrics)
+            for name, column in columns.items():
+                value = health_score if name == 'health_score' else metrics.get(name)
+                if isinstance(value, (int, float)):
+                    column[i] = value
+        return columns
+
+    def time_range(self, project_id: str) -> Optional[Tuple[int, int]]:
+        # Separate MIN() and MAX() queries each take one index lookup; together they scan
+        with self._lock:
+            first = self._conn.execute(
+                'SELECT MIN(timestamp) FROM project_history WHERE project_id = ?', (project_id,)
+            ).fetchone()[0]
+            last = self._conn.execute(
+                'SELECT MAX(timestamp) FROM project_history WHERE project_id = ?', (project_id,)
+            ).fetchone()[0]
+        return (first, last) if first is not None else None
+
+    def series(self, project_id: str, name: str, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT timestamp, value FROM ({self._values_query(name)}) ORDER BY timestamp, rowid',
+                self._values_params(project_id, name, lo, hi)
+            ).fetchall()
+        timestamps, values = zip(*rows) if rows else ((), ())
+        return np.array(timestamps, dtype=np.int64), np.array(values, dtype=np.float64)
+
+    def aggregate(self, project_id: str, name: str, lo: int, hi: int,
+                  buckets: int) -> Dict[str, np.ndarray]:
+        width = (hi - lo) // buckets + 1
+        # Several blocks per bucket, so rounding buckets up to whole blocks costs little resolution
+        level = max((w for w in ROLLUP_WIDTHS if w * ROLLUP_MIN_BLOCKS <= width), default=None)
+        if level is None:
+            # Short ranges are cheaper to scan than to roll up
+            return self._group(project_id, name, lo, hi, lo, width)
+
+        # Buckets of whole blocks; the partial blocks at either end are scanned
+        width = -(-width // level) * level
+        origin = lo - lo % level
+        first = origin if origin == lo else origin + level
+        last = (hi + 1) - (hi + 1) % level
+        if first >= last:
+            return self._group(project_id, name, lo, hi, origin, width)
+        return reduce_stats(_concat_stats([
+            self._group(project_id, name, lo, first - 1, origin, width),
+            self._rollups(project_id, name, level, first, last),
+            self._group(project_id, name, last, hi, origin, width)
+        ]), origin, width)
+
+    def count(self, project_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT updates FROM project_counts WHERE project_id = ?', (project_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def project_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT project_id FROM project_history'
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _rollups(self, project_id: str, name: str, width: int, first: int, last: int) -> Dict[str, np.ndarray]:
+        """Statistics of the blocks of `width` starting in [first, last)"""
+        bounds = self.time_range(project_id)
+        if bounds is None:
+            return self._stats([])
+        with self._lock:
+            mark = self._conn.execute(
+                'SELECT rolled_from, rolled_until FROM history_rollup_marks'
+                ' WHERE project_id = ? AND metric = ? AND width = ?',
+                (project_id, name, width)
+            ).fetchone()
+        # Only blocks before the one holding the latest update are complete
+        complete = min(last, bounds[1] - bounds[1] % width)
+        start = max(first, bounds[0] - bounds[0] % width)
+        if mark is None or mark[1] <= mark[0] or mark[1] < start or mark[0] > complete:
+            rolled_from = rolled_until = start  # no usable coverage; start afresh
+        else:
+            rolled_from, rolled_until = mark
+        # Extend the covered range backwards, then forwards, a chunk of blocks at a time
+        while start < rolled_from:
+            step = max(start, rolled_from - ROLLUP_CHUNK * width)
+            self._materialize(project_id, name, width, step, rolled_from, rolled_until)
+            rolled_from = step
+        while rolled_until < complete:
+            step = min(complete, rolled_until + ROLLUP_CHUNK * width)
+            self._materialize(project_id, name, width, rolled_until, step, rolled_from)
+            rolled_until = step
+
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT start, count, sum, min, max, min_time, max_time FROM history_rollups'
+                ' WHERE project_id = ? AND metric = ? AND width = ? AND start >= ? AND start < ?'
+                ' ORDER BY start',
+                (project_id, name, width, first, min(last, rolled_until))
+            ).fetchall()
+        stats = self._stats(rows)
+        if rolled_until < last:
+            # The block still receiving updates
+            stats = _concat_stats([stats, self._group(project_id, name, max(first, rolled_until), last - 1, 0, width)])
+        return stats
+
+    def _materialize(self, project_id: str, name: str, width: int, lo: int, hi: int, other: int) -> None:
+        """Roll up the blocks in [lo, hi) and extend the covered range to include
+        them; `other` is the covered range's opposite end"""
+        blocks = self._group(project_id, name, lo, hi - 1, 0, width)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO history_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (project_id, name, width) + tuple(row)
+                    for row in zip(*(blocks[key].tolist() for key in STATS))
+                ]
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO history_rollup_marks VALUES (?, ?, ?, ?, ?)',
+                (project_id, name, width, min(lo, other), max(hi, other))
+            )
+
+    def _group(self, project_id: str, name: str, lo: int, hi: int,
+               origin: int, width: int) -> Dict[str, np.ndarray]:
+        """Statistics of the updates in [lo, hi] in buckets of `width` from `origin`,
+        computed inside SQLite so only one row per bucket reaches Python"""
+        if hi < lo:
+            return self._stats([])
+        values = self._values_query(name)
+        params = self._values_params(project_id, name, lo, hi)
+        params.update(origin=origin, width=width)
+        block = ':origin + (timestamp - :origin) / :width * :width'
+        # With a single MIN() or MAX(), SQLite takes the bare timestamp column
+        # from the row holding that extreme
+        with self._lock:
+            low = self._conn.execute(
+                f'SELECT {block} AS block, COUNT(*), SUM(value), MIN(value), timestamp'
+                f' FROM ({values}) GROUP BY block ORDER BY block',
+                params
+            ).fetchall()
+            high = self._conn.execute(
+                f'SELECT {block} AS block, MAX(value), timestamp'
+                f' FROM ({values}) GROUP BY block ORDER BY block',
+                params
+            ).fetchall()
+        return self._stats([
+            row[:4] + (high_row[1], row[4], high_row[2])
+            for row, high_row in zip(low, high)
+        ])
+
+    def _stats(self, rows: List[Tuple]) -> Dict[str, np.ndarray]:
+        columns = list(zip(*rows)) or [()] * len(STATS)
+        return {
+            key: np.array(column, dtype=np.float64 if key in ('sum', 'min', 'max') else np.int64)
+            for key, column in zip(STATS, columns)
+        }
+
+    def _values_query(self, name: str) -> str:
+        """Rows (rowid, timestamp, value) of one numeric series, bound by _values_params"""
+        value = 'health_score' if name == 'health_score' else 'json_extract(metrics, :path)'
+        return (
+            f'SELECT rowid, timestamp, {value} AS value FROM project_history'
+            ' WHERE project_id = :project_id AND timestamp BETWEEN :lo AND :hi'
+            " AND typeof(value) IN ('integer', 'real')"
+        )
+
+    def _values_params(self, project_id: str, name: str, lo: int, hi: int) -> Dict:
+        path = '$."' + name.replace('"', '') + '"'
+        return {'path': path, 'project_id': project_id, 'lo': lo, 'hi': hi}
+
+    def _to_update(self, row) -> Dict:
+        timestamp, metrics, health_score, trend = row
+        return {
+            'timestamp': from_micros(timestamp),
+            'metrics': json.loads(metrics),
+            'health_score': health_score,
+            'trend': trend
+        }
+
+
+def create_history_store(settings: Dict) -> HistoryStore:
+    """Build the history backend described by the `history` config section"""
+    backend = settings.get('backend', 'memory')
+    if backend == 'memory':
+        return RingBufferHistoryStore(retention=settings.get('retention', 1000))
+    if backend == 'sqlite':
+        return SQLiteHistoryStore(path=settings.get('path', 'project_history.db'))
+    raise ValueError(f"Unknown history backend: {backend}")
@@ -0,0 +1,175 @@
+from typing import Dict, Optional, Tuple
+import json
+import sqlite3
+import threading
+
+class StateStore:
+    """Interface for latest-value state shared by the app's worker processes.
+
+    Values are JSON-serializable dicts stored under (namespace, key). Every
+    write is stamped with a new, increasing version, so a process can pick
+    up changes made by other processes with changes_since().
+    """
+
+    # True when other processes may write to the same store
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Dict) -> int:
+        """Store a value and return the version it was written at"""
+        raise NotImplementedError
+
+    def set_many(self, namespace: str, values: Dict[str, Dict]) -> int:
+        """Store values by key in one write and return the newest version written"""
+        raise NotImplementedError
+
+    def changes_since(self, namespace: str, version: int) -> Tuple[int, Dict[str, Dict]]:
+        """Values written after `version`, and the newest version seen"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStateStore(StateStore):
+    """Process-local state; only suitable for a single worker"""
+
+    def __init__(self):
+        self._values = {}  # (namespace, key) -> (version, value)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Dict]:
+        entry = self._values.get((namespace, key))
+        return entry[1] if entry is not None else None
+
+    def set(self, namespace: str, key: str, value: Dict) -> int:
+        with self._lock:
+            self._version += 1
+            self._values[(namespace, key)] = (self._version, value)
+            return self._version
+
+    def set_many(self, namespace: str, values: Dict[str, Dict]) -> int:
+        with self._lock:
+            for key, value in values.items():
+                self._version += 1
+                self._values[(namespace, key)] = (self._version, value)
+            return self._version
+
+    def changes_since(self, namespace: str, version: int) -> Tuple[int, Dict[str, Dict]]:
+        with self._lock:
+            changes = {
+                key: value for (ns, key), (written, value) in self._values.items()
+                if ns == namespace and written > version
+            }
+            newest = max((self._values[(namespace, key)][0] for key in changes), default=version)
+            return newest, changes
+
+
+class SQLiteStateStore(StateStore):
+    """State in a SQLite database in WAL mode, shared by every process using the file.
+
+    WAL lets readers in one worker proceed while another worker writes.
+    Versions are assigned under SQLite's write lock, so they increase in
+    commit order across processes.
+    """
+
+    def __init__(self, path: str = 'risk_state.db', timeout: float = 30):
+        self.path = path
+        self.shared = path != ':memory:'
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS shared_state ('
+                ' namespace TEXT NOT NULL,'
+                ' key TEXT NOT NULL,'
+                ' version INTEGER NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' PRIMARY KEY (namespace, key))'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_shared_state_version ON shared_state (version)'
+            )
+
+    def get(self, namespace: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM shared_state WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Dict) -> int:
+        with self._lock:
+            # Take the write lock up front so the version is read and written atomically
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = self._conn.execute(
+                    'INSERT INTO shared_state (namespace, key, version, value)'
+                    ' VALUES (?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM shared_state), ?)'
+                    ' ON CONFLICT (namespace, key) DO UPDATE'
+                    ' SET version = excluded.version, value = excluded.value'
+                    ' RETURNING version',
+                    (namespace, key, json.dumps(value))
+                ).fetchone()[0]
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return version
+
+    def set_many(self, namespace: str, values: Dict[str, Dict]) -> int:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = self._conn.execute(
+                    'SELECT COALESCE(MAX(version), 0) FROM shared_state'
+                ).fetchone()[0]
+                rows = []
+                for key, value in values.items():
+                    version += 1
+                    rows.append((namespace, key, version, json.dumps(value)))
+                self._conn.executemany(
+                    'INSERT INTO shared_state (namespace, key, version, value) VALUES (?, ?, ?, ?)'
+                    ' ON CONFLICT (namespace, key) DO UPDATE'
+                    ' SET version = excluded.version, value = excluded.value',
+                    rows
+                )
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return version
+
+    def changes_since(self, namespace: str, version: int) -> Tuple[int, Dict[str, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT key, version, value FROM shared_state'
+                ' WHERE version > ? AND namespace = ? ORDER BY version',
+                (version, namespace)
+            ).fetchall()
+        # Only versions actually read count as seen; later commits get higher ones
+        changes = {key: json.loads(value) for key, _, value in rows}
+        return (rows[-1][1] if rows else version), changes
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_state_store(settings: Dict) -> StateStore:
+    """Build the state backend described by the `state` config section"""
+    backend = settings.get('backend', 'memory')
+    if backend == 'memory':
+        return MemoryStateStore()
+    if backend == 'sqlite':
+        return SQLiteStateStore(path=settings.get('path', 'risk_state.db'))
+    raise ValueError(f"Unknown state backend: {backend}")
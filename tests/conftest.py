@@ -0,0 +1,102 @@
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+
+class StubHTTPServer:
+    """Local HTTP server answering JSON routes, standing in for upstream APIs"""
+
+    def __init__(self):
+        self.routes = {}  # path -> callable(params) -> (status, body)
+        self.requests = []
+        self.delay = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stub.requests.append((url.path, params))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                handler = stub.routes.get(url.path)
+                status, body = handler(params) if handler else (404, {})
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+@pytest.fixture
+def stub_server():
+    stub = StubHTTPServer()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+class StubSMTPServer:
+    """Minimal SMTP server recording delivered messages, standing in for aiosmtpd"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b'\r\n')
+
+            def handle(self):
+                stub.connections += 1
+                self.reply('220 stub ESMTP')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().strip().split(' ')[0].upper()
+                    if command == 'EHLO':
+                        self.reply('250-stub')
+                        self.reply('250 8BITMIME')
+                    elif command == 'DATA':
+                        self.reply('354 end with .')
+                        data = []
+                        while True:
+                            line = self.rfile.readline()
+                            if line in (b'.\r\n', b''):
+                                break
+                            data.append(line.decode())
+                        stub.messages.append(''.join(data))
+                        self.reply('250 OK')
+                    elif command == 'QUIT':
+                        self.reply('221 bye')
+                        return
+                    else:
+                        self.reply('250 OK')
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+@pytest.fixture
+def smtp_server():
+    stub = StubSMTPServer()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
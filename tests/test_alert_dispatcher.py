@@ -0,0 +1,91 @@
+import smtplib
+import pytest
+from services.alert_dispatcher import AlertDispatcher, SMTPConnectionPool, SMTPTransport
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def dispatcher(smtp_server, clock):
+    pool = SMTPConnectionPool('127.0.0.1', smtp_server.port, use_tls=False)
+    dispatcher = AlertDispatcher(
+        SMTPTransport(pool), 'risk@example.com', ['pm@example.com'],
+        coalesce_window=60, dedup_window=900, rate_limit=1.0, burst=5, clock=clock
+    )
+    yield dispatcher
+    dispatcher.transport.close()
+
+def test_coalesces_alerts_over_one_pooled_connection(dispatcher, smtp_server, clock):
+    dispatcher.submit('p1', 'high', 'Risk Alert: p1 - high', 'first')
+    dispatcher.submit('p1', 'critical', 'Risk Alert: p1 - critical', 'second')
+    assert dispatcher.flush() == 0  # still inside the coalescing window
+
+    clock.now += 61
+    assert dispatcher.flush() == 1
+    dispatcher.submit('p2', 'high', 'Risk Alert: p2 - high', 'third')
+    clock.now += 61
+    assert dispatcher.flush() == 1
+
+    assert len(smtp_server.messages) == 2
+    assert 'Subject: Risk Alert: p1 - critical (+1 more)' in smtp_server.messages[0]
+    assert 'first' in smtp_server.messages[0] and 'second' in smtp_server.messages[0]
+    assert smtp_server.connections == 1
+
+def test_deduplicates_same_level_alerts(dispatcher, smtp_server, clock):
+    assert dispatcher.submit('p1', 'high', 's', 'a')
+    assert not dispatcher.submit('p1', 'high', 's', 'b')
+    dispatcher.flush(force=True)
+    assert not dispatcher.submit('p1', 'high', 's', 'c')
+
+    clock.now += 901
+    assert dispatcher.submit('p1', 'high', 's', 'd')
+    assert dispatcher.stats['deduplicated'] == 2
+
+def test_rate_limit_defers_excess_messages(dispatcher, smtp_server, clock):
+    for i in range(8):
+        dispatcher.submit(f'p{i}', 'high', 's', 'body')
+
+    assert dispatcher.flush(force=True) == 5
+    assert dispatcher.pending_count() == 3
+    clock.now += 3
+    assert dispatcher.flush(force=True) == 3
+    assert len(smtp_server.messages) == 8
+
+def test_rate_limited_batches_stay_due(dispatcher, smtp_server, clock):
+    for i in range(8):
+        dispatcher.submit(f'p{i}', 'high', 's', 'body')
+
+    clock.now += 61
+    assert dispatcher.flush() == 5
+    clock.now += 3  # tokens refilled, well inside a new coalescing window
+    assert dispatcher.flush() == 3
+    assert dispatcher.pending_count() == 0
+
+def test_failed_sends_go_to_bounded_retry_queue(clock):
+    class FailingTransport:
+        def send(self, message):
+            raise smtplib.SMTPServerDisconnected('down')
+
+    dispatcher = AlertDispatcher(
+        FailingTransport(), 'risk@example.com', ['pm@example.com'],
+        retry_queue_size=2, max_retries=1, retry_backoff=10, burst=100, clock=clock
+    )
+    for i in range(3):
+        dispatcher.submit(f'p{i}', 'critical', 's', 'body')
+
+    dispatcher.flush(force=True)
+    assert dispatcher.pending_count() == 2
+    assert dispatcher.stats['dropped'] == 1
+
+    clock.now += 11
+    dispatcher.flush()
+    assert dispatcher.pending_count() == 0
+    assert dispatcher.stats['dropped'] == 3
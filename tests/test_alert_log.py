@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from agents.reporting import ReportingAgent
+from api import routes
+from storage.alert_log import AlertLog, make_alert
+
+def alert(project_id, severity, timestamp, score=0.5):
+    return make_alert(project_id, {
+        'level': severity, 'score': score,
+        'factors': {'financial': score}, 'timestamp': timestamp
+    })
+
+def filled_log():
+    log = AlertLog()
+    severities = ['low', 'medium', 'high', 'critical']
+    log.append_many([
+        alert(f'project-00{i % 2 + 1}', severities[i % 4], f'2024-01-01T00:{i:02d}:00')
+        for i in range(20)
+    ])
+    return log
+
+def test_query_pages_newest_first_by_cursor():
+    log = filled_log()
+    first = log.query(project_id='project-001', limit=4)
+    assert [a['timestamp'] for a in first['alerts']] == [
+        '2024-01-01T00:18:00', '2024-01-01T00:16:00', '2024-01-01T00:14:00', '2024-01-01T00:12:00'
+    ]
+    second = log.query(project_id='project-001', cursor=first['next_cursor'], limit=4)
+    third = log.query(project_id='project-001', cursor=second['next_cursor'], limit=4)
+    assert second['alerts'][0]['timestamp'] == '2024-01-01T00:10:00'
+    assert len(third['alerts']) == 2 and third['next_cursor'] is None
+    assert third['alerts'][-1]['factors'] == {'financial': 0.5}
+
+def test_query_filters_by_severity_and_time_range():
+    log = filled_log()
+    critical = log.query(severities=['critical'])['alerts']
+    assert [a['timestamp'][-5:] for a in critical] == ['19:00', '15:00', '11:00', '07:00', '03:00']
+
+    mixed = log.query(severities=['low', 'critical'], since='2024-01-01T00:08:00',
+                      until='2024-01-01T00:15:00')['alerts']
+    assert [(a['severity'], a['timestamp'][-5:]) for a in mixed] == [
+        ('critical', '15:00'), ('low', '12:00'), ('critical', '11:00'), ('low', '08:00')
+    ]
+    assert {a['severity'] for a in log.query(min_severity='high', limit=500)['alerts']} == {'high', 'critical'}
+    assert log.query(since='2025-01-01T00:00:00')['alerts'] == []
+
+    with pytest.raises(ValueError):
+        log.query(severities=['urgent'])
+
+def test_late_alerts_keep_their_timestamps_and_ids_are_not_reused():
+    log = AlertLog(retention_days=1)
+    first = log.append(alert('project-001', 'high', '2024-01-02T00:00:00'))
+    late = log.append(alert('project-001', 'high', '2024-01-01T00:00:00'))
+    assert late == first + 1
+    assert [a['timestamp'] for a in log.query()['alerts']] == ['2024-01-01T00:00:00', '2024-01-02T00:00:00']
+    assert [a['id'] for a in log.query(until='2024-01-01T12:00:00')['alerts']] == [late]
+    assert [a['id'] for a in log.query(since='2024-01-01T12:00:00')['alerts']] == [first]
+
+    assert log.compact(now=datetime(2024, 1, 10)) == 2
+    assert log.append(alert('project-001', 'low', '2024-01-10T00:00:00')) == late + 1
+
+def test_sent_alerts_are_served_by_the_alerts_endpoints():
+    agent = ReportingAgent()
+    agent.email_enabled = False
+    risk_data = {'score': 0.85, 'level': 'critical',
+                 'factors': {'financial': 0.9, 'schedule': 0.7, 'resources': 0.5, 'technical': 0.3},
+                 'timestamp': '2024-01-01T00:00:00'}
+    agent.send_alert('project-001', risk_data)
+
+    page = asyncio.run(routes.get_project_alerts(
+        'project-001', severity=None, min_severity='high', since=None, until=None,
+        cursor=None, limit=50, alert_log=agent.alert_log
+    ))
+    assert page['alerts'][0]['severity'] == 'critical'
+    assert 'project-001' in page['alerts'][0]['details']
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(routes.get_alerts(severity=['urgent'], min_severity=None, since=None, until=None,
+                                      cursor=None, limit=50, alert_log=agent.alert_log))
+    assert e.value.status_code == 422
@@ -0,0 +1,30 @@
+import asyncio
+import json
+from benchmarks.harness import compare, time_callable
+from benchmarks.load import asgi_request, load_test
+from main import app
+
+def test_asgi_load_test_reports_latency_percentiles():
+    status, body = asyncio.run(asgi_request(app, 'GET', '/api/project/project-001/risk'))
+    assert status == 200 and json.loads(body)['risk']['level']
+
+    result = asyncio.run(load_test(app, 'GET', '/api/project/project-001/risk',
+                                   requests=50, concurrency=5, warmup=1))
+    assert result['errors'] == 0 and result['requests'] == 50
+    assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+    assert result['rps'] > 0
+
+def test_compare_flags_regressions():
+    timing = time_callable(lambda: sum(range(100)), repeat=2, min_time=0.01)
+    assert timing['number'] >= 1 and timing['min'] <= timing['median']
+
+    baseline = {
+        'benchmarks': {'a': {'min': 1.0}, 'b': {'min': 1.0}},
+        'load': {'risk': {'p95_ms': 10.0, 'rps': 1000.0}}
+    }
+    current = {
+        'benchmarks': {'a': {'min': 1.1}, 'b': {'min': 1.5}, 'new': {'min': 9.0}},
+        'load': {'risk': {'p95_ms': 10.5, 'rps': 700.0}}
+    }
+    regressions = compare(baseline, current, threshold=0.2)
+    assert [(r['name'], r['metric']) for r in regressions] == [('b', 'min'), ('risk', 'rps')]
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+from agents.project_tracking import ProjectTrackingAgent
+from agents.risk_scoring import RiskScoringAgent
+from api import routes
+from services.chat import ChatResponder
+from services.ingestion import IngestionPipeline
+from services.summary_index import PortfolioSummaryIndex
+from storage.history import RingBufferHistoryStore
+from storage.state import SQLiteStateStore
+
+def risk(score, level, **factors):
+    return {'score': score, 'level': level, 'factors': factors or {'financial': score},
+            'timestamp': '2024-01-01T00:00:00'}
+
+def status(trend, health=0.5, **metrics):
+    return {'health_score': health, 'trend': trend, 'metrics': metrics,
+            'timestamp': '2024-01-01T00:00:00'}
+
+def filled_index():
+    index = PortfolioSummaryIndex()
+    for i, (score, level, trend) in enumerate([
+        (0.9, 'critical', 'deteriorating'), (0.7, 'high', 'deteriorating'),
+        (0.3, 'low', 'improving'), (0.5, 'medium', 'stable')
+    ]):
+        index.record_risk(f'project-00{i + 1}', risk(score, level, schedule=score, financial=score / 2))
+        index.record_status(f'project-00{i + 1}', status(trend, schedule_variance=0.25), [])
+    return index
+
+def test_index_keeps_aggregates_and_rankings_current():
+    index = filled_index()
+    assert [e['project_id'] for e in index.top_risks(2)] == ['project-001', 'project-002']
+    assert [e['project_id'] for e in index.top_risks(5, ['high', 'critical'])] == ['project-001', 'project-002']
+    count, entries = index.with_trend('deteriorating', 1)
+    assert count == 2 and entries[0]['project_id'] == 'project-001'
+
+    # A new score and trend move the project between groups
+    index.record_risk('project-001', risk(0.2, 'low'))
+    index.record_status('project-001', status('improving'), [{'type': 'budget_overrun', 'severity': 'high'}])
+    summary = index.summary()
+    assert summary['levels'] == {'low': 2, 'medium': 1, 'high': 1, 'critical': 0}
+    assert summary['trends'] == {'deteriorating': 1, 'improving': 2, 'stable': 1}
+    assert summary['anomalous'] == 1 and summary['mean_score'] == pytest.approx(0.425)
+    assert index.top_risks(1)[0]['project_id'] == 'project-002'
+    assert [e['project_id'] for e in index.with_trend('improving')[1]] == ['project-003', 'project-001']
+    assert index.with_anomalies()[0] == 1
+
+def test_index_loads_unknown_projects_once():
+    calls = []
+    def loader(project_id):
+        calls.append(project_id)
+        if project_id != 'project-009':
+            return None, None, None
+        return risk(0.8, 'high'), status('deteriorating'), [{'type': 'delay', 'severity': 'medium'}]
+
+    index = PortfolioSummaryIndex(project_loader=loader)
+    assert index.project('project-009')['anomalies'][0]['type'] == 'delay'
+    assert index.project('project-009')['score'] == 0.8
+    assert index.project('project-404') is None
+    assert calls == ['project-009', 'project-404']
+    assert index.with_trend('deteriorating')[0] == 1
+
+def test_answers_project_and_portfolio_questions():
+    responder = ChatResponder(filled_index())
+    reply = responder.answer("What is the risk?", 'project-001')
+    assert reply['intent'] == 'risk' and '0.90' in reply['response'] and 'critical' in reply['response']
+
+    reply = responder.answer("How is the schedule of project 2 looking?", 'project-001')
+    assert reply['project_id'] == 'project-002' and reply['data'] == {'schedule': 0.7}
+    assert '25%' in reply['response']
+
+    reply = responder.answer("Which projects are deteriorating?")
+    assert reply['intent'] == 'trend' and reply['data']['count'] == 2
+    assert [p['project_id'] for p in reply['data']['projects']] == ['project-001', 'project-002']
+
+    reply = responder.answer("Show me the top 1 riskiest projects")
+    assert [p['project_id'] for p in reply['data']['projects']] == ['project-001']
+    assert responder.answer("give me an overview")['data']['projects'] == 4
+    assert responder.answer("hi")['intent'] == 'help'
+    assert 'no data' in responder.answer("risk of project-077?")['response']
+
+def test_repeated_questions_hit_the_intent_cache():
+    responder = ChatResponder(filled_index(), intent_cache_size=8)
+    for project_id in ['project-001', 'project-002', 'project-003']:
+        responder.answer("Any  anomalies?", project_id)
+    responder.answer("any anomalies?")
+    assert (responder.hits, responder.misses) == (3, 1)
+
+def test_chat_route_rejects_non_string_text():
+    responder = ChatResponder(filled_index())
+    reply = asyncio.run(routes.handle_chat_message({'text': 'risk?', 'project_id': 'project-003'}, responder))
+    assert reply['project_id'] == 'project-003' and reply['data']['level'] == 'low'
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(routes.handle_chat_message({'text': 42}, responder))
+    assert error.value.status_code == 422
+
+def test_batched_risks_rank_like_single_ones():
+    import random
+    rng = random.Random(4)
+    levels = ['low', 'medium', 'high', 'critical']
+    single, batched = PortfolioSummaryIndex(), PortfolioSummaryIndex()
+    for size in [40, 3, 60]:
+        risks = {}
+        for _ in range(size):
+            score = round(rng.random(), 2)
+            risks[f'p{rng.randrange(50)}'] = risk(score, levels[min(int(score * 4), 3)])
+        for project_id, risk_data in risks.items():
+            single.record_risk(project_id, risk_data)
+        batched.record_risks(risks)
+
+        assert batched.summary() == single.summary()
+        assert batched.top_risks(50) == single.top_risks(50)
+        assert batched.top_risks(50, ['high', 'low']) == single.top_risks(50, ['high', 'low'])
+
+def test_bulk_ingest_keeps_anomalies_in_the_index():
+    index = PortfolioSummaryIndex()
+    pipeline = IngestionPipeline(
+        ProjectTrackingAgent(history_store=RingBufferHistoryStore(retention=100)),
+        RiskScoringAgent(), on_scored=index.record_risks, summary_index=index
+    )
+    rows = [{'project_id': f'p{i}', 'budget_variance': 0.1, 'schedule_variance': 0.5 if i == 1 else 0.1}
+            for i in range(3)]
+    body = ''.join(json.dumps(row) + '\n' for row in rows).encode()
+
+    async def chunks():
+        yield body
+    asyncio.run(pipeline.ingest(chunks()))
+
+    count, entries = index.with_anomalies()
+    assert count == 1 and entries[0]['project_id'] == 'p1'
+    assert 'p1' in ChatResponder(index).answer("any anomalies?")['response']
+
+def test_reload_refreshes_stale_status():
+    index = PortfolioSummaryIndex(project_loader=lambda project_id: (
+        None, dict(status('deteriorating'), timestamp='2024-01-02T00:00:00'), []
+    ))
+    index.record_status('project-001', status('stable'))
+    entry = index.project('project-001')
+    assert entry['trend'] == 'deteriorating' and entry['anomalies'] == []
+    assert index.with_trend('stable')[0] == 0
+
+def test_statuses_sync_between_workers(tmp_path):
+    path = str(tmp_path / 'state.db')
+    writer, reader = PortfolioSummaryIndex(sync_interval=0.01), PortfolioSummaryIndex(sync_interval=0.01)
+
+    async def run():
+        await writer.start(SQLiteStateStore(path))
+        await reader.start(SQLiteStateStore(path))
+        writer.record_statuses([
+            ('project-001', status('deteriorating'), [{'type': 'budget', 'severity': 'high'}])
+        ])
+        await asyncio.sleep(0.1)
+        await writer.stop()
+        await reader.stop()
+    asyncio.run(run())
+
+    assert reader.with_anomalies()[0] == 1
+    assert reader.project('project-001')['trend'] == 'deteriorating'
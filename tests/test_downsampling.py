@@ -0,0 +1,104 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from starlette.requests import Request
+from analytics.downsampling import downsample, lttb
+from api import routes
+from storage.history import RingBufferHistoryStore, SQLiteHistoryStore, to_micros
+
+START = datetime(2024, 1, 1)
+
+def updates(count, project_id='p', minutes=1, offset=0):
+    rng = np.random.default_rng(offset)
+    return [
+        (project_id, {
+            'timestamp': (START + timedelta(minutes=offset + i * minutes)).isoformat(),
+            'metrics': {'schedule_variance': float(rng.random())} if i % 3 else {'note': 'x'},
+            'health_score': float(rng.random()),
+            'trend': 'stable'
+        })
+        for i in range(count)
+    ]
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def history_store(request):
+    if request.param == 'memory':
+        store = RingBufferHistoryStore(retention=100000)
+    else:
+        store = SQLiteHistoryStore(':memory:')
+    yield store
+    store.close()
+
+def assert_matches_raw(store, name, lo, hi, buckets):
+    """Every bucket's statistics agree with the raw updates it covers"""
+    stats = store.aggregate('p', name, lo, hi, buckets)
+    timestamps, values = store.series('p', name, lo, hi)
+    index = np.searchsorted(stats['time'], timestamps, 'right') - 1
+    assert np.array_equal(np.bincount(index, minlength=len(stats['time'])), stats['count'])
+    for i in range(len(stats['time'])):
+        bucket = values[index == i]
+        assert (bucket.min(), bucket.max()) == (stats['min'][i], stats['max'][i])
+        assert np.isclose(bucket.sum(), stats['sum'][i])
+        assert timestamps[index == i][np.argmax(bucket == stats['max'][i])] == stats['max_time'][i]
+    return len(stats['time'])
+
+def test_aggregate_matches_raw_updates(history_store):
+    history_store.append_many(updates(5000, minutes=7))
+    lo, hi = to_micros('2024-01-02T03:04:05'), to_micros('2024-01-20T00:00:00')
+    for name in ['health_score', 'schedule_variance']:
+        for buckets in [3, 40, 400]:
+            assert 0 < assert_matches_raw(history_store, name, lo, hi, buckets) <= buckets + 1
+    assert history_store.aggregate('p', 'missing', lo, hi, 10)['count'].size == 0
+
+def test_sqlite_rollups_follow_late_updates():
+    store = SQLiteHistoryStore(':memory:')
+    store.append_many(updates(5000, minutes=7))
+    lo, hi = to_micros('2024-01-01T00:00:00'), to_micros('2024-01-25T00:00:00')
+    assert_matches_raw(store, 'health_score', lo, hi, 50)
+    assert store._conn.execute('SELECT COUNT(*) FROM history_rollups').fetchone()[0] > 0
+
+    # A late update inside the rolled-up range, then a newer one
+    store.append('p', {'timestamp': '2024-01-05T00:00:30', 'metrics': {}, 'health_score': 9.0, 'trend': 'stable'})
+    store.append_many(updates(100, minutes=7, offset=5000 * 7))
+    assert store.aggregate('p', 'health_score', lo, hi, 50)['max'].max() == 9.0
+    assert_matches_raw(store, 'health_score', lo, hi, 50)
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000) * 1000
+    y = np.zeros(1000)
+    y[437] = 5.0
+    chosen = lttb(x, y, 50)
+    assert len(chosen) == 50 and chosen[0] == 0 and chosen[-1] == 999
+    assert np.all(np.diff(chosen) > 0) and 437 in chosen
+    assert np.array_equal(lttb(x[:10], y[:10], 50), np.arange(10))
+
+def test_downsample_bounds_points(history_store):
+    history_store.append_many(updates(20000))
+    minmax = downsample(history_store, 'p', points=100)
+    assert minmax['total'] == 20000 and 50 <= minmax['points'] <= 101
+    assert sum(minmax['columns']['count']) == 20000
+
+    shape = downsample(history_store, 'p', 'schedule_variance', points=100, method='lttb')
+    assert shape['points'] == 100 and set(shape['columns']) == {'timestamp', 'value'}
+    assert shape['columns']['timestamp'] == sorted(shape['columns']['timestamp'])
+
+    window = downsample(history_store, 'p', start='2024-01-01T01:00:00', end='2024-01-01T01:59:00', points=500)
+    assert window['total'] == 60 and window['points'] == 60
+
+    with pytest.raises(ValueError):
+        downsample(history_store, 'p', method='average')
+
+def test_history_endpoint_returns_columns():
+    store = RingBufferHistoryStore()
+    store.append_many(updates(50, project_id='project-001'))
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []})
+
+    response = asyncio.run(routes.get_project_history(
+        'project-001', request, metric='health_score', start=None, end=None,
+        points=10, method='lttb', format='json', history=store
+    ))
+    body = json.loads(response.body)
+    assert body['total'] == 50 and len(body['columns']['value']) == 10
+    assert body['columns']['timestamp'][0] == to_micros(START.isoformat()) // 1000
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from agents.project_tracking import ProjectTrackingAgent
+from agents.risk_scoring import RiskScoringAgent
+from services.assessment import RiskAssessmentService
+from services.feature_store import FeatureStore
+from services.live_updates import LiveUpdateHub
+from services.market_refresher import MarketDataRefresher
+from services.report_pipeline import ReportPipeline
+from storage.history import RingBufferHistoryStore
+
+METRICS = {'budget_variance': 0.2, 'schedule_delay': 0.3, 'defect_rate': 0.1}
+
+class MarketAgent:
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+
+    async def analyze_market_trends(self):
+        return self.snapshots.pop(0)
+
+def test_vectors_invalidated_only_when_inputs_change():
+    store = FeatureStore(RiskScoringAgent(), sectors={'p1': 'retail'})
+    store.update_metrics('p1', METRICS)
+
+    first = store.get('p1')
+    assert 'market' not in first
+    assert store.get('p1') is first
+    assert (store.hits, store.misses) == (1, 1)
+
+    snapshot = {'market_volatility': 0.4, 'economic_outlook': 0.6, 'sector_risks': {'retail': 0.8}}
+    assert store.update_market(snapshot)
+    assert not store.update_market(dict(snapshot))  # same market risk: vectors stay valid
+    with_market = store.get('p1')
+    assert with_market['market'] == 0.5 * 0.8 + 0.5 * (0.4 + 0.4) / 2
+    assert store.get('p1') is with_market
+
+    store.update_metrics('p1', dict(METRICS, defect_rate=0.5))
+    assert store.get('p1')['technical'] > with_market['technical']
+    assert store.stats()['misses'] == 3 and store.stats()['hits'] == 2
+
+def test_cached_lookups_are_fast():
+    store = FeatureStore(RiskScoringAgent())
+    store.update_metrics_many([(f'p{i}', METRICS) for i in range(1000)])
+    ids = [f'p{i}' for i in range(1000)]
+    for project_id in ids:
+        store.get(project_id)
+
+    started = time.perf_counter()
+    for _ in range(20):
+        for project_id in ids:
+            store.get(project_id)
+    rate = 20000 / (time.perf_counter() - started)
+    assert rate > 10000
+    assert store.hits == 20000
+
+def test_market_risk_blends_into_scores():
+    risk_agent = RiskScoringAgent()
+    risk_agent.market_weight = 0.25
+    store = FeatureStore(risk_agent, sector_weight=1.0, sectors={'p1': 'retail'})
+    refresher = MarketDataRefresher(MarketAgent([
+        {'market_volatility': 0.2, 'economic_outlook': 0.5, 'sector_risks': {'retail': 0.9}}
+    ]), on_update=store.update_market)
+    asyncio.run(refresher.refresh())
+
+    store.update_metrics('p1', METRICS)
+    base = risk_agent.calculate_project_risk(METRICS)['score']
+    scored = risk_agent.score_features(store.get('p1'))
+    assert scored['factors']['market'] == 0.9
+    assert abs(scored['score'] - round(0.75 * base + 0.25 * 0.9, 2)) <= 0.01
+
+    # The portfolio path gives the same result from a market_risk column
+    portfolio = risk_agent.calculate_portfolio_risk(
+        {name: [value] for name, value in dict(METRICS, market_risk=0.9).items()}
+    )
+    assert portfolio['score'][0] == scored['score']
+
+class FakeReportingAgent:
+    def generate_risk_report(self, project_id, risk_data):
+        return f"{project_id}: {risk_data['level']}"
+
+def test_reads_are_served_from_cached_vectors():
+    risk_agent = RiskScoringAgent()
+    risk_agent.market_weight = 0.25
+    store = FeatureStore(risk_agent)
+    service = RiskAssessmentService(
+        ProjectTrackingAgent(history_store=RingBufferHistoryStore()), risk_agent,
+        ReportPipeline(FakeReportingAgent(), prerender=False, alert_levels=()), LiveUpdateHub(), store
+    )
+    assessed = service.assess('p1', METRICS)
+    for _ in range(3):
+        assert service.latest('p1') == assessed
+    assert (store.hits, store.misses) == (3, 1)
+
+    # A market change rebuilds the vector once, and the read rescores from it
+    store.update_market({'market_volatility': 0.8, 'economic_outlook': 0.2})
+    rescored = service.latest('p1')
+    assert rescored['factors']['market'] > 0 and rescored != assessed
+    assert service.latest('p1') == rescored
+    assert (store.hits, store.misses) == (4, 2)
+    # ...without publishing it
+    assert service.report_pipeline.latest_risk('p1') == assessed
+
+    # An assessment another worker made is served as it is
+    elsewhere = dict(assessed, score=0.9, level='critical', timestamp='2099-01-01T00:00:00')
+    service.report_pipeline.store_risks({'p1': elsewhere})
+    assert service.latest('p1') == elsewhere
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import pytest
+from agents.project_tracking import ProjectTrackingAgent
+from agents.risk_scoring import RiskScoringAgent
+from services.ingestion import IngestionPipeline
+from storage.history import RingBufferHistoryStore
+
+async def chunked(body: bytes, size: int = 7):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+@pytest.fixture
+def scored():
+    return {}
+
+@pytest.fixture
+def pipeline(scored):
+    return IngestionPipeline(
+        ProjectTrackingAgent(history_store=RingBufferHistoryStore(retention=100)),
+        RiskScoringAgent(),
+        on_scored=scored.update,
+        batch_size=3
+    )
+
+def test_ndjson_rows_are_validated_and_batched(pipeline, scored):
+    lines = [
+        {'project_id': 'p1', 'budget_variance': 0.2, 'schedule_variance': 0.1},
+        {'project_id': 'p2', 'schedule_delay': 0.5},
+        {'budget_variance': 0.3},
+        {'project_id': 'p1', 'budget_variance': 0.9, 'payment_delays': 1},
+        {'project_id': 'p3', 'tech_debt': 'high'}
+    ]
+    body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n{"project_id": "p2", "defect_rate": NaN}\n'
+
+    stats = asyncio.run(pipeline.ingest(chunked(body.encode())))
+
+    assert (stats['rows'], stats['accepted'], stats['rejected']) == (7, 3, 4)
+    assert [error['line'] for error in stats['errors']] == [3, 5, 6, 7]
+    assert [(b['accepted'], b['rejected']) for b in stats['batches']] == [(3, 1), (0, 3)]
+    assert pipeline.project_agent.history.count('p1') == 2
+    assert scored['p1'] == {
+        **RiskScoringAgent().calculate_project_risk({'budget_variance': 0.9, 'payment_delays': 1}),
+        'timestamp': scored['p1']['timestamp']
+    }
+
+def test_ndjson_lines_that_only_parse_together_are_rejected(pipeline, scored):
+    lines = [
+        '{"project_id": "p1", "budget_variance": [1',
+        '2]}',
+        '{"project_id": "p2", "budget_variance": 0.1},{"project_id": "p3", "budget_variance": 0.2}',
+        '{"project_id": "p4", "budget_variance": 0.3}'
+    ]
+    body = ('\n'.join(lines) + '\n').encode()
+
+    # All lines arrive in one chunk
+    stats = asyncio.run(pipeline.ingest(chunked(body, 1024)))
+
+    assert (stats['accepted'], stats['rejected']) == (1, 3)
+    assert [error['line'] for error in stats['errors']] == [1, 2, 3]
+    assert set(scored) == {'p4'}
+
+def test_csv_rows(pipeline, scored):
+    body = b'project_id,budget_variance,schedule_delay\np1,0.1,0.2\np2,,0.4\np3,0.1\n'
+
+    stats = asyncio.run(pipeline.ingest(chunked(body), fmt='csv'))
+
+    assert (stats['accepted'], stats['rejected']) == (2, 1)
+    assert pipeline.project_agent.get_project_status('p2')['metrics'] == {'schedule_delay': 0.4}
+    assert set(scored) == {'p1', 'p2'}
+
+def test_batch_health_scores_match_single_updates():
+    agent = ProjectTrackingAgent(history_store=RingBufferHistoryStore())
+    metrics = [
+        {'schedule_variance': i / 37, 'budget_variance': -i / 53, 'quality_metrics': i / 11}
+        for i in range(500)
+    ]
+    assert agent._calculate_health_scores(metrics) == [
+        agent._calculate_health_score(m) for m in metrics
+    ]
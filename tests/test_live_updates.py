@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from services.live_updates import LiveUpdateHub
+
+def make_risk(score, level='low', financial=0.1):
+    return {
+        'score': score,
+        'level': level,
+        'factors': {'financial': financial, 'schedule': 0.2, 'resources': 0.0, 'technical': 0.0},
+        'timestamp': '2024-01-01T00:00:00'
+    }
+
+def test_publishes_deltas_to_every_subscriber():
+    hub = LiveUpdateHub()
+
+    async def run():
+        queues = [hub.subscribe('p1') for _ in range(3)]
+        other = hub.subscribe('p2')
+        hub.publish_risk('p1', make_risk(0.1))
+        assert hub.publish_risk('p1', make_risk(0.1)) is None  # unchanged
+        hub.publish_risk('p1', make_risk(0.3, financial=0.6))
+        return [[q.get_nowait() for _ in range(q.qsize())] for q in queues], other.qsize()
+
+    received, other_size = asyncio.run(run())
+
+    assert other_size == 0
+    for events in received:
+        assert [event for event, _ in events] == ['risk', 'risk']
+        assert events[1][1] == {'score': 0.3, 'factors': {'financial': 0.6},
+                                'timestamp': '2024-01-01T00:00:00'}
+
+def test_stream_sends_snapshot_then_events():
+    hub = LiveUpdateHub()
+    hub.publish_risk('p1', make_risk(0.1))
+
+    async def run():
+        stream = hub.stream('p1')
+        snapshot = await stream.__anext__()
+        hub.publish_alert('p1', {'severity': 'high'})
+        alert = await stream.__anext__()
+        await stream.aclose()
+        return snapshot, alert
+
+    snapshot, alert = asyncio.run(run())
+    assert snapshot.startswith('event: snapshot\ndata: {"score": 0.1')
+    assert alert == 'event: alert\ndata: {"severity": "high"}\n\n'
+    assert hub.subscriber_count() == 0
+
+def test_polling_does_not_rescore():
+    from starlette.requests import Request
+    from api import routes
+    from api.dependencies import get_assessment_service
+    from services.response_cache import ResponseCache
+    assessments = get_assessment_service()
+    cache = ResponseCache()
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []})
+
+    async def run():
+        first = await routes.get_project_risk('project-001', request, assessments, cache)
+        second = await routes.get_project_risk('project-001', request, assessments, cache)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second.headers['etag'] == first.headers['etag']
+    assert second.body == first.body
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert assessments.project_agent.history.count('project-001') == 1
@@ -0,0 +1,216 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from agents.market_analysis import MarketAnalysisAgent
+from services.fetcher import AsyncFetcher
+from services.market_refresher import MarketDataRefresher
+from analytics.sentiment import SentimentScorer
+from analytics.indicators import IndicatorEngine
+
+def fred_route(series):
+    """Stub FRED observations endpoint honouring observation_start"""
+    def handler(params):
+        start = params.get('observation_start', '0000-00-00')
+        return (200, {'observations': [
+            {'date': day, 'value': value}
+            for day, value in series.get(params['series_id'], []) if day >= start
+        ]})
+    return handler
+
+@pytest.fixture
+def market_agent(stub_server, tmp_path):
+    stub_server.routes['/news'] = lambda params: (200, {'articles': [{'title': 'Markets rally'}]})
+    stub_server.routes['/fred'] = fred_route({})
+    fetcher = AsyncFetcher(timeout=2.0, retries=2, backoff=0.01, cache_ttl=60)
+    indicators = IndicatorEngine(fetcher, stub_server.url('/fred'), 'key', [{'id': 'GDP'}],
+                                 cache_dir=str(tmp_path / 'indicators'))
+    agent = MarketAnalysisAgent(fetcher=fetcher, indicators=indicators)
+    agent.sentiment.load()  # keep the one-time NLTK import out of timed requests
+    agent.data_sources = {
+        'financial_news': stub_server.url('/news'),
+        'economic_indicators': stub_server.url('/fred')
+    }
+    yield agent
+    fetcher.close()
+
+def test_sources_fetched_concurrently_without_blocking(market_agent, stub_server):
+    stub_server.delay = 0.3
+    ticks = []
+
+    async def run():
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        start = time.monotonic()
+        results = await market_agent.analyze_market_trends()
+        elapsed = time.monotonic() - start
+        ticking.cancel()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+
+    assert results['economic_outlook'] == 0.5
+    assert results['market_volatility'] < 0.5  # 'Markets rally' reads as positive news
+    assert elapsed < 0.55  # both 0.3s sources in parallel
+    assert len(ticks) > 10  # event loop kept running while fetching
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.1
+
+def test_cached_results_skip_network(market_agent, stub_server):
+    first = asyncio.run(market_agent.analyze_market_trends())
+    second = asyncio.run(market_agent.analyze_market_trends())
+
+    assert first == second
+    assert len(stub_server.requests) == 2
+
+def test_retries_transient_failures(stub_server):
+    calls = []
+
+    def flaky(params):
+        calls.append(params)
+        return (503, {}) if len(calls) < 3 else (200, {'ok': True})
+
+    stub_server.routes['/flaky'] = flaky
+    fetcher = AsyncFetcher(retries=2, backoff=0.01)
+    assert asyncio.run(fetcher.fetch_json('test', stub_server.url('/flaky'))) == {'ok': True}
+    assert len(calls) == 3
+    assert asyncio.run(fetcher.fetch_json('test', stub_server.url('/missing'))) is None
+    fetcher.close()
+
+class FakeMarketAgent:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def analyze_market_trends(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {'market_volatility': self.calls, 'sector_risks': {}, 'economic_outlook': 0.5}
+
+def test_refresher_serves_stale_while_revalidating():
+    now = [1000.0]
+    agent = FakeMarketAgent(delay=0.05)
+    refresher = MarketDataRefresher(agent, interval=3600, max_age=60, clock=lambda: now[0])
+
+    async def run():
+        first = await refresher.get()  # no data yet: waits for the first refresh
+        now[0] += 120
+        stale = await refresher.get()  # stale: returned immediately, refresh in background
+        await asyncio.sleep(0.1)
+        fresh = await refresher.get()
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(run())
+    assert first['data']['market_volatility'] == 1 and not first['stale']
+    assert stale['stale'] and stale['data']['market_volatility'] == 1
+    assert stale['age_seconds'] == 120
+    assert fresh['data']['market_volatility'] == 2 and not fresh['stale']
+
+def test_refresher_caps_concurrent_refreshes():
+    agent = FakeMarketAgent(delay=0.05)
+    refresher = MarketDataRefresher(agent, interval=3600, max_age=0, max_concurrent_refreshes=1)
+
+    async def run():
+        await asyncio.gather(*(refresher.refresh() for _ in range(10)))
+        await refresher.start()
+        await asyncio.sleep(0.1)
+        await refresher.stop()
+
+    asyncio.run(run())
+    assert agent.calls == 2  # one capped burst, one scheduled run
+
+def test_sentiment_scored_in_batches_and_cached():
+    scorer = SentimentScorer(batch_size=2)
+    articles = [
+        {'url': 'https://news/1', 'title': 'Markets rally as growth beats forecasts'},
+        {'url': 'https://news/2', 'title': 'Recession fears trigger a selloff'},
+        {'url': 'https://news/1', 'title': 'Markets rally as growth beats forecasts'},
+        {'title': 'Stable outlook', 'description': 'No change expected'}
+    ]
+
+    first = asyncio.run(scorer.score_articles(articles))
+    assert first[0] > 0.5 and first[1] < -0.5 and first[2] == first[0]
+    assert scorer.articles_scored == 3  # the repeated URL is scored once
+
+    second = asyncio.run(scorer.score_articles(articles + [{'title': 'Stable outlook', 'description': 'No change expected'}]))
+    assert second[:4] == first
+    assert scorer.articles_scored == 3  # everything came from the cache
+    scorer.close()
+
+def test_sentiment_loads_nltk_lazily():
+    import subprocess
+    import sys
+    code = "import sys, agents.market_analysis; print('nltk' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
+
+def test_indicators_sync_incrementally_and_serve_warm_from_cache(stub_server, tmp_path):
+    series = {
+        'GDP': [(f'2023-{month:02d}-01', str(100 + month)) for month in range(1, 7)],
+        'UNRATE': [(f'2023-{month:02d}-01', '4.0') for month in range(1, 7)] + [('2023-07-01', '.')]
+    }
+    stub_server.routes['/fred'] = fred_route(series)
+    now = [1000.0]
+    fetcher = AsyncFetcher(retries=0, cache_ttl=0)
+    engine = IndicatorEngine(
+        fetcher, stub_server.url('/fred'), 'key',
+        [{'id': 'GDP', 'direction': 1}, {'id': 'UNRATE', 'direction': -1}],
+        cache_dir=str(tmp_path), sync_interval=3600, window=6, clock=lambda: now[0]
+    )
+
+    assert asyncio.run(engine.sync()) == {'GDP': 6, 'UNRATE': 6}
+    outlook, features = asyncio.run(engine.outlook())  # warm: served from the cache
+    assert len(stub_server.requests) == 2
+    assert outlook > 0.5  # GDP rising, unemployment flat
+    assert features['GDP']['date'] == '2023-06-01' and features['GDP']['latest'] == 106
+    assert features['GDP']['trend'] == pytest.approx(1 / 103.5)
+    assert features['GDP']['zscore'] == pytest.approx(2.5 / np.std(np.arange(101, 107)))
+    assert features['UNRATE']['volatility'] == 0 and features['UNRATE']['zscore'] == 0
+
+    series['GDP'].append(('2023-07-01', '90'))
+    now[0] += 3600
+    assert asyncio.run(engine.sync()) == {'GDP': 1, 'UNRATE': 0}
+    assert stub_server.requests[-1][1]['observation_start'] == '2023-06-02'
+
+    # A new engine over the same cache directory resumes without refetching
+    restarted = IndicatorEngine(
+        fetcher, stub_server.url('/fred'), 'key', [{'id': 'GDP'}, {'id': 'UNRATE'}],
+        cache_dir=str(tmp_path), sync_interval=3600, window=6, clock=lambda: now[0]
+    )
+    _, features = asyncio.run(restarted.outlook())
+    assert len(stub_server.requests) == 4
+    assert features['GDP']['latest'] == 90 and features['GDP']['zscore'] < 0
+    fetcher.close()
+
+def test_failed_refresh_keeps_previous_snapshot(stub_server, tmp_path):
+    stub_server.routes['/news'] = lambda params: (200, {'articles': [{'title': 'Recession fears trigger a selloff'}]})
+    stub_server.routes['/fred'] = fred_route({})
+    fetcher = AsyncFetcher(retries=0, cache_ttl=0)
+    indicators = IndicatorEngine(fetcher, stub_server.url('/fred'), 'key', [{'id': 'GDP'}],
+                                 cache_dir=str(tmp_path), sync_interval=0)
+    agent = MarketAnalysisAgent(fetcher=fetcher, indicators=indicators)
+    agent.data_sources = {
+        'financial_news': stub_server.url('/news'),
+        'economic_indicators': stub_server.url('/fred')
+    }
+    now = [1000.0]
+    refresher = MarketDataRefresher(agent, interval=3600, max_age=60, clock=lambda: now[0])
+
+    good = asyncio.run(refresher.refresh())
+    assert good['market_volatility'] > 0.5
+
+    stub_server.routes['/news'] = lambda params: (500, {})
+    stub_server.routes['/fred'] = lambda params: (500, {})
+    now[0] += 120
+    assert asyncio.run(agent.analyze_market_trends()) == good  # the last good news is reused
+
+    fresh_agent = MarketAnalysisAgent(fetcher=fetcher, indicators=indicators)
+    fresh_agent.data_sources = agent.data_sources
+    refresher.market_agent = fresh_agent
+    asyncio.run(refresher.refresh())
+    snapshot = refresher.snapshot()
+    assert snapshot['data'] == good and snapshot['stale']
+    fetcher.close()
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+from benchmarks.load import asgi_request
+from main import app
+from utils.metrics import MetricsRegistry, timed, AGENT_METHOD_SECONDS
+from utils.profiler import SamplingProfiler
+
+def test_registry_renders_exposition_format():
+    registry = MetricsRegistry()
+    latency = registry.histogram('request_seconds', 'Request latency', ['route'], buckets=(0.1, 1.0))
+    errors = registry.counter('errors_total', 'Errors', ['source'])
+    depth = registry.callback('queue_depth', 'gauge', 'Queue depth', ['queue'])
+    latency.observe(0.05, '/a')
+    latency.observe(0.5, '/a')
+    errors.inc(2, 'fred')
+    depth.set_function(lambda: 3, 'alerts')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE request_seconds histogram' in lines
+    assert 'request_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'request_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'request_seconds_count{route="/a"} 2' in lines
+    assert 'errors_total{source="fred"} 2' in lines
+    assert 'queue_depth{queue="alerts"} 3' in lines
+
+def test_timed_records_sync_and_async_calls():
+    @timed(name='test.double')
+    def double(x):
+        return 2 * x
+
+    @timed(name='test.slow')
+    async def slow():
+        await asyncio.sleep(0.01)
+
+    assert double(2) == 4
+    asyncio.run(slow())
+    assert sum(AGENT_METHOD_SECONDS.labels('test.double').counts) == 1
+    assert AGENT_METHOD_SECONDS.labels('test.slow').sum >= 0.01
+
+def test_metrics_endpoint_reports_routes_and_caches():
+    asyncio.run(asgi_request(app, 'GET', '/api/project/project-001/risk'))
+    status, body = asyncio.run(asgi_request(app, 'GET', '/metrics'))
+    text = body.decode()
+    assert status == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/project/{project_id}/risk",status="200"}' in text
+    assert 'agent_method_duration_seconds_count{method="ProjectTrackingAgent.get_project_status"}' in text
+    assert 'background_queue_depth{queue="report_renders"}' in text
+    assert 'cache_hits_total{cache="feature_vectors"}' in text
+
+def test_sampling_profiler_captures_folded_stacks():
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name='busy')
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    assert profiler.start()
+    assert not profiler.start()  # already running
+    time.sleep(0.1)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert profiler.samples > 10 and not profiler.running
+    stacks = profiler.folded().splitlines()
+    assert any(line.startswith('busy;') and 'busy_loop' in line for line in stacks)
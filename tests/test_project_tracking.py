@@ -0,0 +1,171 @@
+import pytest
+from agents.project_tracking import ProjectTrackingAgent
+from storage.history import RingBufferHistoryStore, SQLiteHistoryStore
+from analytics.trend import TrendTracker
+from analytics.anomaly import AnomalyEngine
+
+ANOMALY_RULES = [
+    {'metric': 'cost', 'method': 'zscore', 'threshold': 3.0},
+    {'metric': 'cost', 'method': 'ewma', 'alpha': 0.3, 'threshold': 3.0},
+    {'metric': 'velocity', 'method': 'cusum', 'drift': 0.5, 'threshold': 4.0}
+]
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def history_store(request):
+    if request.param == 'memory':
+        store = RingBufferHistoryStore(retention=5)
+    else:
+        store = SQLiteHistoryStore(':memory:')
+    yield store
+    store.close()
+
+@pytest.fixture
+def project_agent(history_store):
+    return ProjectTrackingAgent(history_store=history_store)
+
+def test_status_roundtrip(project_agent):
+    metrics = {'schedule_variance': 0.1, 'budget_variance': -0.2, 'quality_metrics': 0.9}
+    update = project_agent.update_project_status('project-001', metrics)
+
+    status = project_agent.get_project_status('project-001')
+    assert status == update
+    assert project_agent.get_project_status('unknown') == {}
+
+def test_trend_detection(project_agent):
+    trends = [
+        project_agent.update_project_status('p', {'schedule_variance': v})['trend']
+        for v in [0.8, 0.6, 0.4, 0.2, 0.0]
+    ]
+    assert trends[:2] == ['neutral', 'neutral']
+    assert trends[2:] == ['improving', 'improving', 'improving']
+
+def test_ring_buffer_retention():
+    store = RingBufferHistoryStore(retention=3)
+    agent = ProjectTrackingAgent(history_store=store)
+    for i in range(10):
+        agent.update_project_status('p', {'quality_metrics': i / 10})
+
+    assert store.count('p') == 3
+    assert [h['metrics']['quality_metrics'] for h in store.query('p')] == [0.7, 0.8, 0.9]
+
+def test_sqlite_history_persists(tmp_path):
+    path = str(tmp_path / 'history.db')
+    agent = ProjectTrackingAgent(history_store=SQLiteHistoryStore(path))
+    update = agent.update_project_status('p', {'quality_metrics': 0.5})
+    agent.history.close()
+
+    reopened = SQLiteHistoryStore(path)
+    assert reopened.latest('p') == update
+    assert reopened.query('p', start=update['timestamp'], end=update['timestamp']) == [update]
+    reopened.close()
+
+def test_trend_tracker_matches_full_recompute():
+    import random
+    import statistics
+    rng = random.Random(7)
+    tracker = TrendTracker(window=6, ewma_alpha=0.5)
+    scores = []
+    for _ in range(3000):
+        score = rng.random()
+        scores.append(score)
+        tracker.push(score)
+
+        window = scores[-6:]
+        n = len(window)
+        if n >= 2:
+            x_mean = (n - 1) / 2
+            y_mean = sum(window) / n
+            slope = (
+                sum((x - x_mean) * (y - y_mean) for x, y in enumerate(window))
+                / sum((x - x_mean) ** 2 for x in range(n))
+            )
+            assert tracker.slope == pytest.approx(slope, abs=1e-9)
+        assert tracker.mean == pytest.approx(statistics.fmean(window))
+        assert tracker.stddev == pytest.approx(statistics.pstdev(window), abs=1e-7)
+
+def test_trend_resumes_from_persisted_history(tmp_path):
+    path = str(tmp_path / 'history.db')
+    agent = ProjectTrackingAgent(history_store=SQLiteHistoryStore(path))
+    for v in [0.8, 0.6]:
+        agent.update_project_status('p', {'schedule_variance': v})
+    agent.history.close()
+
+    restarted = ProjectTrackingAgent(history_store=SQLiteHistoryStore(path))
+    assert restarted.update_project_status('p', {'schedule_variance': 0.4})['trend'] == 'improving'
+    assert restarted.get_trend_statistics('p')['count'] == 3
+    restarted.history.close()
+
+def test_anomaly_engine_flags_spike_and_shift():
+    engine = AnomalyEngine(ANOMALY_RULES, window=10, min_points=5)
+    state = engine.new_state()
+    fired = []
+    for i in range(40):
+        cost = 1.0 + 0.01 * (i % 3) + (5.0 if i == 20 else 0.0)
+        velocity = 1.0 + 0.01 * (i % 2) - (0.5 if i >= 30 else 0.0)
+        fired.append({a['rule'] for a in engine.update(state, {'cost': cost, 'velocity': velocity})})
+
+    assert fired[20] >= {'cost_zscore', 'cost_ewma'}
+    assert not any(fired[:20])
+    assert 'velocity_cusum' in set().union(*fired[30:])
+
+def test_anomaly_backfill_matches_incremental():
+    import numpy as np
+    rng = np.random.default_rng(3)
+    engine = AnomalyEngine(ANOMALY_RULES, window=12, min_points=4, chunk_size=7)
+    series = {
+        'cost': rng.normal(1.0, 0.2, (20, 80)) + (rng.random((20, 80)) < 0.03) * 3,
+        'velocity': rng.normal(0.0, 1.0, (20, 80)).cumsum(axis=1) * 0.1
+    }
+    series['cost'][rng.random((20, 80)) < 0.1] = np.nan  # updates without the metric
+    flags = engine.backfill(series)
+
+    for row in range(20):
+        state = engine.new_state()
+        for point in range(80):
+            fired = {a['rule'] for a in engine.update(
+                state, {metric: values[row, point] for metric, values in series.items()}
+            )}
+            assert fired == {name for name, flagged in flags.items() if flagged[row, point]}
+
+def test_anomaly_update_many_matches_incremental():
+    import numpy as np
+    rng = np.random.default_rng(5)
+    engine = AnomalyEngine(ANOMALY_RULES, window=12, min_points=4)
+    engine.RESYNC_INTERVAL = 16
+    batched = [engine.new_state() for _ in range(100)]
+    single = [engine.new_state() for _ in range(100)]
+    for _ in range(12):
+        # Most projects once per batch, a few many times
+        projects = np.concatenate([rng.permutation(100)[:80], rng.integers(0, 3, 40)])
+        values = {
+            'cost': rng.normal(1.0, 0.2, len(projects)) + (rng.random(len(projects)) < 0.05) * 3,
+            'velocity': rng.normal(0.0, 1.0, len(projects)) + np.where(projects < 3, 2.0, 0.0)
+        }
+        values['cost'][rng.random(len(projects)) < 0.1] = np.nan
+        found = engine.update_many([batched[p] for p in projects.tolist()], values)
+        expected = [
+            engine.update(single[p], {metric: column[i] for metric, column in values.items()})
+            for i, p in enumerate(projects.tolist())
+        ]
+        assert found == expected
+
+@pytest.mark.parametrize('make_store', [RingBufferHistoryStore, lambda: SQLiteHistoryStore(':memory:')])
+def test_detect_anomalies_includes_engine_results(make_store):
+    project_agent = ProjectTrackingAgent(history_store=make_store())
+    project_agent.anomaly_engine = AnomalyEngine(
+        [{'metric': 'health_score', 'method': 'zscore', 'threshold': 3.0, 'severity': 'high'}],
+        window=10, min_points=5
+    )
+    for i in range(12):
+        project_agent.update_project_status('p', {'quality_metrics': 0.5 + 0.01 * (i % 2)})
+    assert project_agent.detect_anomalies('p') == []
+
+    project_agent.update_project_status('p', {'quality_metrics': 0.5, 'schedule_variance': 0.9})
+    anomalies = project_agent.detect_anomalies('p')
+    assert [a['type'] for a in anomalies] == ['schedule', 'health_score']
+
+    # Detector state rebuilt from history agrees with the incremental result
+    project_agent._anomaly_states.clear()
+    project_agent._anomalies.clear()
+    assert project_agent.detect_anomalies('p') == anomalies
+    assert project_agent.backfill_anomalies(['p']) == {'p': {'health_score_zscore': [12]}}
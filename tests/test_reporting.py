@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from agents.reporting import ReportingAgent
+from services.report_pipeline import ReportPipeline
+
+@pytest.fixture
+def reporting_agent():
+    return ReportingAgent()
+
+@pytest.fixture
+def risk_data():
+    return {
+        'score': 0.72,
+        'level': 'high',
+        'factors': {'financial': 0.6, 'schedule': 0.5, 'resources': 0.2, 'technical': 0.1},
+        'timestamp': '2024-01-01T00:00:00'
+    }
+
+def test_report_contains_risk_data(reporting_agent, risk_data):
+    report = reporting_agent.generate_risk_report('project-001', risk_data)
+
+    assert 'Risk Report for project-001' in report
+    assert '0.72 (high)' in report
+    assert 'Review project budget and payment terms' in report
+
+def test_unchanged_risk_data_is_not_rerendered(reporting_agent, risk_data, monkeypatch):
+    first = reporting_agent.generate_risk_report('project-001', risk_data)
+    monkeypatch.setattr(reporting_agent, '_generate_recommendations', None)
+    second = reporting_agent.generate_risk_report('project-001', dict(risk_data, timestamp='later'))
+
+    assert second is first
+    assert reporting_agent.report_cache.hits == 1
+
+def test_templates_compiled_once(reporting_agent, risk_data):
+    template = reporting_agent.env.get_template('risk_report.html')
+    reporting_agent.generate_risk_report('p1', risk_data)
+    reporting_agent.generate_risk_report('p2', risk_data)
+
+    assert reporting_agent.env.get_template('risk_report.html') is template
+
+def test_template_directory_and_autoescape(tmp_path, risk_data):
+    (tmp_path / 'risk_report.html').write_text('<p>{{ project_id }}: {{ risk_level }}</p>')
+    agent = ReportingAgent(template_dir=str(tmp_path))
+
+    report = agent.generate_risk_report('<b>x</b>', risk_data)
+    assert report == '<p>&lt;b&gt;x&lt;/b&gt;: high</p>'
+
+def test_pipeline_defers_alerts_and_rendering(reporting_agent, risk_data, monkeypatch):
+    sent = []
+    monkeypatch.setattr(reporting_agent, 'send_alert', lambda pid, data: sent.append(pid) or True)
+    pipeline = ReportPipeline(reporting_agent, alert_workers=2)
+
+    async def run():
+        pipeline.record_risk('project-001', risk_data)
+        pipeline.record_risk('project-002', dict(risk_data, level='low'))
+        assert sent == [] and len(reporting_agent.report_cache) == 0
+        await pipeline.start()
+        await pipeline.join()
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+    assert sent == ['project-001']
+    assert len(reporting_agent.report_cache) == 2
+    pipeline.get_report('project-001')
+    assert reporting_agent.report_cache.hits == 1
+    assert pipeline.get_report('unknown') is None
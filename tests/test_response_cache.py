@@ -0,0 +1,74 @@
+import asyncio
+import gzip
+import json
+from starlette.requests import Request
+from api import routes
+from api.conditional import conditional_response, make_etag
+from api.dependencies import get_assessment_service, get_report_pipeline
+from services.response_cache import ResponseCache, accepted_encodings
+
+def make_request(**headers):
+    return Request({
+        'type': 'http', 'method': 'GET', 'path': '/',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]
+    })
+
+def test_accepted_encodings_orders_by_quality():
+    assert accepted_encodings(None) == ['identity']
+    assert accepted_encodings('gzip, deflate')[0] == 'gzip'
+    assert accepted_encodings('gzip;q=0.5, identity') == ['identity', 'gzip']
+    assert accepted_encodings('gzip;q=0') == ['identity']
+
+def test_cache_keeps_newest_version_and_compressed_variants():
+    cache = ResponseCache(min_compress_size=10)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return b'{"score": 0.5}' * 20
+
+    body, coding = cache.body('risk:p1', 'v1', ['gzip', 'identity'], render)
+    assert coding == 'gzip'
+    assert gzip.decompress(body) == b'{"score": 0.5}' * 20
+    assert cache.body('risk:p1', 'v1', ['gzip'], render) == (body, 'gzip')
+    assert cache.body('risk:p1', 'v1', ['identity'], render)[1] == 'identity'
+    assert len(renders) == 1
+
+    cache.body('risk:p1', 'v2', ['identity'], render)
+    assert len(renders) == 2 and len(cache) == 1
+    assert (cache.hits, cache.misses) == (2, 2)
+
+def test_conditional_get_returns_304_for_current_version():
+    cache = ResponseCache()
+    args = (cache, 'risk:p1', '2024-01-01T00:00:00', '2024-01-01T00:00:00', 'application/json', lambda: b'{}')
+
+    response = conditional_response(make_request(), *args)
+    etag = response.headers['etag']
+    assert response.status_code == 200 and etag == make_etag('risk:p1', '2024-01-01T00:00:00')
+
+    assert conditional_response(make_request(if_none_match=etag), *args).status_code == 304
+    assert conditional_response(make_request(if_none_match='W/"other"'), *args).status_code == 200
+    last_modified = response.headers['last-modified']
+    assert conditional_response(make_request(if_modified_since=last_modified), *args).status_code == 304
+
+def test_risk_and_report_change_version_on_status_update():
+    assessments = get_assessment_service()
+    cache = ResponseCache()
+
+    async def get(route, *extra, **headers):
+        return await route('project-002', make_request(**headers), *extra, assessments, cache)
+
+    async def run():
+        risk = await get(routes.get_project_risk)
+        report = await get(routes.get_project_report, get_report_pipeline(), accept_encoding='gzip')
+        unchanged = await get(routes.get_project_risk, if_none_match=risk.headers['etag'])
+        assessments.assess('project-002', {'budget_variance': 0.4, 'schedule_variance': 0.3})
+        changed = await get(routes.get_project_risk, if_none_match=risk.headers['etag'])
+        return risk, report, unchanged, changed
+
+    risk, report, unchanged, changed = asyncio.run(run())
+    assert report.headers['content-encoding'] == 'gzip'
+    assert b'project-002' in gzip.decompress(report.body)
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200 and changed.headers['etag'] != risk.headers['etag']
+    assert json.loads(changed.body)['metrics']['budget_variance'] == 0.4
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from agents.risk_scoring import RiskScoringAgent, INPUT_METRICS
+from analytics.risk_model import LinearModelBackend, train_risk_model
+from storage.history import RingBufferHistoryStore
+
+def make_history(projects=20, updates=30):
+    """History whose next-update risk is a known linear function of the inputs"""
+    rng = np.random.default_rng(0)
+    history = RingBufferHistoryStore(retention=updates)
+    for p in range(projects):
+        risk = 0.0
+        for u in range(updates):
+            metrics = {metric: float(rng.uniform(0, 0.5)) for metric in INPUT_METRICS}
+            history.append(f"p{p}", {
+                'timestamp': f"2024-01-01T00:00:{u:02d}",
+                'metrics': metrics,
+                'health_score': 1 - risk,
+                'trend': 'stable'
+            })
+            risk = 0.1 + 0.6 * metrics['schedule_delay'] + 0.4 * metrics['defect_rate']
+    return history
+
+def test_trained_model_predicts_next_risk(tmp_path):
+    path = str(tmp_path / 'model.npy')
+    metadata = train_risk_model(make_history(), path, INPUT_METRICS, alpha=1e-6)
+    assert metadata['samples'] == 20 * 29
+    assert metadata['r2'] > 0.99
+
+    backend = LinearModelBackend(path)
+    assert backend._weights is None  # nothing loaded until the first score
+    agent = RiskScoringAgent(backend=backend)
+    project = dict.fromkeys(INPUT_METRICS, 0.1) | {'schedule_delay': 0.5, 'defect_rate': 0.25}
+    result = agent.calculate_project_risk(project)
+    assert result['score'] == pytest.approx(0.1 + 0.3 + 0.1, abs=0.01)
+    assert isinstance(backend._weights, np.memmap)
+    assert set(result['factors']) == {'financial', 'schedule', 'resources', 'technical'}
+
+def test_linear_batches_match_single_project_scores(tmp_path):
+    path = str(tmp_path / 'model.npy')
+    train_risk_model(make_history(), path, INPUT_METRICS)
+    agent = RiskScoringAgent(backend=LinearModelBackend(path))
+
+    rng = np.random.default_rng(1)
+    columns = {metric: rng.uniform(0, 2, 5000) for metric in INPUT_METRICS}
+    results = agent.calculate_portfolio_risk(columns)
+    for i in range(0, 5000, 97):
+        single = agent.calculate_project_risk({metric: float(columns[metric][i]) for metric in INPUT_METRICS})
+        assert results['score'][i] == single['score']
+        assert results['level'][i] == single['level']
+
+def test_training_needs_history(tmp_path):
+    with pytest.raises(ValueError):
+        train_risk_model(RingBufferHistoryStore(), str(tmp_path / 'model.npy'), INPUT_METRICS)
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from datetime import datetime
 from agents.risk_scoring import RiskScoringAgent
 
@@ -59,4 +60,39 @@ def test_timestamp_format(risk_agent):
 def test_factor_weights(risk_agent):
     # Verify weights sum to 1.0
     total_weight = sum(risk_agent.risk_factors.values())
-    assert abs(total_weight - 1.0) < 0.0001  # Account for floating point precision
\ No newline at end of file
+    assert abs(total_weight - 1.0) < 0.0001  # Account for floating point precision
+
+def test_portfolio_risk_matches_per_project(risk_agent):
+    rng = np.random.default_rng(42)
+    size = 2000
+    portfolio = {
+        'budget_variance': rng.uniform(-0.5, 0.5, size),
+        'payment_delays': rng.integers(0, 4, size),
+        'schedule_delay': rng.uniform(0, 1, size),
+        'missed_milestones': rng.integers(0, 3, size),
+        'attrition_rate': rng.uniform(0, 0.5, size),
+        'skill_gaps': rng.uniform(0, 0.5, size),
+        'defect_rate': rng.uniform(0, 0.5, size),
+        'tech_debt': rng.uniform(0, 0.5, size)
+    }
+
+    batch = risk_agent.calculate_portfolio_risk(portfolio)
+
+    for i in range(size):
+        row = {metric: values[i].item() for metric, values in portfolio.items()}
+        single = risk_agent.calculate_project_risk(row)
+        assert batch['score'][i] == single['score']
+        assert batch['level'][i] == single['level']
+        for factor, score in single['factors'].items():
+            assert batch['factors'][factor][i] == score
+
+def test_portfolio_risk_structured_array(risk_agent):
+    portfolio = np.zeros(3, dtype=[('budget_variance', 'f8'), ('payment_delays', 'f8')])
+    portfolio['budget_variance'] = [0.1, -0.4, 2.0]
+    portfolio['payment_delays'] = [0, 1, 3]
+
+    result = risk_agent.calculate_portfolio_risk(portfolio)
+
+    assert result['score'].shape == (3,)
+    assert list(result['factors']['financial']) == [0.05, 0.7, 1.0]
+    assert list(result['level']) == ['low', 'low', 'medium']
@@ -0,0 +1,126 @@
+import multiprocessing
+import pytest
+from agents.project_tracking import ProjectTrackingAgent
+from agents.risk_scoring import RiskScoringAgent
+from services.assessment import RiskAssessmentService
+from services.feature_store import FeatureStore
+from services.live_updates import LiveUpdateHub
+from services.report_pipeline import ReportPipeline
+from storage.history import RingBufferHistoryStore, SQLiteHistoryStore
+from storage.state import SQLiteStateStore
+
+class FakeReportingAgent:
+    def generate_risk_report(self, project_id, risk_data):
+        return f"{project_id}: {risk_data['level']}"
+
+def make_worker(tmp_path):
+    """Agents and services as one uvicorn worker process would build them"""
+    state = SQLiteStateStore(str(tmp_path / 'state.db'))
+    project_agent = ProjectTrackingAgent(SQLiteHistoryStore(str(tmp_path / 'history.db')))
+    pipeline = ReportPipeline(FakeReportingAgent(), prerender=False, alert_levels=(),
+                              state_store=state)
+    risk_agent = RiskScoringAgent()
+    return RiskAssessmentService(project_agent, risk_agent, pipeline, LiveUpdateHub(),
+                                 FeatureStore(risk_agent))
+
+def assess_in_worker(tmp_path, project_id, metrics):
+    make_worker(tmp_path).assess(project_id, metrics)
+
+def test_state_versions_across_connections(tmp_path):
+    writer = SQLiteStateStore(str(tmp_path / 'state.db'))
+    reader = SQLiteStateStore(str(tmp_path / 'state.db'))
+
+    first = writer.set('risk', 'p1', {'score': 0.1})
+    version, changes = reader.changes_since('risk', 0)
+    assert (version, changes) == (first, {'p1': {'score': 0.1}})
+
+    writer.set('market', 'snapshot', {'data': None})
+    second = writer.set('risk', 'p1', {'score': 0.2})
+    assert second > first
+    assert reader.changes_since('risk', version) == (second, {'p1': {'score': 0.2}})
+    assert reader.changes_since('risk', second) == (second, {})
+
+def test_workers_share_history_and_trends(tmp_path):
+    workers = [make_worker(tmp_path), make_worker(tmp_path)]
+    single = ProjectTrackingAgent(RingBufferHistoryStore())
+
+    trends, expected = [], []
+    for i, variance in enumerate([0.8, 0.6, 0.4, 0.2, 0.0, 0.3]):
+        metrics = {'schedule_variance': variance}
+        # Alternate workers, as a load balancer would
+        workers[i % 2].assess('p', metrics)
+        trends.append(workers[(i + 1) % 2].project_agent.get_project_status('p')['trend'])
+        expected.append(single.update_project_status('p', metrics)['trend'])
+
+    assert trends == expected
+    assert workers[0].latest('p') == workers[1].latest('p')
+    assert workers[0].report_pipeline.get_report('p') == workers[1].report_pipeline.get_report('p')
+
+def test_assessment_from_another_process_is_visible(tmp_path):
+    context = multiprocessing.get_context('fork')
+    process = context.Process(
+        target=assess_in_worker, args=(tmp_path, 'p', {'budget_variance': 0.9, 'payment_delays': 3})
+    )
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+    worker = make_worker(tmp_path)
+    assert worker.project_agent.history.count('p') == 1
+    assert worker.latest('p')['level'] == worker.risk_agent.calculate_project_risk(
+        {'budget_variance': 0.9, 'payment_delays': 3}
+    )['level']
+
+def test_trend_statistics_match_a_single_worker(tmp_path):
+    path = str(tmp_path / 'history.db')
+    workers = [ProjectTrackingAgent(SQLiteHistoryStore(path)) for _ in range(2)]
+    single = ProjectTrackingAgent(RingBufferHistoryStore())
+
+    for i in range(12):
+        metrics = {'schedule_variance': (i % 5) / 5}
+        workers[i % 3 % 2].update_project_status('p', metrics)
+        single.update_project_status('p', metrics)
+
+    expected = single.get_trend_statistics('p')
+    for worker in workers:
+        # Running statistics, EWMA included, carry over instead of being reseeded
+        assert worker.get_trend_statistics('p') == pytest.approx(expected)
+
+def test_anomaly_state_catches_up_without_replaying_history(tmp_path):
+    path = str(tmp_path / 'history.db')
+    workers = [ProjectTrackingAgent(SQLiteHistoryStore(path)) for _ in range(2)]
+    single = ProjectTrackingAgent(RingBufferHistoryStore())
+    replayed = []
+    for worker in workers:
+        metric_history = worker.history.metric_history
+        worker.history.metric_history = lambda pid, names, count=None, f=metric_history: (
+            replayed.append(count) or f(pid, names, count)
+        )
+
+    for i in range(24):
+        metrics = {'schedule_variance': 0.1 + (i % 3) / 100, 'budget_variance': 0.1,
+                   'quality_metrics': 0.0 if i == 23 else 0.9 + (i % 2) / 100}
+        workers[i % 3 % 2].update_project_status('p', metrics)
+        single.update_project_status('p', metrics)
+
+    expected = [a['rule'] for a in single.detect_anomalies('p') if 'rule' in a]
+    assert 'health_score_zscore' in expected
+    for worker in workers:
+        assert [a['rule'] for a in worker.detect_anomalies('p') if 'rule' in a] == expected
+    # Each worker replayed the (empty) history once, then only the updates it missed
+    assert replayed.count(workers[0].anomaly_seed_points) == 2
+    assert max(count for count in replayed if count != workers[0].anomaly_seed_points) <= 2
+
+def test_history_counts_are_kept_per_project(tmp_path):
+    path = str(tmp_path / 'history.db')
+    update = {'timestamp': '2024-01-01T00:00:00', 'health_score': 0.5, 'trend': 'stable', 'metrics': {}}
+    store = SQLiteHistoryStore(path)
+    store.append_many([('a', update), ('b', update), ('a', update)])
+    other = SQLiteHistoryStore(path)
+    other.append('a', update)
+    assert (store.count('a'), store.count('b'), store.count('c')) == (3, 1, 0)
+
+    # Histories written before the counts were kept get them on open
+    with store._conn:
+        store._conn.execute('DROP TABLE project_counts')
+    assert SQLiteHistoryStore(path).count('a') == 3
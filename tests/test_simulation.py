@@ -0,0 +1,109 @@
+import asyncio
+import json
+import random
+import numpy as np
+import pytest
+from agents.project_tracking import ProjectTrackingAgent
+from agents.risk_scoring import INPUT_METRICS, RiskScoringAgent
+from analytics.risk_model import LinearModelBackend, RuleBasedBackend, metadata_path
+from analytics.simulation import MonteCarloSimulator, ScenarioModel
+from benchmarks.load import asgi_request
+from storage.history import RingBufferHistoryStore
+
+@pytest.fixture(scope='module')
+def project_agent():
+    agent = ProjectTrackingAgent(history_store=RingBufferHistoryStore(retention=50))
+    rng = random.Random(5)
+    for step in range(30):
+        for i in range(3):
+            agent.update_project_status(f'p{i}', {
+                'budget_variance': rng.gauss(0.1 * i, 0.05),
+                'payment_delays': rng.uniform(0.1, 0.3),
+                'schedule_delay': 0.1 * i + rng.uniform(0, 0.1),
+                'attrition_rate': 0.1 + 0.005 * step,
+                'defect_rate': rng.uniform(0, 0.2)
+            })
+    return agent
+
+def test_scenario_model_follows_history_trend():
+    history = {metric: np.full(10, np.nan) for metric in INPUT_METRICS}
+    history['attrition_rate'] = np.linspace(0.1, 0.19, 10)
+    model = ScenarioModel.fit(history, horizon=5)
+
+    assert model.mean[INPUT_METRICS.index('attrition_rate')] == pytest.approx(0.24)
+    draws = model.sample(np.random.default_rng(0), 1000, np.ones(len(INPUT_METRICS)), np.zeros(len(INPUT_METRICS)))
+    assert (draws[:, INPUT_METRICS.index('skill_gaps')] == 0).all()  # never reported
+    assert (draws >= 0).all()
+
+def test_seeded_runs_are_reproducible_and_chunking_bounded(project_agent):
+    simulator = MonteCarloSimulator(RiskScoringAgent(), chunk_size=1000)
+    first = simulator.simulate(project_agent.history, 'p1', samples=5500, seed=11)
+    again = simulator.simulate(project_agent.history, 'p1', samples=5500, seed=11)
+    other = simulator.simulate(project_agent.history, 'p1', samples=5500, seed=12)
+
+    assert first == again and first != other
+    assert sum(first['probabilities'].values()) == pytest.approx(1.0)
+    quantiles = list(first['quantiles'].values())
+    assert quantiles == sorted(quantiles)
+    with pytest.raises(ValueError):
+        simulator.simulate(project_agent.history, 'p1', samples=simulator.max_samples + 1)
+
+def test_what_if_shifts_risk_up(project_agent):
+    simulator = MonteCarloSimulator(RiskScoringAgent())
+    baseline = simulator.simulate(project_agent.history, 'p0', samples=20000, seed=1)
+    worse = simulator.simulate(project_agent.history, 'p0', samples=20000, seed=1,
+                               scale={'attrition_rate': 2.0}, shift={'schedule_delay': 0.5})
+
+    assert worse['mean_score'] > baseline['mean_score']
+    assert worse['quantiles']['p50'] > baseline['quantiles']['p50']
+    assert worse['expected_metrics']['schedule_delay'] == pytest.approx(
+        baseline['expected_metrics']['schedule_delay'] + 0.5, abs=1e-4
+    )
+    with pytest.raises(ValueError):
+        simulator.simulate(project_agent.history, 'p0', scale={'morale': 2.0})
+
+def test_portfolio_results_independent_of_workers(project_agent):
+    serial = MonteCarloSimulator(RiskScoringAgent(), workers=1)
+    parallel = MonteCarloSimulator(RiskScoringAgent(), workers=2)
+    expected = serial.simulate_portfolio(project_agent.history, samples=3000, seed=4)
+
+    assert parallel.simulate_portfolio(project_agent.history, samples=3000, seed=4) == expected
+    single = serial.simulate(project_agent.history, 'p2', samples=3000, seed=4)
+    assert expected['p2']['quantiles'] == single['quantiles']
+
+def test_workers_score_with_the_parents_backend(project_agent, tmp_path):
+    path = str(tmp_path / 'model.npy')
+    np.save(path, np.append(np.full(len(INPUT_METRICS), 0.3), 0.1))
+    with open(metadata_path(path), 'w') as f:
+        json.dump({'features': INPUT_METRICS}, f)
+
+    custom = RiskScoringAgent(backend=RuleBasedBackend({'financial': 1.0, 'schedule': 0.0,
+                                                        'resources': 0.0, 'technical': 0.0}))
+    custom.thresholds = dict(custom.thresholds, medium=0.1)
+    for risk_agent in [custom, RiskScoringAgent(backend=LinearModelBackend(path))]:
+        serial = MonteCarloSimulator(risk_agent, workers=1)
+        parallel = MonteCarloSimulator(risk_agent, workers=2)
+        expected = serial.simulate_portfolio(project_agent.history, samples=2000, seed=7)
+        assert parallel.simulate_portfolio(project_agent.history, samples=2000, seed=7) == expected
+        assert expected != MonteCarloSimulator(RiskScoringAgent()).simulate_portfolio(
+            project_agent.history, samples=2000, seed=7
+        )
+
+def test_simulate_endpoint():
+    from main import app
+    body = json.dumps({'samples': 2000, 'seed': 9, 'scale': {'attrition_rate': 2}}).encode()
+    headers = [(b'content-type', b'application/json')]
+
+    async def run():
+        first = await asgi_request(app, 'POST', '/api/project/project-002/simulate', body, headers)
+        second = await asgi_request(app, 'POST', '/api/project/project-002/simulate', body, headers)
+        unknown = await asgi_request(app, 'POST', '/api/project/project-002/simulate', b'{"shift": {"x": 1}}', headers)
+        listed = await asgi_request(app, 'POST', '/api/project/project-002/simulate', b'{"scale": ["attrition_rate"]}', headers)
+        default = await asgi_request(app, 'POST', '/api/project/project-002/simulate')
+        return first, second, unknown, listed, default
+
+    first, second, unknown, listed, default = asyncio.run(run())
+    assert first[0] == 200 and first[1] == second[1]
+    assert json.loads(first[1])['samples'] == 2000
+    assert unknown[0] == 422 and listed[0] == 422
+    assert default[0] == 200 and json.loads(default[1])['samples'] == 10000
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from utils.lazy import LazyModule, lazy_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must not load when a worker imports the app
+HEAVY_MODULES = ['numpy', 'pandas', 'requests', 'jinja2', 'sklearn', 'nltk', 'uvicorn']
+
+# The web framework's own import time is outside our control and not counted
+FRAMEWORK = {'fastapi', 'starlette', 'pydantic', 'pydantic_core', 'anyio', 'typing_extensions', 'yaml'}
+
+# Import time of main.py excluding the framework, in microseconds
+IMPORT_BUDGET_US = 250000
+
+def run_python(*args) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('RISK_PRELOAD', None)
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+def own_import_time(importtime_log: str) -> int:
+    """Cumulative import time of main minus the outermost framework imports"""
+    entries = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, int(cumulative), name.strip()))
+
+    # importtime lists children before parents; walk it backwards to see ancestors first
+    total, framework, ancestors = 0, 0, []
+    for depth, cumulative, name in reversed(entries):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        in_framework = name.split('.')[0] in FRAMEWORK
+        if name == 'main':
+            total = cumulative
+        elif in_framework and not any(is_framework for _, is_framework in ancestors):
+            framework += cumulative
+        ancestors.append((depth, in_framework))
+    return total - framework
+
+def test_lazy_module_loads_on_first_use():
+    assert lazy_import('numpy') is np  # already imported: returned as is
+    module = LazyModule('json')
+    assert module.dumps([1]) == '[1]'
+    assert 'loads' in vars(module)
+
+def test_importing_main_skips_heavy_libraries():
+    result = run_python('-c', f"import main, sys; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    assert result.stdout.strip() == '[]'
+
+def test_import_time_budget():
+    # Best of three runs, so a busy machine does not fail the test
+    timings = [own_import_time(run_python('-X', 'importtime', '-c', 'import main').stderr) for _ in range(3)]
+    assert min(timings) < IMPORT_BUDGET_US, f"main imports in {min(timings)}us outside the framework"
@@ -0,0 +1,32 @@
+from typing import Iterable, List
+import importlib
+import sys
+import types
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    Once loaded, the real module's namespace is copied onto the stand-in,
+    so later attribute lookups are plain dict hits with no extra cost.
+    """
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+def lazy_import(name: str) -> types.ModuleType:
+    """A module by name, deferring the import until it is first used"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+def preload(names: Iterable[str]) -> List[str]:
+    """Import modules now, returning the names that failed to import"""
+    failed = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Preload of {name} failed: {str(e)}")
+            failed.append(name)
+    return failed
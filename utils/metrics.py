@@ -0,0 +1,244 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from functools import wraps
+import asyncio
+import threading
+import time
+
+# Upper bounds in seconds; fine enough at the low end for microsecond-scale methods
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _HistogramSeries:
+    """One labelled series of a Histogram; keep a reference to it on hot paths"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> _HistogramSeries:
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, _HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, value: float, *values) -> None:
+        self.labels(*values).observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for values, series in sorted(self._series.items()):
+            with series._lock:
+                counts, total = list(series.counts), series.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _CounterSeries:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> _CounterSeries:
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, _CounterSeries())
+        return series
+
+    def inc(self, amount: float = 1, *values) -> None:
+        self.labels(*values).inc(amount)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, values)} {_format_value(series.value)}"
+            for values, series in sorted(self._series.items())
+        ]
+
+
+class CallbackMetric:
+    """Metric whose series are read from callbacks when the registry is scraped.
+
+    Suited to values the code already tracks, like queue sizes or cache
+    counters, so nothing extra runs on the hot path.
+    """
+
+    def __init__(self, name: str, kind: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._callbacks = {}
+
+    def set_function(self, function: Callable[[], float], *values) -> None:
+        self._callbacks[values] = function
+
+    def render(self) -> List[str]:
+        lines = []
+        for values, function in sorted(self._callbacks.items(), key=lambda item: item[0]):
+            try:
+                value = function()
+            except Exception as e:
+                print(f"Metric {self.name} callback failed: {str(e)}")
+                continue
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory: Callable):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def histogram(self, name: str, help: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, label_names, buckets))
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help, label_names))
+
+    def callback(self, name: str, kind: str, help: str,
+                 label_names: Sequence[str] = ()) -> CallbackMetric:
+        return self._get_or_create(name, lambda: CallbackMetric(name, kind, help, label_names))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            series = metric.render()
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(series)
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry served at /metrics
+REGISTRY = MetricsRegistry()
+
+AGENT_METHOD_SECONDS = REGISTRY.histogram(
+    'agent_method_duration_seconds', 'Time spent in agent methods', ['method']
+)
+CACHE_HITS = REGISTRY.callback('cache_hits_total', 'counter', 'Cache lookups that hit', ['cache'])
+CACHE_MISSES = REGISTRY.callback('cache_misses_total', 'counter', 'Cache lookups that missed', ['cache'])
+CACHE_HIT_RATIO = REGISTRY.callback('cache_hit_ratio', 'gauge', 'Share of cache lookups that hit', ['cache'])
+QUEUE_DEPTH = REGISTRY.callback('background_queue_depth', 'gauge', 'Items waiting in background worker queues', ['queue'])
+
+
+def timed(func: Callable = None, *, name: Optional[str] = None) -> Callable:
+    """Record a function's duration in agent_method_duration_seconds"""
+    if func is None:
+        return lambda func: timed(func, name=name)
+    series = AGENT_METHOD_SECONDS.labels(name or func.__qualname__)
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                series.observe(time.perf_counter() - started)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            series.observe(time.perf_counter() - started)
+    return wrapper
+
+def register_cache(name: str, get_cache: Callable) -> None:
+    """Export hit/miss counters of any object with `hits` and `misses` attributes"""
+    def ratio():
+        cache = get_cache()
+        lookups = cache.hits + cache.misses
+        return cache.hits / lookups if lookups else None
+
+    CACHE_HITS.set_function(lambda: get_cache().hits, name)
+    CACHE_MISSES.set_function(lambda: get_cache().misses, name)
+    CACHE_HIT_RATIO.set_function(ratio, name)
+
+def register_queue(name: str, depth: Callable[[], int]) -> None:
+    QUEUE_DEPTH.set_function(depth, name)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+def round_array(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Round elementwise exactly as the builtin round() does"""
+    rounded = np.round(values, ndigits)
+    # np.round scales, rounds and unscales, which can disagree with the
+    # correctly-rounded builtin only on values sitting near a halfway point
+    scaled = values * 10.0 ** ndigits
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(ambiguous):
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
@@ -0,0 +1,103 @@
+from typing import Dict, Optional
+from collections import Counter
+import os
+import sys
+import threading
+import time
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler for the running process.
+
+    While started, a background thread wakes every `interval` seconds and
+    records the stack of every other thread. Samples are aggregated as
+    folded stacks ("outer;inner;leaf count" per line), the input format of
+    flamegraph.pl and speedscope. Nothing runs while the profiler is
+    stopped, and it stops itself after `max_duration` seconds.
+    """
+
+    def __init__(self, interval: float = 0.005, max_duration: float = 60.0):
+        self.interval = interval
+        self.max_duration = max_duration
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'SamplingProfiler':
+        """Build a profiler from the `profiling` config section"""
+        return cls(
+            interval=settings.get('interval', 0.005),
+            max_duration=settings.get('max_duration', 60.0)
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None) -> bool:
+        """Start a new capture, discarding the previous one; False if already running"""
+        with self._lock:
+            if self.running:
+                return False
+            if interval is not None:
+                self.interval = interval
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def folded(self) -> str:
+        """Captured samples as folded stacks, most frequent first"""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self) -> Dict:
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'samples': self.samples,
+            'stacks': len(self._stacks),
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at
+        }
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + self.max_duration
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    self._stacks[self._fold(names.get(ident, str(ident)), frame)] += 1
+                self.samples += 1
+        self.stopped_at = time.time()
+
+    def _fold(self, thread_name: str, frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.append(thread_name)
+        stack.reverse()
+        return ';'.join(stack)